@@ -0,0 +1,50 @@
+"""Shared helpers for the benchmark scripts (no Kafka, no SDV required)."""
+import sys
+import time
+import uuid
+from pathlib import Path
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+SYNTH_DIR = ROOT / "data_synthesizer"
+PIPELINE_DIR = ROOT / "fraud_prevention_pipeline"
+
+V_COLS = [f"V{i}" for i in range(1, 29)]
+
+
+def use_synthesizer():
+    """Make the data_synthesizer packages (core, models, services) importable."""
+    if str(SYNTH_DIR) not in sys.path:
+        sys.path.insert(0, str(SYNTH_DIR))
+
+
+def use_pipeline():
+    """Make the Mage project packages (transformers, data_exporters, utils) importable."""
+    if str(PIPELINE_DIR) not in sys.path:
+        sys.path.insert(0, str(PIPELINE_DIR))
+
+
+def fake_sample(n: int, fraud_rate: float = 0.001727, seed: int | None = 0) -> pd.DataFrame:
+    """A frame shaped like `sample_with_base_rate` output, drawn from plain normals."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.standard_normal((n, len(V_COLS))), columns=V_COLS)
+    df["Amount"] = np.round(rng.lognormal(3.0, 1.5, n), 2)
+    df["Class"] = (rng.random(n) < fraud_rate).astype(int)
+    now = datetime.now(timezone.utc)
+    df.insert(0, "transaction_id", [uuid.uuid4().hex for _ in range(n)])
+    df.insert(1, "card_id", rng.integers(0, 100_000, size=n))
+    df["event_time"] = now.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    df["event_time_ms"] = int(now.timestamp() * 1000)
+    return df
+
+
+def timeit(fn, *args, repeat: int = 5, **kwargs) -> float:
+    """Best wall time (seconds) over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best
@@ -0,0 +1,83 @@
+"""
+Per-shape cost of turning a micro-batch into the model's feature matrix:
+legacy `_to_df(...).copy()[FEATURES]` vs. `utils.batch.normalize_batch`.
+
+    python benchmarks/bench_batch.py --rows 3 500 6000
+"""
+import argparse
+import json
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from _common import use_synthesizer, use_pipeline, fake_sample, timeit
+
+use_synthesizer()
+use_pipeline()
+from services.encoding import encode_events, encode_events_binary  # noqa: E402
+from utils.batch import FEATURES, normalize_batch  # noqa: E402
+
+
+def legacy_to_df(msgs):
+    # the helper formerly copy-pasted in compute_fraud_risk_score / export_to_parquet
+    if isinstance(msgs, pd.DataFrame):
+        return msgs
+    if isinstance(msgs, list) and len(msgs) == 1 and isinstance(msgs[0], pd.DataFrame):
+        return msgs[0]
+    if isinstance(msgs, list) and msgs and isinstance(msgs[0], dict):
+        return pd.DataFrame(msgs)
+    if isinstance(msgs, list):
+        flat: List[Dict] = []
+        for m in msgs:
+            if isinstance(m, list):
+                flat.extend(m)
+            elif isinstance(m, dict):
+                flat.append(m)
+            elif isinstance(m, pd.DataFrame):
+                flat.extend(m.to_dict(orient='records'))
+        return pd.DataFrame(flat)
+    return pd.DataFrame([msgs])
+
+
+def legacy(msgs):
+    df = legacy_to_df(msgs).copy()
+    return df[FEATURES].to_numpy()
+
+
+def fast(msgs):
+    return normalize_batch(msgs).features
+
+
+def shapes(df: pd.DataFrame) -> Dict[str, object]:
+    records = [json.loads(p) for p in encode_events(df, 1)]
+    half = len(df) // 2
+    return {
+        "dataframe": df,
+        "list_of_dataframe": [df],
+        "list_of_dicts": records,
+        "list_of_lists_of_dicts": [records[:half], records[half:]],
+        "mixed_dataframes": [df.iloc[:half], df.iloc[half:]],
+        "raw_json_bytes": encode_events(df, 1),
+        "raw_binary_bytes": encode_events_binary(df, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[3, 500, 6000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    for n in args.rows:
+        df = fake_sample(n)
+        for name, msgs in shapes(df).items():
+            t_new = timeit(fast, msgs, repeat=args.repeat)
+            row = {"rows": n, "shape": name, "normalize_rows_per_s": round(n / t_new, 1)}
+            if not name.startswith("raw_"):  # the legacy helper can't decode raw values
+                assert np.allclose(legacy(msgs), fast(msgs), rtol=1e-6, atol=1e-5)
+                t_old = timeit(legacy, msgs, repeat=args.repeat)
+                row.update(legacy_rows_per_s=round(n / t_old, 1), speedup=round(t_old / t_new, 2))
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
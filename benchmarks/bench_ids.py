@@ -0,0 +1,52 @@
+"""
+Ids/s of transaction id and Kafka key generation: per-row `uuid.uuid4().hex` (old
+sampler) plus a second `str(uuid.uuid4())` key per message (old streamer) vs. the
+vectorized `services.ids` generators (transaction and card ids) and each KAFKA_KEY_STRATEGY.
+
+    python benchmarks/bench_ids.py --rows 500 6000 50000
+"""
+import argparse
+import json
+import uuid
+import numpy as np
+from _common import use_synthesizer, timeit
+
+use_synthesizer()
+from services.ids import KEY_STRATEGIES, card_ids, message_keys, random_ids  # noqa: E402
+
+
+def legacy_ids(n: int):
+    ids = [uuid.uuid4().hex for _ in range(n)]
+    keys = [str(uuid.uuid4()).encode("utf-8") for _ in range(n)]
+    return ids, keys
+
+
+def vectorized_ids(n: int, rng: np.random.Generator, strategy: str):
+    ids, cards = random_ids(n, rng), card_ids(n, rng, 100_000)
+    return ids, message_keys(ids, cards, strategy)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[500, 6000, 50000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    # sanity: valid UUID4s, reproducible from the seed
+    ids = random_ids(1000, np.random.default_rng(7))
+    assert all(uuid.UUID(hex=i).version == 4 for i in ids)
+    assert (ids == random_ids(1000, np.random.default_rng(7))).all()
+
+    for n in args.rows:
+        rng = np.random.default_rng(0)
+        t_old = timeit(legacy_ids, n, repeat=args.repeat)
+        row = {"rows": n, "legacy_ids_per_s": round(n / t_old, 1)}
+        for strategy in KEY_STRATEGIES:
+            t = timeit(vectorized_ids, n, rng, strategy, repeat=args.repeat)
+            row[f"{strategy}_ids_per_s"] = round(n / t, 1)
+            row[f"{strategy}_speedup"] = round(t_old / t, 1)
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
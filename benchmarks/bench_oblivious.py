@@ -0,0 +1,59 @@
+"""
+Compiled NumPy oblivious-tree evaluator vs. CatBoostClassifier.predict_proba:
+parity on random and synthetic-looking inputs, then latency per batch size.
+Exits non-zero if any probability differs by more than --max-abs-diff.
+
+    python benchmarks/bench_oblivious.py --sizes 1 10 100 1000 10000 100000
+"""
+import argparse
+import json
+import sys
+import numpy as np
+from _common import use_pipeline, fake_sample, timeit, PIPELINE_DIR
+
+use_pipeline()
+from utils.batch import FEATURES  # noqa: E402
+from utils.model_registry import load_catboost  # noqa: E402
+from utils.oblivious import compile_cbm  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=str(PIPELINE_DIR / "ml_artifacts" / "catboost_fraud.cbm"))
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000, 100000])
+    ap.add_argument("--parity-rows", type=int, default=50000)
+    ap.add_argument("--max-abs-diff", type=float, default=1e-6)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    cb = load_catboost(args.model)
+    compiled = compile_cbm(args.model)
+
+    # parity: data shaped like the stream, plus wide random values that reach the outer borders
+    rng = np.random.default_rng(0)
+    X = np.vstack([
+        fake_sample(args.parity_rows)[FEATURES].to_numpy(dtype=np.float32),
+        (rng.standard_normal((args.parity_rows, len(FEATURES))) * 10).astype(np.float32),
+    ])
+    diff = float(np.abs(cb.predict_proba(X)[:, 1] - compiled.predict_proba(X)[:, 1]).max())
+    print(json.dumps({"parity_rows": len(X), "trees": compiled.n_trees, "depth": compiled.depth,
+                      "max_abs_diff": diff}))
+
+    for n in args.sizes:
+        Xn = fake_sample(n, seed=n)[FEATURES].to_numpy(dtype=np.float32)
+        t_cb = timeit(cb.predict_proba, Xn, repeat=args.repeat)
+        t_np = timeit(compiled.predict_proba, Xn, repeat=args.repeat)
+        print(json.dumps({
+            "rows": n,
+            "catboost_ms": round(t_cb * 1000, 4),
+            "compiled_ms": round(t_np * 1000, 4),
+            "speedup": round(t_cb / t_np, 2),
+            "compiled_rows_per_s": round(n / t_np, 1),
+        }))
+
+    if diff > args.max_abs_diff:
+        sys.exit(f"parity failed: max |p_catboost - p_compiled| = {diff:.3g} > {args.max_abs_diff}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+JSON vs. binary vs. Arrow wire formats: bytes and Kafka messages per event,
+encode/decode throughput.
+
+Encode uses data_synthesizer's encoders; decode uses the pipeline side
+(json.loads + DataFrame, as Mage's JSON serde + data_cleaner do, vs.
+utils.wire.decode_binary / decode_arrow).
+
+    python benchmarks/bench_wire.py --rows 1000 10000 100000
+"""
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from _common import use_synthesizer, use_pipeline, fake_sample, timeit
+
+use_synthesizer()
+use_pipeline()
+from services.encoding import encode_events, encode_events_binary, encode_events_arrow  # noqa: E402
+from utils.wire import decode_binary, decode_arrow, FEATURES  # noqa: E402
+
+
+def decode_json(payloads):
+    return pd.DataFrame([json.loads(p) for p in payloads])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--arrow-rows-per-message", type=int, default=1000)
+    args = ap.parse_args()
+
+    for n in args.rows:
+        df = fake_sample(n)
+        js = encode_events(df, 1)
+        bn = encode_events_binary(df, 1)
+        ar = encode_events_arrow(df, 1, rows_per_message=args.arrow_rows_per_message)
+
+        # round trip: float32 features, everything else exact
+        back = decode_binary(bn)
+        assert (back["transaction_id"].to_numpy() == df["transaction_id"].to_numpy()).all()
+        assert (back["card_id"].to_numpy() == df["card_id"].to_numpy()).all()
+        assert np.allclose(back[FEATURES].to_numpy(), df[FEATURES].to_numpy(), rtol=1e-6, atol=1e-5)
+
+        row = {
+            "rows": n,
+            "json_bytes_per_event": sum(map(len, js)) / n,
+            "binary_bytes_per_event": sum(map(len, bn)) / n,
+            "json_encode_events_per_s": n / timeit(encode_events, df, 1, repeat=args.repeat),
+            "binary_encode_events_per_s": n / timeit(encode_events_binary, df, 1, repeat=args.repeat),
+            "json_decode_events_per_s": n / timeit(decode_json, js, repeat=args.repeat),
+            "binary_decode_events_per_s": n / timeit(decode_binary, bn, repeat=args.repeat),
+            "arrow_bytes_per_event": sum(map(len, ar)) / n,
+            "arrow_messages": len(ar),
+            "arrow_encode_events_per_s": n / timeit(
+                encode_events_arrow, df, 1, rows_per_message=args.arrow_rows_per_message, repeat=args.repeat),
+            "arrow_decode_events_per_s": n / timeit(decode_arrow, ar, repeat=args.repeat),
+        }
+        print(json.dumps({k: (round(v, 1) if isinstance(v, float) else v) for k, v in row.items()}))
+
+
+if __name__ == "__main__":
+    main()
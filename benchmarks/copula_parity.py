@@ -0,0 +1,67 @@
+"""
+Statistical parity and throughput of the NumPy copula engine vs. SDV sample_from_conditions.
+
+For each class, draws rows from both backends and compares every column with a
+two-sample Kolmogorov-Smirnov test, plus the feature correlation matrices.
+Exits non-zero if any column's KS statistic exceeds --max-ks.
+
+    python benchmarks/copula_parity.py --rows 20000 --max-ks 0.05
+"""
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from scipy import stats
+from _common import use_synthesizer, SYNTH_DIR
+
+use_synthesizer()
+from sdv.sampling import Condition  # noqa: E402
+from services.sdv_loader import get_synth  # noqa: E402
+from services.copula import CopulaSampler  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--synth", default=str(SYNTH_DIR / "artifacts" / "creditcard_fraud_gc.pkl"))
+    ap.add_argument("--rows", type=int, default=20000)
+    ap.add_argument("--max-ks", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    synth = get_synth(args.synth)
+    t0 = time.perf_counter()
+    engine = CopulaSampler.from_synthesizer(synth)
+    build_s = time.perf_counter() - t0
+
+    report = {"build_secs": build_s, "classes": {}}
+    failed = False
+    for label in (0, 1):
+        t0 = time.perf_counter()
+        ref = synth.sample_from_conditions([Condition(num_rows=args.rows, column_values={"Class": label})])
+        sdv_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        fast = engine.sample_by_class({label: args.rows}, rng=args.seed)
+        np_s = time.perf_counter() - t0
+
+        cols = engine.feature_cols
+        ks = {c: float(stats.ks_2samp(ref[c], fast[c]).statistic) for c in cols}
+        corr_diff = float(np.abs(ref[cols].corr().to_numpy() - fast[cols].corr().to_numpy()).max())
+        worst = max(ks, key=ks.get)
+        failed |= ks[worst] > args.max_ks
+        report["classes"][label] = {
+            "sdv_rows_per_s": args.rows / sdv_s,
+            "numpy_rows_per_s": args.rows / np_s,
+            "max_ks": ks[worst],
+            "max_ks_column": worst,
+            "max_abs_corr_diff": corr_diff,
+            "ks": ks,
+        }
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
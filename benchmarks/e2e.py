@@ -0,0 +1,297 @@
+"""
+Offline end-to-end benchmark of the hot path, in one process and without a broker:
+
+    sample_with_base_rate -> Streamer encoding -> in-memory queue (stands in for Kafka)
+    -> data_cleaner -> compute_fraud_risk_score -> CustomSink.batch_write
+
+A producer thread samples and encodes chunks (optionally paced to a target rate)
+into a bounded queue; the main thread drains it in loader-sized batches and runs
+the Mage blocks. Sweeps loader batch sizes x rates and reports throughput,
+per-stage latency and peak memory as JSON (one line per run, plus --out).
+Needs both projects' dependencies (the sink subclasses mage-ai's BasePythonSink).
+
+    python benchmarks/e2e.py --events 20000 --batch-sizes 100 500 2000 --rates 0 5000 --out e2e.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import queue
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from _common import use_synthesizer, use_pipeline, V_COLS, PIPELINE_DIR, SYNTH_DIR
+
+use_synthesizer()
+use_pipeline()
+from core.settings import settings  # noqa: E402
+from services.encoding import WIRE_FORMATS  # noqa: E402
+from services.sampling import sample_with_base_rate  # noqa: E402
+from services.sdv_loader import get_sampler  # noqa: E402
+from services.streamer import Streamer  # noqa: E402
+import utils.latency as latency  # noqa: E402
+
+
+# ================================
+# Stand-ins for the pieces that normally need the stack
+# ================================
+
+class FakeSampler:
+    """`sample_by_class` interface of services/copula.py, drawing plain normals (no SDV artifact)."""
+
+    def sample_by_class(self, counts, rng=None):
+        rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        n = sum(counts.values())
+        df = pd.DataFrame(rng.standard_normal((n, len(V_COLS))), columns=V_COLS)
+        df["Amount"] = np.round(rng.lognormal(3.0, 1.5, n), 2)
+        df["Class"] = np.repeat(list(counts), list(counts.values()))
+        return df
+
+
+class MemoryBroker:
+    """Bounded FIFO of (enqueued_at, value) standing in for one Kafka topic partition."""
+
+    def __init__(self, maxsize: int):
+        self._q = queue.Queue(maxsize=maxsize)
+        self.max_depth = 0
+
+    def send(self, value: bytes):
+        self._q.put((time.perf_counter(), value))  # blocks when full, like a saturated producer
+        self.max_depth = max(self.max_depth, self._q.qsize())
+
+    def poll(self, max_records: int, timeout: float):
+        """Up to max_records messages, waiting at most `timeout` after the first one."""
+        try:
+            out = [self._q.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + timeout
+        while len(out) < max_records:
+            try:
+                out.append(self._q.get_nowait())
+            except queue.Empty:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                try:
+                    out.append(self._q.get(timeout=left))
+                except queue.Empty:
+                    break
+        return out
+
+
+def load_block(rel_path: str):
+    """Import a Mage block file the way Mage does: with its decorator already in globals."""
+    path = PIPELINE_DIR / rel_path
+    spec = importlib.util.spec_from_file_location(f"e2e_{path.stem}", path)
+    mod = importlib.util.module_from_spec(spec)
+    mod.__dict__.update(transformer=lambda f: f, streaming_sink=lambda c: c)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+# ================================
+# Reporting
+# ================================
+
+def summary(ms) -> dict:
+    a = np.asarray(ms, dtype=np.float64)
+    if not len(a):
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(a, [50, 95, 99])
+    return {"n": int(len(a)), "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3), "max_ms": round(float(a.max()), 3),
+            "total_ms": round(float(a.sum()), 1)}
+
+
+def hist_summary(h: latency.LatencyHistogram) -> dict:
+    # quantiles as bucket upper bounds, like histogram_quantile without interpolation
+    if not h.count:
+        return {"n": 0}
+    cum = np.cumsum(h.counts)
+    bounds = [float(b) for b in h.bounds] + [None]  # None: above the last bound (+Inf)
+    q = {f"p{int(p * 100)}_ms_le": bounds[int(np.searchsorted(cum, p * h.count))] for p in (0.5, 0.95, 0.99)}
+    return {"n": int(h.count), "mean_ms": round(h.sum / h.count, 3), **q}
+
+
+# ================================
+# One run
+# ================================
+
+def run(args, sampler, blocks, batch_size: int, rate: float) -> dict:
+    cleaner, scorer, sink_mod = blocks
+    # fresh per-row trace histograms for this run (no metrics file)
+    latency._metrics = metrics = latency.PipelineMetrics(None)
+    broker = MemoryBroker(args.queue_max)
+    encode = Streamer.__new__(Streamer)._encode  # only reads settings, no producer/sampler needed
+    raw = args.wire_format != "json"  # RAW_VALUE serde for binary/arrow, JSON serde otherwise
+    timings = {k: [] for k in ("sample", "encode", "queue_wait", "clean", "score", "sink")}
+    produced = {"events": 0, "messages": 0}
+    failed = []
+
+    def produce():
+        try:
+            _produce()
+        except BaseException as e:  # surfaced in the main thread after join
+            failed.append(e)
+
+    def _produce():
+        rng = np.random.default_rng(args.seed)
+        t0 = time.perf_counter()
+        while produced["events"] < args.events:
+            n = min(args.chunk_rows, args.events - produced["events"])
+            if rate > 0:
+                wait = t0 + produced["events"] / rate - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            s = time.perf_counter()
+            df = sample_with_base_rate(sampler, n, args.fraud_rate, rng)
+            e = time.perf_counter()
+            payloads = encode(df)
+            timings["sample"].append((e - s) * 1000.0)
+            timings["encode"].append((time.perf_counter() - e) * 1000.0)
+            for p in payloads:
+                broker.send(p)
+            produced["events"] += n
+            produced["messages"] += len(payloads)
+
+    with tempfile.TemporaryDirectory(prefix="e2e_") as tmp:
+        sink = sink_mod.CustomSink(config={
+            "base_dir": tmp, "grain": "fraud_high_risk", "partition_granularity": args.granularity,
+            "roll_max_rows": args.roll_rows, "roll_max_age_secs": args.roll_secs,
+        })
+        if args.tracemalloc:
+            tracemalloc.start()
+        producer = threading.Thread(target=produce, name="e2e-producer", daemon=True)
+        t_start = time.perf_counter()
+        producer.start()
+
+        consumed = high_risk = batches = 0
+        while producer.is_alive() or consumed < produced["messages"]:
+            msgs = broker.poll(batch_size, args.poll_ms / 1000.0)
+            if not msgs:
+                continue
+            now = time.perf_counter()
+            timings["queue_wait"].extend((now - t) * 1000.0 for t, _ in msgs)
+            values = [v if raw else json.loads(v) for _, v in msgs]
+
+            t0 = time.perf_counter()
+            df = cleaner.transform(values)
+            t1 = time.perf_counter()
+            out = scorer.transform(df)
+            t2 = time.perf_counter()
+            sink.batch_write(out)
+            t3 = time.perf_counter()
+            timings["clean"].append((t1 - t0) * 1000.0)
+            timings["score"].append((t2 - t1) * 1000.0)
+            timings["sink"].append((t3 - t2) * 1000.0)
+            consumed += len(msgs)
+            high_risk += len(out)
+            batches += 1
+        producer.join()
+        if failed:
+            raise failed[0]
+        t_close = time.perf_counter()
+        sink.destroy()  # commit what is still buffered, so produce_to_commit covers every row
+        t_end = time.perf_counter()
+
+        peak = None
+        if args.tracemalloc:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        writer = sink.writer
+
+    secs = t_close - t_start
+    return {
+        "wire_format": args.wire_format,
+        "model_backend": args.model_backend,
+        "batch_size": batch_size,
+        "rate_eps": rate,
+        "events": produced["events"],
+        "messages": produced["messages"],
+        "batches": batches,
+        "secs": round(secs, 4),
+        "events_per_sec": round(produced["events"] / secs, 1) if secs else None,
+        "close_secs": round(t_end - t_close, 4),
+        "max_queue_depth": broker.max_depth,
+        "high_risk_rows": high_risk,
+        "files_committed": writer.files_committed,
+        "rows_committed": writer.rows_committed,
+        "stages": {k: summary(v) for k, v in timings.items()},
+        "trace": {k: hist_summary(h) for k, h in metrics.stages.items()},
+        "peak_traced_mb": round(peak / 2**20, 2) if peak is not None else None,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=20000, help="events per run")
+    ap.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 500, 2000],
+                    help="loader batch_size (messages per pipeline micro-batch)")
+    ap.add_argument("--rates", type=float, nargs="+", default=[0],
+                    help="producer target events/s; 0 = as fast as possible")
+    ap.add_argument("--chunk-rows", type=int, default=500, help="rows sampled and encoded per producer step")
+    ap.add_argument("--sampler", choices=["fake", "numpy", "sdv"], default="fake")
+    ap.add_argument("--synth-path", default=str(SYNTH_DIR / settings.SYNTH_PATH))
+    ap.add_argument("--fraud-rate", type=float, default=settings.FRAUD_RATE)
+    ap.add_argument("--wire-format", choices=WIRE_FORMATS, default="json")
+    ap.add_argument("--model", default=str(PIPELINE_DIR / "ml_artifacts" / "catboost_fraud.cbm"))
+    ap.add_argument("--model-backend", choices=["catboost", "compiled"], default="catboost")
+    ap.add_argument("--granularity", choices=["month", "day", "hour"], default="month")
+    ap.add_argument("--roll-rows", type=int, default=100_000)
+    ap.add_argument("--roll-secs", type=float, default=30)
+    ap.add_argument("--queue-max", type=int, default=100_000, help="in-memory queue bound (messages)")
+    ap.add_argument("--poll-ms", type=float, default=100, help="loader wait for a batch to fill")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-tracemalloc", dest="tracemalloc", action="store_false",
+                    help="skip peak-memory tracing (it slows allocation-heavy stages)")
+    ap.add_argument("--out", help="write the full report here as JSON")
+    args = ap.parse_args()
+
+    settings.WIRE_FORMAT = args.wire_format
+    # the blocks read these at import time
+    os.environ["FRAUD_MODEL_PATH"] = args.model
+    os.environ["FRAUD_MODEL_BACKEND"] = args.model_backend
+    blocks = (load_block("transformers/data_cleaner.py"),
+              load_block("transformers/compute_fraud_risk_score.py"),
+              load_block("data_exporters/export_to_parquet.py"))
+
+    t0 = time.perf_counter()
+    sampler = FakeSampler() if args.sampler == "fake" else get_sampler(args.synth_path, args.sampler)
+    sampler_load = time.perf_counter() - t0
+    # load the model outside the measured runs
+    t0 = time.perf_counter()
+    latency._metrics = latency.PipelineMetrics(None)
+    blocks[1].transform(blocks[0].transform(sample_with_base_rate(sampler, 10, 0.5, args.seed)))
+    warmup = time.perf_counter() - t0
+
+    runs = []
+    for rate in args.rates:
+        for batch_size in args.batch_sizes:
+            r = run(args, sampler, blocks, batch_size, rate)
+            print(json.dumps(r), flush=True)
+            runs.append(r)
+
+    if args.out:
+        report = {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sampler": args.sampler,
+            "sampler_load_secs": round(sampler_load, 3),
+            "warmup_secs": round(warmup, 3),
+            "config": {k: v for k, v in vars(args).items() if k != "out"},
+            "runs": runs,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,41 @@
-from fastapi import APIRouter, HTTPException
-from models.schemas import StartRequest, StatusResponse
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import PlainTextResponse
+from core.settings import settings
+from models.schemas import StartRequest, StartupStatus, StatusResponse
+from services.metrics import prometheus_status
+from services.sharding import ShardedStreamer
 from services.streamer import Streamer
 
 router = APIRouter()
-streamer = Streamer()  # one instance backing the API
+# one instance backing the API (SHARDS > 1: a control plane over N worker processes)
+streamer = ShardedStreamer(settings.SHARDS) if settings.SHARDS > 1 else Streamer()
 
 @router.get("/health")
 def health():
+    # liveness: the process answers, even while the sampler is still loading
     return {"ok": True}
 
+@router.get("/ready", response_model=StartupStatus)
+def ready(response: Response):
+    # readiness: 503 until the sampler is loaded
+    st = streamer.startup()
+    if not st.ready:
+        response.status_code = 503
+    return st
+
 @router.get("/status", response_model=StatusResponse)
 def status():
     return streamer.status()
 
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text format; pair with the pipeline's metrics file for end-to-end latency
+    return prometheus_status(streamer.status())
+
 @router.post("/start", response_model=StatusResponse)
 async def start(req: StartRequest):
     try:
-        await streamer.start(
-            interval_secs=req.interval_secs,
-            fraud_rate=req.fraud_rate,
-            batch_min=req.batch_min,
-            batch_max=req.batch_max,
-        )
+        await streamer.start(**req.model_dump())
         return streamer.status()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -3,6 +3,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     KAFKA_BOOTSTRAP: str = "localhost:9092"
     KAFKA_TOPIC: str = "creditcard-transactions"
+    KAFKA_KEY_STRATEGY: str = "transaction_id"  # transaction_id | entity | round_robin (services/ids.py)
+    CARD_COUNT: int = 100_000  # synthetic cards each event's card_id is drawn from (entity keys)
     SYNTH_PATH: str = "artifacts/creditcard_fraud_gc.pkl"
     FRAUD_RATE: float = 0.001727
     INTERVAL_SECS: int = 20
@@ -10,6 +12,37 @@ class Settings(BaseSettings):
     BATCH_MAX: int = 6000
     RNG_SEED: int | None = None
     AUTO_START: bool = True
+    # burst: random BATCH_MIN..BATCH_MAX dump every INTERVAL_SECS
+    # rate:  steady/profiled events per second driven by a token bucket (services/rate.py)
+    STREAM_MODE: str = "burst"
+    RATE_PROFILE: str = "constant"  # constant | ramp | step | diurnal
+    RATE_EPS: float = 100.0
+    RATE_EPS_END: float | None = None  # ramp target
+    RATE_STEPS: list[float] = []  # step levels, e.g. '[100, 500, 1000]'
+    RATE_PROFILE_SECS: float = 300.0  # ramp duration / length of each step
+    RATE_PERIOD_SECS: float = 86400.0  # diurnal period
+    RATE_AMPLITUDE: float = 0.5  # diurnal swing around RATE_EPS
+    RATE_CHUNK_ROWS: int = 1000  # rows per prefetched batch in rate mode
+    # sharded mode: N worker processes, each with its own sampler + producer
+    SHARDS: int = 1
+    SHARD_PIN_PARTITIONS: bool = False  # shard i produces only to partition i % n_partitions
+    SAMPLER_BACKEND: str = "sdv"  # sdv | numpy (native Gaussian-copula engine, services/copula.py) | corpus
+    SAMPLER_CACHE: bool = True  # numpy backend: reuse copula parameters extracted to an .npz (no SDV import)
+    SAMPLER_CACHE_PATH: str | None = None  # default: SYNTH_PATH with an .npz suffix
+    CORPUS_PATH: str = "artifacts/corpus"  # SAMPLER_BACKEND=corpus: directory written by build_corpus.py
+    EVENT_TIME_JITTER_MS: int = 0  # spread each sent batch's event_time over the last N ms
+    # sampling runs off the event loop and is prefetched into a bounded queue
+    SAMPLER_POOL: str = "thread"  # thread | process
+    SAMPLER_WORKERS: int = 1
+    PREFETCH_DEPTH: int = 4
+    # producer tuning: bounded in-flight window + broker-side batching
+    PRODUCER_MAX_INFLIGHT: int = 10000
+    PRODUCER_LINGER_MS: int = 20
+    PRODUCER_MAX_BATCH_BYTES: int = 262144
+    PRODUCER_COMPRESSION: str | None = None  # gzip | snappy | lz4 | zstd
+    WIRE_FORMAT: str = "json"  # json (v1) | binary (v2, fixed layout) | arrow (v3, record batch per message)
+    ARROW_ROWS_PER_MESSAGE: int = 1000
+    VALIDATE_EVENTS: bool = False  # debug: validate every encoded payload against TransactionEvent
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
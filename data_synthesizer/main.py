@@ -1,15 +1,28 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from core.settings import settings
 from api.routers.stream import router as stream_router, streamer  # reuse the same instance
 
+async def warm_up():
+    # in the background, so /health answers while the sampler loads (see /ready)
+    try:
+        if settings.AUTO_START:
+            await streamer.start()
+        else:
+            await streamer.load()
+    except Exception as e:
+        print(f"[startup] {'auto start' if settings.AUTO_START else 'sampler load'} failed: {e}", flush=True)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    if settings.AUTO_START:
-        await streamer.start()
+    task = asyncio.create_task(warm_up())
     try:
         yield
     finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
         await streamer.stop()
 
 app = FastAPI(title="SDV → Kafka Pusher", version="1.0.0", lifespan=lifespan)
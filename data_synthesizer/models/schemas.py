@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, conint, ConfigDict
-from typing import Optional
+from typing import Literal, Optional
 
 # API payloads
 class StartRequest(BaseModel):
@@ -7,9 +7,61 @@ class StartRequest(BaseModel):
     fraud_rate:   Optional[float] = Field(None, ge=0.0, le=1.0)
     batch_min:    Optional[int] = Field(None, ge=1)
     batch_max:    Optional[int] = Field(None, ge=1)
+    mode:         Optional[Literal["burst", "rate"]] = None
+    rate_profile: Optional[Literal["constant", "ramp", "step", "diurnal"]] = None
+    rate_eps:     Optional[float] = Field(None, ge=0.0)
+    rate_eps_end: Optional[float] = Field(None, ge=0.0)
+    rate_steps:   Optional[list[float]] = None
+    rate_profile_secs: Optional[float] = Field(None, gt=0.0)
+    rate_period_secs:  Optional[float] = Field(None, gt=0.0)
+    rate_amplitude:    Optional[float] = Field(None, ge=0.0, le=1.0)
+
+class HistogramStatus(BaseModel):
+    buckets: dict[str, int]  # cumulative count per upper bound (ms), '+Inf' last
+    sum: float
+    count: int
+
+class ProducerStatus(BaseModel):
+    acked_total: int
+    errors_total: int
+    last_error: str | None
+    in_flight: int
+    max_in_flight: int
+    acked_per_sec: float
+    send_latency_ms_p50: float | None
+    send_latency_ms_p95: float | None
+    send_latency_ms_p99: float | None
+    send_latency_ms_histogram: HistogramStatus | None = None  # produce -> broker ack
+    compression: str | None
+
+class SamplerStatus(BaseModel):
+    pool: str
+    workers: int
+    queue_depth: int
+    queue_max: int
+    batches_total: int
+    rows_total: int
+    sample_ms_per_row: float | None
+    last_error: str | None
+
+class RateStatus(BaseModel):
+    profile: str
+    requested_eps: float
+    achieved_eps: float
+    sent_total: int
+    elapsed_secs: float
+
+class StartupStatus(BaseModel):
+    ready: bool  # sampler loaded, /start can produce right away (GET /ready)
+    backend: str
+    load_secs: float | None  # sampler load alone (SDV import + unpickle, or cache/corpus open)
+    ready_after_secs: float | None  # cold start: process start -> ready
+    error: str | None = None
 
 class StatusResponse(BaseModel):
     running: bool
+    shard_id: int | None = None
+    partition: int | None = None
     last_sent_at_epoch: float | None
     last_batch_size: int | None
     interval_secs: int
@@ -18,11 +70,18 @@ class StatusResponse(BaseModel):
     batch_max: int
     topic: str
     bootstrap: str
+    mode: str = "burst"
+    rate: RateStatus | None = None
+    producer: ProducerStatus | None = None
+    sampler: SamplerStatus | None = None
+    startup: StartupStatus | None = None
+    shards: list["StatusResponse"] | None = None  # sharded mode: per-worker status
 
 # Kafka message schema (flat, explicit fields)
 class TransactionEvent(BaseModel):
     # sampler metadata
     transaction_id: str
+    card_id: int | None = None  # synthetic card (the Kafka key with KAFKA_KEY_STRATEGY=entity)
     event_time: str
     event_time_ms: int
 
@@ -0,0 +1,211 @@
+import json
+import os
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy.special import ndtr, ndtri
+
+# copulas univariate class name → (scipy distribution, shape parameter names)
+_SCIPY_MARGINALS = {
+    "BetaUnivariate": (stats.beta, ("a", "b")),
+    "GaussianUnivariate": (stats.norm, ()),
+    "TruncatedGaussian": (stats.truncnorm, ("a", "b")),
+    "GammaUnivariate": (stats.gamma, ("a",)),
+    "UniformUnivariate": (stats.uniform, ()),
+    "LogLaplace": (stats.loglaplace, ("c",)),
+    "StudentTUnivariate": (stats.t, ("df",)),
+}
+
+_EPS = 1e-12
+
+
+def _marginal_ppf(spec: dict, u: np.ndarray) -> np.ndarray:
+    kind = spec["type"].rsplit(".", 1)[-1]
+    if kind not in _SCIPY_MARGINALS:
+        raise ValueError(f"Unsupported marginal '{kind}' for the numpy sampler")
+    dist, shapes = _SCIPY_MARGINALS[kind]
+    if float(spec.get("scale", 1.0)) == 0.0:  # constant column fitted by copulas
+        return np.full_like(u, float(spec["loc"]))
+    return dist.ppf(u, *[spec[s] for s in shapes], loc=spec["loc"], scale=spec["scale"])
+
+
+def _marginal_cdf(spec: dict, x: np.ndarray) -> np.ndarray:
+    kind = spec["type"].rsplit(".", 1)[-1]
+    dist, shapes = _SCIPY_MARGINALS[kind]
+    if float(spec.get("scale", 1.0)) == 0.0:
+        return (np.asarray(x) >= float(spec["loc"])).astype(float)
+    return dist.cdf(x, *[spec[s] for s in shapes], loc=spec["loc"], scale=spec["scale"])
+
+
+def _safe_cholesky(cov: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        w, v = np.linalg.eigh((cov + cov.T) / 2.0)
+        return np.linalg.cholesky((v * np.clip(w, 1e-10, None)) @ v.T)
+
+
+class CopulaSampler:
+    """
+    Class-conditional Gaussian-copula sampler in plain NumPy.
+
+    Built once from a fitted SDV GaussianCopulaSynthesizer: the correlation
+    matrix, the fitted marginals and the UniformEncoder interval of each `Class`
+    value are pulled out, so sampling a class needs no SDV and no reject/retry:
+
+    1. draw the latent Class coordinate from the standard normal truncated to
+       that class's interval (exact conditioning, inverse-CDF method);
+    2. draw the other coordinates from the conditional normal given it
+       (mean = rho * z_class, Cholesky of the Schur complement);
+    3. map each coordinate through its inverse marginal CDF. By default the
+       ppf is tabulated on a dense latent grid and evaluated with np.interp,
+       which is orders of magnitude faster than scipy's iterative ppf;
+    4. apply the synthesizer's min/max clipping and learned rounding.
+
+    Exposes `sample_by_class`, which `sample_with_base_rate` dispatches to.
+    `save`/`load` round-trip the extracted parameters through an .npz file.
+    """
+
+    def __init__(self, columns: List[str], corr: np.ndarray, marginals: List[dict],
+                 class_col: str, class_intervals: Dict[int, tuple],
+                 bounds: Dict[str, tuple], rounding: Dict[str, int],
+                 grid_size: int = 8193, grid_limit: float = 8.5):
+        self.columns = list(columns)
+        self.class_col = class_col
+        self.class_intervals = {int(k): (float(a), float(b)) for k, (a, b) in class_intervals.items()}
+        self.bounds = bounds
+        self.rounding = rounding
+        self.grid_size, self.grid_limit = int(grid_size), float(grid_limit)
+        self._spec = list(marginals)  # all columns, as fitted (kept for save())
+
+        corr = np.asarray(corr, dtype=float)
+        self.corr = corr
+        c = self.columns.index(class_col)
+        self.feature_cols = [col for col in self.columns if col != class_col]
+        o = [i for i in range(len(self.columns)) if i != c]
+
+        # conditional normal of the features given the latent Class coordinate
+        self._beta = corr[o, c] / corr[c, c]
+        self._chol = _safe_cholesky(corr[np.ix_(o, o)] - np.outer(self._beta, corr[c, o]))
+
+        # latent truncation bounds per class value, as standard-normal probabilities
+        class_spec = marginals[c]
+        self._class_p = {}
+        for k, (lo, hi) in self.class_intervals.items():
+            plo, phi = _marginal_cdf(class_spec, np.array([lo, hi]))
+            self._class_p[k] = (float(np.clip(plo, _EPS, 1 - _EPS)), float(np.clip(phi, _EPS, 1 - _EPS)))
+
+        # tabulated inverse marginals on a latent grid: x_j = ppf_j(Phi(z))
+        self.marginals = [marginals[i] for i in o]
+        self._grid = np.linspace(-grid_limit, grid_limit, grid_size)
+        u = np.clip(ndtr(self._grid), _EPS, 1 - _EPS)
+        self._tables = np.vstack([_marginal_ppf(m, u) for m in self.marginals])
+
+    @classmethod
+    def from_synthesizer(cls, synth, class_col: str = "Class", **kwargs) -> "CopulaSampler":
+        model = synth._model  # copulas GaussianMultivariate
+        if model is None:
+            raise ValueError("Synthesizer is not fitted")
+        params = model.to_dict()
+        columns = list(params["columns"])
+
+        transformers = synth.get_transformers()
+        enc = transformers.get(class_col)
+        if enc is None or not hasattr(enc, "intervals"):
+            raise ValueError(f"'{class_col}' must be encoded with rdt's UniformEncoder for the numpy sampler")
+
+        bounds, rounding = {}, {}
+        for col in columns:
+            t = transformers.get(col)
+            if col == class_col or t is None:
+                continue
+            if getattr(t, "enforce_min_max_values", False):
+                bounds[col] = (t._min_value, t._max_value)
+            if getattr(t, "learn_rounding_scheme", False) and t._rounding_digits is not None:
+                rounding[col] = int(t._rounding_digits)
+
+        return cls(
+            columns=columns,
+            corr=np.asarray(params["correlation"], dtype=float),
+            marginals=params["univariates"],
+            class_col=class_col,
+            class_intervals=enc.intervals,
+            bounds=bounds,
+            rounding=rounding,
+            **kwargs,
+        )
+
+    def save(self, path: str):
+        # everything __init__ needs, so a worker can rebuild the sampler without importing SDV
+        meta = {
+            "columns": self.columns,
+            "marginals": self._spec,
+            "class_col": self.class_col,
+            "class_intervals": {str(k): v for k, v in self.class_intervals.items()},
+            "bounds": self.bounds,
+            "rounding": self.rounding,
+            "grid_size": self.grid_size,
+            "grid_limit": self.grid_limit,
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"  # several workers may build it at once: publish atomically
+        with open(tmp, "wb") as f:
+            np.savez(f, corr=self.corr, meta=np.array(json.dumps(meta, default=float)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CopulaSampler":
+        with np.load(path, allow_pickle=False) as z:
+            corr, meta = z["corr"], json.loads(str(z["meta"]))
+        return cls(
+            columns=meta["columns"],
+            corr=corr,
+            marginals=meta["marginals"],
+            class_col=meta["class_col"],
+            class_intervals={int(k): tuple(v) for k, v in meta["class_intervals"].items()},
+            bounds={k: tuple(v) for k, v in meta["bounds"].items()},
+            rounding=meta["rounding"],
+            grid_size=meta["grid_size"],
+            grid_limit=meta["grid_limit"],
+        )
+
+    def _latent(self, label: int, n: int, rng: np.random.Generator) -> np.ndarray:
+        plo, phi = self._class_p[label]
+        z_c = ndtri(rng.uniform(plo, phi, size=n))
+        eps = rng.standard_normal((n, len(self.feature_cols)))
+        return z_c[:, None] * self._beta + eps @ self._chol.T
+
+    def sample_by_class(self, counts: Dict[int, int], rng: np.random.Generator | int | None = None,
+                        exact: bool = False) -> pd.DataFrame:
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        counts = {int(k): int(v) for k, v in counts.items() if v}
+        unknown = set(counts) - set(self._class_p)
+        if unknown:
+            raise ValueError(f"Unknown {self.class_col} value(s): {sorted(unknown)}")
+
+        n = sum(counts.values())
+        z = np.empty((n, len(self.feature_cols)))
+        labels = np.empty(n, dtype=np.int64)
+        i = 0
+        for label, k in counts.items():
+            z[i:i + k] = self._latent(label, k, rng)
+            labels[i:i + k] = label
+            i += k
+
+        out = {}
+        for j, col in enumerate(self.feature_cols):
+            if exact:
+                x = _marginal_ppf(self.marginals[j], np.clip(ndtr(z[:, j]), _EPS, 1 - _EPS))
+            else:
+                x = np.interp(z[:, j], self._grid, self._tables[j])
+            if col in self.bounds:
+                lo, hi = self.bounds[col]
+                x = np.clip(x, lo, hi)
+            if col in self.rounding:
+                x = np.round(x, self.rounding[col])
+            out[col] = x
+
+        df = pd.DataFrame(out)
+        df.insert(self.columns.index(self.class_col), self.class_col, labels)
+        return df
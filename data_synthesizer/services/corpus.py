@@ -0,0 +1,139 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from services.encoding import FRAGMENT_COL, V_COLS
+from services.ids import card_ids, random_ids
+from services.sampling import sample_with_base_rate, stamp_event_time
+
+# Pre-generated event corpus, replayed instead of sampling (SAMPLER_BACKEND=corpus).
+# <dir>/features.npy    (n, 29) float32, V1..V28 + Amount
+# <dir>/class.npy       (n,) uint8
+# <dir>/payloads.bin    optional: pre-encoded JSON fragments, back to back
+# <dir>/offsets.npy     optional: (n + 1,) int64 fragment boundaries in payloads.bin
+# <dir>/meta.json       written last; a corpus without it is incomplete
+# Everything is memory-mapped, so replay costs page-cache reads, not RAM or SDV.
+
+FEATURE_COLS = V_COLS + ["Amount"]
+CORPUS_SOURCE = "corpus"
+
+
+def json_fragments(X: np.ndarray, y: np.ndarray) -> list:
+    """Per-row '"V1":..,"Amount":..,"Class":c,"_source":..,"_schema_version":1' (see encoding.FRAGMENT_COL)."""
+    df = pd.DataFrame(X.astype(np.float64), columns=FEATURE_COLS)
+    df["Class"] = y.astype(np.int64)
+    df["_source"] = CORPUS_SOURCE
+    df["_schema_version"] = 1
+    lines = df.to_json(orient="records", lines=True, double_precision=15).encode("utf-8").splitlines()
+    return [line[1:-1] for line in lines]  # drop the braces
+
+
+def build_corpus(sampler, out_dir: str, n_rows: int, fraud_rate: float, seed=None,
+                 chunk_rows: int = 100_000, payloads: bool = False, log=print) -> dict:
+    """Sample `n_rows` in chunks straight into memory-mapped files under `out_dir`."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    meta_path = out / "meta.json"
+    if meta_path.exists():
+        meta_path.unlink()  # mark incomplete until the new one is written
+    rng = np.random.default_rng(seed)
+
+    X = np.lib.format.open_memmap(out / "features.npy", mode="w+", dtype=np.float32,
+                                  shape=(n_rows, len(FEATURE_COLS)))
+    y = np.lib.format.open_memmap(out / "class.npy", mode="w+", dtype=np.uint8, shape=(n_rows,))
+    offsets = blob = None
+    if payloads:
+        offsets = np.lib.format.open_memmap(out / "offsets.npy", mode="w+", dtype=np.int64, shape=(n_rows + 1,))
+        offsets[0] = 0
+        blob = open(out / "payloads.bin", "wb")
+
+    try:
+        i = 0
+        while i < n_rows:
+            k = min(int(chunk_rows), n_rows - i)
+            df = sample_with_base_rate(sampler, k, fraud_rate, rng)
+            X[i:i + k] = df[FEATURE_COLS].to_numpy(dtype=np.float32)
+            y[i:i + k] = df["Class"].to_numpy(dtype=np.uint8)
+            if blob is not None:
+                frags = json_fragments(X[i:i + k], y[i:i + k])
+                offsets[i + 1:i + k + 1] = offsets[i] + np.cumsum([len(f) for f in frags])
+                blob.write(b"".join(frags))
+            i += k
+            log(f"[corpus] {i}/{n_rows} rows")
+    finally:
+        if blob is not None:
+            blob.close()
+    X.flush()
+    y.flush()
+    if offsets is not None:
+        offsets.flush()
+
+    meta = {
+        "rows": int(n_rows),
+        "fraud_rate": float(fraud_rate),
+        "frauds": int(np.count_nonzero(y)),
+        "columns": FEATURE_COLS,
+        "payloads": bool(payloads),
+        "seed": seed,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    meta_path.write_text(json.dumps(meta, indent=1), encoding="utf-8")
+    return meta
+
+
+class Corpus:
+    """
+    Read side of a corpus directory. `replay(n)` returns a frame shaped like
+    `sample_with_base_rate` output: a contiguous (wrapping) run of rows from a
+    random start, with fresh transaction ids and a current timestamp. The fraud
+    rate is the one the corpus was built with.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No complete corpus at {self.path} (build one with build_corpus.py)")
+        self.meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        self.features = np.load(self.path / "features.npy", mmap_mode="r")
+        self.labels = np.load(self.path / "class.npy", mmap_mode="r")
+        self._blob = self._offsets = None
+        if self.meta.get("payloads"):
+            self._blob = np.memmap(self.path / "payloads.bin", dtype=np.uint8, mode="r")
+            self._offsets = np.load(self.path / "offsets.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def _runs(self, start: int, n: int):
+        # [start, start + n) over a ring of len(self) rows, as at most ceil(n / len) + 1 slices
+        size = len(self)
+        while n > 0:
+            k = min(n, size - start)
+            yield start, start + k
+            n -= k
+            start = 0
+
+    def replay(self, n_rows: int, rng: np.random.Generator | int | None = None,
+               n_cards: int = 100_000) -> pd.DataFrame:
+        if not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        if n_rows <= 0 or not len(self):
+            return pd.DataFrame([])
+        runs = list(self._runs(int(rng.integers(0, len(self))), int(n_rows)))
+
+        X = np.concatenate([self.features[a:b] for a, b in runs])
+        df = pd.DataFrame(X, columns=FEATURE_COLS)
+        df["Class"] = np.concatenate([self.labels[a:b] for a, b in runs]).astype(np.int64)
+        if self._blob is not None:
+            frags = []
+            for a, b in runs:
+                offs = np.asarray(self._offsets[a:b + 1])
+                buf = self._blob[offs[0]:offs[-1]].tobytes()
+                rel = offs - offs[0]
+                frags.extend(buf[s:e] for s, e in zip(rel[:-1].tolist(), rel[1:].tolist()))
+            df[FRAGMENT_COL] = frags
+        df.insert(0, "transaction_id", random_ids(len(df), rng))
+        df.insert(1, "card_id", card_ids(len(df), rng, n_cards))
+        return stamp_event_time(df)
@@ -0,0 +1,172 @@
+from typing import List
+import numpy as np
+import pandas as pd
+from models.schemas import TransactionEvent
+
+V_COLS = [f"V{i}" for i in range(1, 29)]  # V1..V28
+
+# Wire order/aliases exactly as TransactionEvent.model_dump_json(by_alias=True)
+WIRE_COLUMNS = [
+    f.alias or name for name, f in TransactionEvent.model_fields.items()
+]
+
+SOURCE = "sdv"
+SCHEMA_VERSION = 1
+
+# Binary wire format (_schema_version 4): one fixed-layout little-endian record per
+# message. `_source` is implied; transaction_id is the raw 16 bytes of its hex id;
+# features are float32 in FEATURES order (V1..V28, Amount). 156 bytes vs ~800 of JSON.
+# Version 2 was the same record without the trailing card_id; the pipeline still reads it.
+BINARY_MAGIC = b"FT"
+BINARY_SCHEMA_VERSION = 4
+BINARY_DTYPE = np.dtype([
+    ("magic", "S2"),
+    ("version", "u1"),
+    ("Class", "u1"),
+    ("transaction_id", "u1", (16,)),
+    ("event_time_ms", "<i8"),
+    ("produce_time_ms", "<i8"),
+    ("features", "<f4", (len(V_COLS) + 1,)),
+    ("card_id", "<u4"),
+])
+
+# Arrow wire format (_schema_version 3): many rows per Kafka message, each message a
+# self-describing Arrow IPC stream holding one record batch. Needs pyarrow (optional).
+ARROW_SCHEMA_VERSION = 3
+
+WIRE_FORMATS = ("json", "binary", "arrow")
+
+# Pre-encoded JSON (services/corpus.py): per-row fragment with everything but the ids,
+# times and produce stamp, i.e. '"V1":..,"Amount":..,"Class":0,"_source":..,"_schema_version":1'
+FRAGMENT_COL = "_json_fragment"
+
+
+def encode_events(df: pd.DataFrame, produce_time_ms: int,
+                  source: str = SOURCE, schema_version: int = SCHEMA_VERSION,
+                  validate: bool = False) -> List[bytes]:
+    """
+    Encode a sampled frame into ready-to-send JSON payloads in one columnar pass.
+
+    The whole frame is serialized by pandas' C JSON writer (one line per row) and
+    split, instead of building a TransactionEvent per row. With `validate=True`
+    every payload is round-tripped through TransactionEvent (debug mode).
+    """
+    if df.empty:
+        return []
+
+    wire = pd.DataFrame({
+        "transaction_id": df["transaction_id"].astype(str),
+        "card_id": df["card_id"].astype("int64"),
+        "event_time": df["event_time"].astype(str),
+        "event_time_ms": df["event_time_ms"].astype("int64"),
+    })
+    feats = df[V_COLS + ["Amount"]].astype("float64")
+    wire = pd.concat([wire, feats], axis=1, copy=False)
+    wire["Class"] = df["Class"].astype("int64")
+    wire["_source"] = source
+    wire["_schema_version"] = int(schema_version)
+    wire["_produce_time_ms"] = int(produce_time_ms)
+    wire = wire[WIRE_COLUMNS]
+
+    lines = wire.to_json(orient="records", lines=True, double_precision=15)
+    payloads = lines.encode("utf-8").splitlines()
+
+    if validate:
+        for p in payloads:
+            TransactionEvent.model_validate_json(p)
+    return payloads
+
+
+def encode_events_prebuilt(df: pd.DataFrame, produce_time_ms: int, validate: bool = False) -> List[bytes]:
+    """JSON payloads from pre-encoded fragments (FRAGMENT_COL): only ids and times are formatted per row."""
+    if df.empty:
+        return []
+    tail = b',"_produce_time_ms":%d}' % int(produce_time_ms)
+    payloads = [
+        f'{{"transaction_id":"{i}","card_id":{c},"event_time":"{t}","event_time_ms":{m},'.encode("ascii") + f + tail
+        for i, c, t, m, f in zip(df["transaction_id"].astype(str).tolist(), df["card_id"].astype("int64").tolist(),
+                                 df["event_time"].astype(str).tolist(), df["event_time_ms"].astype("int64").tolist(),
+                                 df[FRAGMENT_COL].tolist())
+    ]
+    if validate:
+        for p in payloads:
+            TransactionEvent.model_validate_json(p)
+    return payloads
+
+
+def encode_events_binary(df: pd.DataFrame, produce_time_ms: int) -> List[bytes]:
+    """Encode a sampled frame into fixed-layout binary payloads (see BINARY_DTYPE)."""
+    n = len(df)
+    if n == 0:
+        return []
+
+    rec = np.empty(n, dtype=BINARY_DTYPE)
+    rec["magic"] = BINARY_MAGIC
+    rec["version"] = BINARY_SCHEMA_VERSION
+    rec["Class"] = df["Class"].to_numpy(dtype=np.uint8)
+    rec["transaction_id"] = np.frombuffer(
+        bytes.fromhex("".join(df["transaction_id"].astype(str))), dtype=np.uint8
+    ).reshape(n, 16)
+    rec["event_time_ms"] = df["event_time_ms"].to_numpy(dtype=np.int64)
+    rec["produce_time_ms"] = int(produce_time_ms)
+    rec["features"] = df[V_COLS + ["Amount"]].to_numpy(dtype=np.float32)
+    rec["card_id"] = df["card_id"].to_numpy(dtype=np.uint32)
+
+    buf = rec.tobytes()
+    size = BINARY_DTYPE.itemsize
+    return [buf[i:i + size] for i in range(0, len(buf), size)]
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise RuntimeError(
+            "WIRE_FORMAT=arrow needs pyarrow: pip install 'data-synthesizer[arrow]'"
+        ) from e
+    return pa
+
+
+def encode_events_arrow(df: pd.DataFrame, produce_time_ms: int, rows_per_message: int = 1000,
+                        source: str = SOURCE) -> List[bytes]:
+    """Pack a sampled frame into Arrow IPC messages of up to `rows_per_message` rows."""
+    if df.empty:
+        return []
+    pa = _pyarrow()
+
+    n = len(df)
+    arrays = {
+        "transaction_id": pa.array(df["transaction_id"].astype(str).to_numpy(), pa.string()),
+        "card_id": pa.array(df["card_id"].to_numpy(dtype=np.int64)),
+        "event_time": pa.array(df["event_time_ms"].to_numpy(dtype=np.int64), pa.timestamp("ms", tz="UTC")),
+        "event_time_ms": pa.array(df["event_time_ms"].to_numpy(dtype=np.int64)),
+    }
+    for c in V_COLS + ["Amount"]:
+        arrays[c] = pa.array(df[c].to_numpy(dtype=np.float64))
+    arrays["Class"] = pa.array(df["Class"].to_numpy(dtype=np.int8))
+    arrays["_produce_time_ms"] = pa.array(np.full(n, int(produce_time_ms), dtype=np.int64))
+    table = pa.table(arrays).replace_schema_metadata({
+        "_schema_version": str(ARROW_SCHEMA_VERSION),
+        "_source": source,
+    })
+
+    payloads = []
+    for batch in table.to_batches(max_chunksize=max(1, int(rows_per_message))):
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_batch(batch)
+        payloads.append(sink.getvalue().to_pybytes())
+    return payloads
+
+
+def encode_batch(df: pd.DataFrame, produce_time_ms: int, wire_format: str = "json",
+                 validate: bool = False, rows_per_message: int = 1000) -> List[bytes]:
+    if wire_format == "json":
+        if FRAGMENT_COL in df.columns:
+            return encode_events_prebuilt(df, produce_time_ms, validate=validate)
+        return encode_events(df, produce_time_ms, validate=validate)
+    if wire_format == "binary":
+        return encode_events_binary(df, produce_time_ms)
+    if wire_format == "arrow":
+        return encode_events_arrow(df, produce_time_ms, rows_per_message=rows_per_message)
+    raise ValueError(f"WIRE_FORMAT must be one of {WIRE_FORMATS}")
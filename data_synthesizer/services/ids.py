@@ -0,0 +1,43 @@
+import numpy as np
+
+# Kafka record keys (KAFKA_KEY_STRATEGY):
+#   transaction_id  the event's own id, so the key isn't generated a second time
+#   entity          the event's card_id (out of CARD_COUNT synthetic cards, carried in the
+#                   payload): one card's events share a partition, in order
+#   round_robin     no key, partitions taken in turn by the streamer
+KEY_STRATEGIES = ("transaction_id", "entity", "round_robin")
+
+
+def random_ids(n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    `n` 128-bit ids as 32-char hex strings, from one draw of the seeded generator
+    (reproducible under RNG_SEED). Version and variant bits are set as in UUID4,
+    so `uuid.UUID(hex=...)` accepts them.
+    """
+    if n <= 0:
+        return np.empty(0, dtype="U32")
+    b = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    b[:, 6] = (b[:, 6] & 0x0F) | 0x40  # version 4
+    b[:, 8] = (b[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    return np.frombuffer(b.tobytes().hex().encode("ascii"), dtype="S32").astype("U32")
+
+
+def card_ids(n: int, rng: np.random.Generator, n_cards: int) -> np.ndarray:
+    # the card each event is charged to: uniform over a fixed population of synthetic cards
+    return rng.integers(0, max(1, int(n_cards)), size=n, dtype=np.int64)
+
+
+def message_keys(transaction_ids, cards, strategy: str) -> list:
+    """
+    One key (bytes, or None for round_robin) per message, from its first row's
+    transaction_id or card_id (the decimal card id for `entity`).
+    """
+    if strategy == "transaction_id":
+        keys = np.asarray(transaction_ids, dtype="U32")
+    elif strategy == "entity":
+        keys = np.asarray(cards, dtype=np.int64)
+    elif strategy == "round_robin":
+        return [None] * len(transaction_ids)
+    else:
+        raise ValueError(f"KAFKA_KEY_STRATEGY must be one of {KEY_STRATEGIES}")
+    return keys.astype("S").tolist()  # ASCII: a C-level encode of the whole array
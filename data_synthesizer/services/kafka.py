@@ -1,16 +1,21 @@
 import json
 from aiokafka import AIOKafkaProducer
 
-def make_producer(bootstrap: str) -> AIOKafkaProducer:
-    # value: Pydantic model or dict → JSON
+def make_producer(bootstrap: str, linger_ms: int = 5, compression_type: str | None = None,
+                  max_batch_size: int = 16384) -> AIOKafkaProducer:
+    # value: pre-encoded bytes (see services/encoding.py), Pydantic model or dict → JSON
     return AIOKafkaProducer(
         bootstrap_servers=bootstrap,
-        linger_ms=5,
+        linger_ms=linger_ms,
+        compression_type=compression_type or None,
+        max_batch_size=max_batch_size,
         acks="all",
         enable_idempotence=True,
         value_serializer=lambda v: (
-            v.model_dump_json(by_alias=True).encode("utf-8")
+            v if isinstance(v, bytes)
+            else v.model_dump_json(by_alias=True).encode("utf-8")
             if hasattr(v, "model_dump_json") else json.dumps(v).encode("utf-8")
         ),
-        key_serializer=lambda k: k.encode("utf-8"),
+        # keys come pre-encoded from services/ids.py (None: no key, round-robin partitioning)
+        key_serializer=lambda k: k if k is None or isinstance(k, bytes) else k.encode("utf-8"),
     )
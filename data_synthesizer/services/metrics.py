@@ -0,0 +1,178 @@
+import time
+from collections import deque
+import numpy as np
+
+# reference point for the cold-start metric: imported by the app before any model is loaded
+PROCESS_START = time.monotonic()
+
+
+class RateMeter:
+    # events/s over a sliding window, kept as per-second buckets
+    def __init__(self, window_secs: int = 10):
+        self.window_secs = int(window_secs)
+        self._buckets: deque = deque()  # [second, count]
+
+    def add(self, n: int = 1, now: float | None = None):
+        sec = int(now if now is not None else time.monotonic())
+        if self._buckets and self._buckets[-1][0] == sec:
+            self._buckets[-1][1] += n
+        else:
+            self._buckets.append([sec, n])
+        self._trim(sec)
+
+    def _trim(self, sec: int):
+        while self._buckets and self._buckets[0][0] <= sec - self.window_secs:
+            self._buckets.popleft()
+
+    def rate(self) -> float:
+        sec = int(time.monotonic())
+        self._trim(sec)
+        if not self._buckets:
+            return 0.0
+        # current second is partial: span from the oldest bucket to now
+        span = max(time.monotonic() - self._buckets[0][0], 1.0)
+        return sum(c for _, c in self._buckets) / span
+
+
+class LatencyReservoir:
+    # last N samples (ms), percentiles on demand
+    def __init__(self, max_samples: int = 4096):
+        self._samples: deque = deque(maxlen=max_samples)
+
+    def add(self, ms: float):
+        self._samples.append(ms)
+
+    def percentiles(self, qs=(50, 95, 99)) -> dict:
+        if not self._samples:
+            return {q: None for q in qs}
+        vals = np.percentile(np.fromiter(self._samples, dtype=float), qs)
+        return {q: float(v) for q, v in zip(qs, vals)}
+
+
+# Prometheus-style cumulative latency buckets (ms); the pipeline uses the same bounds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class Histogram:
+    # fixed buckets, cheap to merge across shards
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v: float):
+        i = int(np.searchsorted(self.bounds, v, side="left"))
+        self.counts[i] += 1
+        self.sum += v
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        # cumulative counts keyed by upper bound, as Prometheus expects
+        cum, out = 0, {}
+        for b, c in zip([str(b) for b in self.bounds] + ["+Inf"], self.counts):
+            cum += c
+            out[b] = cum
+        return {"buckets": out, "sum": self.sum, "count": self.count}
+
+
+def merge_histograms(snaps: list[dict]) -> dict | None:
+    snaps = [s for s in snaps if s]
+    if not snaps:
+        return None
+    return {
+        "buckets": {b: sum(s["buckets"][b] for s in snaps) for b in snaps[0]["buckets"]},
+        "sum": sum(s["sum"] for s in snaps),
+        "count": sum(s["count"] for s in snaps),
+    }
+
+
+def prometheus_histogram(name: str, help_: str, snap: dict | None, labels: str = "") -> list[str]:
+    if not snap:
+        return []
+    sep = "," if labels else ""
+    lines = [f"# HELP {name} {help_}", f"# TYPE {name} histogram"]
+    for b, c in snap["buckets"].items():
+        lines.append(f'{name}_bucket{{{labels}{sep}le="{b}"}} {c}')
+    lab = f"{{{labels}}}" if labels else ""
+    lines += [f"{name}_sum{lab} {snap['sum']}", f"{name}_count{lab} {snap['count']}"]
+    return lines
+
+
+class ProducerStats:
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = int(max_in_flight)
+        self.in_flight = 0
+        self.acked_total = 0
+        self.errors_total = 0
+        self.last_error: str | None = None
+        self.acked = RateMeter()
+        self.latency = LatencyReservoir()
+        self.latency_hist = Histogram()
+
+    def on_send(self):
+        self.in_flight += 1
+
+    def on_done(self, sent_at: float, error: BaseException | None):
+        self.in_flight -= 1
+        if error is not None:
+            self.errors_total += 1
+            self.last_error = str(error)
+            return
+        now = time.monotonic()
+        self.acked_total += 1
+        self.acked.add(1, now)
+        ms = (now - sent_at) * 1000.0
+        self.latency.add(ms)
+        self.latency_hist.observe(ms)
+
+    def snapshot(self) -> dict:
+        p = self.latency.percentiles()
+        return {
+            "acked_total": self.acked_total,
+            "errors_total": self.errors_total,
+            "last_error": self.last_error,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "acked_per_sec": self.acked.rate(),
+            "send_latency_ms_p50": p[50],
+            "send_latency_ms_p95": p[95],
+            "send_latency_ms_p99": p[99],
+            "send_latency_ms_histogram": self.latency_hist.snapshot(),
+        }
+
+
+def prometheus_status(st) -> str:
+    # StatusResponse -> Prometheus text exposition (GET /metrics)
+    lines = [
+        "# TYPE synth_running gauge", f"synth_running {int(st.running)}",
+        "# TYPE synth_last_batch_size gauge", f"synth_last_batch_size {st.last_batch_size or 0}",
+    ]
+    if st.rate:
+        lines += [
+            "# TYPE synth_events_sent_total counter", f"synth_events_sent_total {st.rate.sent_total}",
+            "# TYPE synth_rate_requested_eps gauge", f"synth_rate_requested_eps {st.rate.requested_eps}",
+            "# TYPE synth_rate_achieved_eps gauge", f"synth_rate_achieved_eps {st.rate.achieved_eps}",
+        ]
+    p = st.producer
+    if p:
+        lines += [
+            "# TYPE synth_producer_acked_total counter", f"synth_producer_acked_total {p.acked_total}",
+            "# TYPE synth_producer_errors_total counter", f"synth_producer_errors_total {p.errors_total}",
+            "# TYPE synth_producer_in_flight gauge", f"synth_producer_in_flight {p.in_flight}",
+        ]
+        hist = p.send_latency_ms_histogram.model_dump() if p.send_latency_ms_histogram else None
+        lines += prometheus_histogram("synth_send_latency_ms", "Produce to broker ack (ms)", hist)
+    if st.startup:
+        lines += ["# TYPE synth_ready gauge", f"synth_ready {int(st.startup.ready)}"]
+        if st.startup.load_secs is not None:
+            lines += ["# TYPE synth_sampler_load_seconds gauge",
+                      f"synth_sampler_load_seconds {st.startup.load_secs}"]
+        if st.startup.ready_after_secs is not None:
+            lines += ["# TYPE synth_startup_seconds gauge", f"synth_startup_seconds {st.startup.ready_after_secs}"]
+    if st.sampler:
+        lines += [
+            "# TYPE synth_sampler_rows_total counter", f"synth_sampler_rows_total {st.sampler.rows_total}",
+            "# TYPE synth_sampler_queue_depth gauge", f"synth_sampler_queue_depth {st.sampler.queue_depth}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,118 @@
+import asyncio, time
+import multiprocessing as mp
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, List, Optional
+import numpy as np
+import pandas as pd
+from core.settings import settings
+from services.sdv_loader import get_sampler, sampler_path
+from services.sampling import sample_with_base_rate
+
+
+def _sample_job(synth_path: str, backend: str, n_rows: int, fraud_rate: float, seed: int,
+                n_cards: int) -> pd.DataFrame:
+    # Runs in a pool worker. get_sampler is cached per process, so each worker
+    # (thread pool: the whole process; process pool: each child) loads it once.
+    sampler = get_sampler(synth_path, backend)
+    if backend == "corpus":
+        return sampler.replay(n_rows, rng=seed, n_cards=n_cards)  # fraud rate fixed when the corpus was built
+    return sample_with_base_rate(sampler, n_rows=n_rows, fraud_rate=fraud_rate, rng=seed, n_cards=n_cards)
+
+
+def _warm_worker(synth_path: str, backend: str):
+    get_sampler(synth_path, backend)
+
+
+def make_pool(kind: str, workers: int) -> Executor:
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sampler")
+    if kind == "process":
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_warm_worker,
+            initargs=(sampler_path(settings.SAMPLER_BACKEND), settings.SAMPLER_BACKEND),
+        )
+    raise ValueError("SAMPLER_POOL must be 'thread' or 'process'")
+
+
+class SamplePrefetcher:
+    """
+    Keeps up to `depth` sampled batches ready in an asyncio.Queue.
+
+    Sampling runs in a thread/process pool so the event loop (API + producer)
+    never blocks on SDV; the producer side just awaits `get()`.
+    """
+
+    def __init__(self, size_fn: Callable[[], int], rng: np.random.Generator,
+                 workers: int = 1, depth: int = 4, pool: str = "thread"):
+        self._size_fn = size_fn
+        self._rng = rng
+        self._workers = max(1, int(workers))
+        self._pool_kind = pool
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(depth)))
+        self._pool: Optional[Executor] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.rows_total = 0
+        self.batches_total = 0
+        self.last_error: Optional[str] = None
+        self._ms_per_row: Optional[float] = None  # EWMA
+
+    async def start(self):
+        self._pool = make_pool(self._pool_kind, self._workers)
+        self._tasks = [asyncio.create_task(self._fill()) for _ in range(self._workers)]
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        for t in self._tasks:
+            try: await t
+            except asyncio.CancelledError: pass
+        self._tasks = []
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def get(self) -> pd.DataFrame:
+        return await self._queue.get()
+
+    async def _fill(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            n = int(self._size_fn())
+            seed = int(self._rng.integers(0, 2**63 - 1))
+            t0 = time.perf_counter()
+            try:
+                df = await loop.run_in_executor(
+                    self._pool, _sample_job, sampler_path(settings.SAMPLER_BACKEND), settings.SAMPLER_BACKEND,
+                    n, settings.FRAUD_RATE, seed, settings.CARD_COUNT,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[prefetch] sampling error: {e}", flush=True)
+                await asyncio.sleep(1.0)
+                continue
+            self._observe(len(df), time.perf_counter() - t0)
+            await self._queue.put(df)
+
+    def _observe(self, rows: int, secs: float):
+        self.rows_total += rows
+        self.batches_total += 1
+        if rows:
+            ms = secs * 1000.0 / rows
+            self._ms_per_row = ms if self._ms_per_row is None else 0.8 * self._ms_per_row + 0.2 * ms
+
+    def snapshot(self) -> dict:
+        return {
+            "pool": self._pool_kind,
+            "workers": self._workers,
+            "queue_depth": self._queue.qsize(),
+            "queue_max": self._queue.maxsize,
+            "batches_total": self.batches_total,
+            "rows_total": self.rows_total,
+            "sample_ms_per_row": self._ms_per_row,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,88 @@
+import asyncio, math, time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+PROFILES = ("constant", "ramp", "step", "diurnal")
+
+
+@dataclass
+class RateProfile:
+    """
+    Target events/s as a function of seconds since start.
+
+    constant: `eps`
+    ramp:     linear from `eps` to `eps_end` over `profile_secs`, then holds `eps_end`
+    step:     `steps[i]` for the i-th window of `profile_secs`, then holds the last step
+    diurnal:  `eps * (1 + amplitude * sin(...))` with period `period_secs`, trough at t=0
+    """
+    kind: str = "constant"
+    eps: float = 100.0
+    eps_end: Optional[float] = None
+    steps: List[float] = field(default_factory=list)
+    profile_secs: float = 300.0
+    period_secs: float = 86400.0
+    amplitude: float = 0.5
+
+    def __post_init__(self):
+        if self.kind not in PROFILES:
+            raise ValueError(f"RATE_PROFILE must be one of {PROFILES}")
+        if self.kind == "step" and not self.steps:
+            raise ValueError("RATE_STEPS must not be empty for the 'step' profile")
+        if self.profile_secs <= 0 or self.period_secs <= 0:
+            raise ValueError("RATE_PROFILE_SECS and RATE_PERIOD_SECS must be > 0")
+
+    def at(self, t: float) -> float:
+        if self.kind == "ramp":
+            end = self.eps if self.eps_end is None else self.eps_end
+            f = min(max(t / self.profile_secs, 0.0), 1.0)
+            r = self.eps + (end - self.eps) * f
+        elif self.kind == "step":
+            r = self.steps[min(int(t // self.profile_secs), len(self.steps) - 1)]
+        elif self.kind == "diurnal":
+            r = self.eps * (1.0 + self.amplitude * math.sin(2 * math.pi * t / self.period_secs - math.pi / 2))
+        else:
+            r = self.eps
+        return max(float(r), 0.0)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate_fn(t)` tokens/s (t = seconds since start).
+
+    `take(n)` waits until at least one token is available and returns how many
+    events may be sent now (at most n). Capacity is `burst_secs` worth of the
+    current rate, so short stalls don't turn into large catch-up bursts.
+    """
+
+    def __init__(self, rate_fn: Callable[[float], float], burst_secs: float = 0.1,
+                 max_sleep: float = 0.1):
+        self._rate_fn = rate_fn
+        self._burst_secs = float(burst_secs)
+        self._max_sleep = float(max_sleep)
+        self._t0 = time.monotonic()
+        self._last = self._t0
+        self._tokens = 0.0
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._t0
+
+    def rate(self) -> float:
+        return self._rate_fn(self.elapsed())
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        rate = self._rate_fn(now - self._t0)
+        cap = max(1.0, rate * self._burst_secs)
+        self._tokens = min(cap, self._tokens + rate * (now - self._last))
+        self._last = now
+        return rate
+
+    async def take(self, n: int) -> int:
+        while True:
+            rate = self._refill()
+            if self._tokens >= 1.0:
+                k = min(int(self._tokens), int(n))
+                self._tokens -= k
+                return k
+            wait = (1.0 - self._tokens) / rate if rate > 0 else self._max_sleep
+            await asyncio.sleep(min(max(wait, 0.001), self._max_sleep))
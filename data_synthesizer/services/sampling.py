@@ -1,12 +1,27 @@
-import uuid
 from datetime import datetime, timezone
 import numpy as np
 import pandas as pd
-from sdv.sampling import Condition
+from services.ids import card_ids, random_ids
+
+def stamp_event_time(df: pd.DataFrame, now: datetime | None = None, jitter_ms: int = 0,
+                     rng: np.random.Generator | None = None) -> pd.DataFrame:
+    # (re)stamp the batch timestamp, e.g. when a prefetched batch is actually sent;
+    # jitter_ms > 0 spreads rows uniformly over [now - jitter_ms, now]
+    now = now or datetime.now(timezone.utc)
+    now_ms = int(now.timestamp() * 1000)
+    if jitter_ms > 0 and len(df):
+        rng = rng if rng is not None else np.random.default_rng()
+        ms = now_ms - rng.integers(0, int(jitter_ms) + 1, size=len(df))
+        df["event_time"] = np.char.add(np.datetime_as_string(ms.astype("datetime64[ms]"), unit="ms"), "Z")
+        df["event_time_ms"] = ms
+        return df
+    df["event_time"] = now.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+    df["event_time_ms"] = now_ms
+    return df
 
 def sample_with_base_rate(synthesizer, n_rows: int, fraud_rate: float,
                           rng: np.random.Generator | int | None = None,
-                          shuffle: bool = True) -> pd.DataFrame:
+                          shuffle: bool = True, n_cards: int = 100_000) -> pd.DataFrame:
     if not (0.0 <= float(fraud_rate) <= 1.0):
         raise ValueError("fraud_rate must be in [0, 1].")
     if isinstance(rng, (int, np.integer)) or rng is None:
@@ -18,20 +33,21 @@ def sample_with_base_rate(synthesizer, n_rows: int, fraud_rate: float,
     if n_rows == 0:
         return pd.DataFrame([])
 
-    conds = []
-    if n0: conds.append(Condition(num_rows=n0, column_values={"Class": 0}))
-    if n1: conds.append(Condition(num_rows=n1, column_values={"Class": 1}))
-
-    out = synthesizer.sample_from_conditions(conditions=conds)
+    if hasattr(synthesizer, "sample_by_class"):
+        # native backend (services/copula.py): direct class-conditional draws
+        out = synthesizer.sample_by_class({0: n0, 1: n1}, rng=rng)
+    else:
+        from sdv.sampling import Condition  # SDV backend only: keeps the import off the startup path
+        conds = []
+        if n0: conds.append(Condition(num_rows=n0, column_values={"Class": 0}))
+        if n1: conds.append(Condition(num_rows=n1, column_values={"Class": 1}))
+        out = synthesizer.sample_from_conditions(conditions=conds)
     out["Class"] = out["Class"].astype(int)
 
     # batch timestamp & IDs
-    now = datetime.now(timezone.utc)
-    iso = now.isoformat(timespec="milliseconds").replace("+00:00", "Z")
-    ms = int(now.timestamp() * 1000)
-    out.insert(0, "transaction_id", [uuid.uuid4().hex for _ in range(len(out))])
-    out["event_time"] = iso
-    out["event_time_ms"] = ms
+    out.insert(0, "transaction_id", random_ids(len(out), rng))
+    out.insert(1, "card_id", card_ids(len(out), rng, n_cards))
+    stamp_event_time(out)
 
     if shuffle and len(out) > 1:
         seed = int(rng.integers(0, 2**32 - 1))
@@ -1,6 +1,51 @@
+import os
 from functools import lru_cache
-from sdv.utils import load_synthesizer
+from pathlib import Path
+from core.settings import settings
 
 @lru_cache(maxsize=1)
 def get_synth(path: str):
+    from sdv.utils import load_synthesizer  # only backends that need the pickle pay for importing SDV
     return load_synthesizer(filepath=path)
+
+def sampler_path(backend: str) -> str:
+    # the artifact a backend reads: the pre-generated corpus or the SDV pickle
+    return settings.CORPUS_PATH if backend == "corpus" else settings.SYNTH_PATH
+
+def param_cache_path(path: str) -> str | None:
+    # numpy backend: extracted copula parameters, next to the pickle unless SAMPLER_CACHE_PATH says otherwise
+    if not settings.SAMPLER_CACHE:
+        return None
+    return settings.SAMPLER_CACHE_PATH or str(Path(path).with_suffix(".npz"))
+
+def _fresh(cache: str, path: str) -> bool:
+    # usable unless the pickle was retrained after the cache was written (or there is no pickle at all)
+    if not os.path.exists(cache):
+        return False
+    return not os.path.exists(path) or os.path.getmtime(cache) >= os.path.getmtime(path)
+
+def load_copula(path: str):
+    from services.copula import CopulaSampler
+    cache = param_cache_path(path)
+    if cache and _fresh(cache, path):
+        return CopulaSampler.load(cache)
+    sampler = CopulaSampler.from_synthesizer(get_synth(path))
+    if cache:
+        try:
+            sampler.save(cache)
+        except OSError as e:  # read-only artifacts dir: still works, just without the shortcut next time
+            print(f"[sampler] could not write parameter cache {cache}: {e}", flush=True)
+    return sampler
+
+@lru_cache(maxsize=2)
+def get_sampler(path: str, backend: str = "sdv"):
+    # what sample_with_base_rate draws from: the SDV synthesizer or the NumPy engine built from it;
+    # "corpus" replays a pre-generated corpus directory instead (services/corpus.py)
+    if backend == "sdv":
+        return get_synth(path)
+    if backend == "numpy":
+        return load_copula(path)
+    if backend == "corpus":
+        from services.corpus import Corpus
+        return Corpus(path)
+    raise ValueError("SAMPLER_BACKEND must be 'sdv', 'numpy' or 'corpus'")
@@ -0,0 +1,203 @@
+import asyncio, queue
+import multiprocessing as mp
+from typing import Dict, List, Optional
+import numpy as np
+from core.settings import settings
+from models.schemas import StatusResponse, ProducerStatus, SamplerStatus, RateStatus, StartupStatus
+from services.metrics import merge_histograms
+from services.streamer import configure
+
+STATUS_SECS = 1.0  # how often shards report their status
+STOP_TIMEOUT = 15.0
+
+
+# ================================
+# Worker process side
+# ================================
+
+def _shard_main(shard_id: int, seed: np.random.SeedSequence, config: dict,
+                stop_event, status_q):
+    # Spawned child: re-create the parent's effective settings, then take 1/N of any target rate
+    for k, v in config.items():
+        setattr(settings, k, v)
+    n = max(1, int(config["SHARDS"]))
+    settings.RATE_EPS = settings.RATE_EPS / n
+    if settings.RATE_EPS_END is not None:
+        settings.RATE_EPS_END = settings.RATE_EPS_END / n
+    settings.RATE_STEPS = [x / n for x in settings.RATE_STEPS]
+    asyncio.run(_shard_loop(shard_id, seed, stop_event, status_q))
+
+
+async def _shard_loop(shard_id: int, seed, stop_event, status_q):
+    from services.streamer import Streamer
+
+    streamer = Streamer(seed=seed, shard_id=shard_id, pin_partition=settings.SHARD_PIN_PARTITIONS)
+    try:
+        await streamer.start()
+        while not stop_event.is_set():
+            status_q.put((shard_id, streamer.status().model_dump(mode="json")))
+            await asyncio.sleep(STATUS_SECS)
+    except Exception as e:
+        print(f"[shard {shard_id}] error: {e}", flush=True)
+    finally:
+        await streamer.stop()
+        status_q.put((shard_id, streamer.status().model_dump(mode="json")))
+
+
+# ================================
+# Control plane (FastAPI process)
+# ================================
+
+def _sum(vals) -> float:
+    return sum(v for v in vals if v is not None)
+
+def _max(vals) -> Optional[float]:
+    vals = [v for v in vals if v is not None]
+    return max(vals) if vals else None
+
+def aggregate_status(shards: List[StatusResponse], running: bool, expected: int = 0) -> StatusResponse:
+    prods = [s.producer for s in shards if s.producer]
+    samps = [s.sampler for s in shards if s.sampler]
+    rates = [s.rate for s in shards if s.rate]
+    return StatusResponse(
+        running=running,
+        last_sent_at_epoch=_max(s.last_sent_at_epoch for s in shards),
+        last_batch_size=int(_sum(s.last_batch_size for s in shards)) if shards else None,
+        interval_secs=settings.INTERVAL_SECS,
+        fraud_rate=settings.FRAUD_RATE,
+        batch_min=settings.BATCH_MIN,
+        batch_max=settings.BATCH_MAX,
+        topic=settings.KAFKA_TOPIC,
+        bootstrap=settings.KAFKA_BOOTSTRAP,
+        mode=settings.STREAM_MODE,
+        rate=RateStatus(
+            profile=rates[0].profile,
+            requested_eps=_sum(r.requested_eps for r in rates),
+            achieved_eps=_sum(r.achieved_eps for r in rates),
+            sent_total=int(_sum(r.sent_total for r in rates)),
+            elapsed_secs=_max(r.elapsed_secs for r in rates),
+        ) if rates else None,
+        # latency percentiles: worst shard (an upper bound, not a merged percentile)
+        producer=ProducerStatus(
+            acked_total=int(_sum(p.acked_total for p in prods)),
+            errors_total=int(_sum(p.errors_total for p in prods)),
+            last_error=next((p.last_error for p in prods if p.last_error), None),
+            in_flight=int(_sum(p.in_flight for p in prods)),
+            max_in_flight=int(_sum(p.max_in_flight for p in prods)),
+            acked_per_sec=_sum(p.acked_per_sec for p in prods),
+            send_latency_ms_p50=_max(p.send_latency_ms_p50 for p in prods),
+            send_latency_ms_p95=_max(p.send_latency_ms_p95 for p in prods),
+            send_latency_ms_p99=_max(p.send_latency_ms_p99 for p in prods),
+            # histograms merge exactly
+            send_latency_ms_histogram=merge_histograms(
+                [p.send_latency_ms_histogram.model_dump() for p in prods if p.send_latency_ms_histogram]),
+            compression=prods[0].compression,
+        ) if prods else None,
+        sampler=SamplerStatus(
+            pool=samps[0].pool,
+            workers=int(_sum(s.workers for s in samps)),
+            queue_depth=int(_sum(s.queue_depth for s in samps)),
+            queue_max=int(_sum(s.queue_max for s in samps)),
+            batches_total=int(_sum(s.batches_total for s in samps)),
+            rows_total=int(_sum(s.rows_total for s in samps)),
+            sample_ms_per_row=_max(s.sample_ms_per_row for s in samps),
+            last_error=next((s.last_error for s in samps if s.last_error), None),
+        ) if samps else None,
+        # each shard loads its own sampler once started (and reports only after that); worst shard
+        startup=StartupStatus(
+            ready=len(shards) >= expected and all(s.startup.ready for s in shards if s.startup),
+            backend=settings.SAMPLER_BACKEND,
+            load_secs=_max(s.startup.load_secs for s in shards if s.startup),
+            ready_after_secs=_max(s.startup.ready_after_secs for s in shards if s.startup),
+            error=next((s.startup.error for s in shards if s.startup and s.startup.error), None),
+        ),
+        shards=shards,
+    )
+
+
+class ShardedStreamer:
+    """
+    Same interface as Streamer (start/stop/status), backed by N spawned worker
+    processes. Each worker owns its sampler and producer, gets an independent
+    RNG stream spawned from RNG_SEED, and optionally pins to one partition.
+    """
+
+    def __init__(self, shards: int):
+        self._n = int(shards)
+        self._ctx = mp.get_context("spawn")
+        self._procs: List[mp.Process] = []
+        self._stop_event = None
+        self._status_q = None
+        self._latest: Dict[int, StatusResponse] = {}
+        self._drain_task: Optional[asyncio.Task] = None
+        self._running = False
+
+    @property
+    def ready(self) -> bool:
+        return self.startup().ready
+
+    async def load(self):
+        pass  # the control plane loads no model: shards load theirs in their own processes
+
+    def startup(self) -> StartupStatus:
+        return self.status().startup
+
+    async def start(self, **overrides):
+        if self._running: return
+        configure(**overrides)
+        config = settings.model_dump()
+        seeds = np.random.SeedSequence(settings.RNG_SEED).spawn(self._n)
+
+        self._stop_event = self._ctx.Event()
+        self._status_q = self._ctx.Queue()
+        self._latest = {}
+        self._procs = [
+            self._ctx.Process(
+                target=_shard_main,
+                args=(i, seeds[i], config, self._stop_event, self._status_q),
+                name=f"shard-{i}",
+            )
+            for i in range(self._n)
+        ]
+        for p in self._procs:
+            p.start()
+        self._running = True
+        self._drain_task = asyncio.create_task(self._drain())
+
+    async def stop(self):
+        if self._procs:
+            self._stop_event.set()
+            loop = asyncio.get_running_loop()
+            # keep draining while joining: a child can't exit with unflushed queue data
+            for p in self._procs:
+                await loop.run_in_executor(None, p.join, STOP_TIMEOUT)
+                if p.is_alive():
+                    p.terminate()
+            self._procs = []
+        if self._drain_task:
+            self._drain_task.cancel()
+            try: await self._drain_task
+            except asyncio.CancelledError: pass
+            self._drain_task = None
+        self._drain_once()
+        self._running = False
+
+    async def _drain(self):
+        while True:
+            self._drain_once()
+            await asyncio.sleep(STATUS_SECS / 2)
+
+    def _drain_once(self):
+        if self._status_q is None:
+            return
+        while True:
+            try:
+                shard_id, d = self._status_q.get_nowait()
+            except queue.Empty:
+                break
+            self._latest[shard_id] = StatusResponse(**d)
+
+    def status(self) -> StatusResponse:
+        running = self._running and any(p.is_alive() for p in self._procs)
+        shards = [self._latest[i] for i in sorted(self._latest)]
+        return aggregate_status(shards, running, expected=self._n if self._running else 0)
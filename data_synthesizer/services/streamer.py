@@ -1,36 +1,140 @@
-import asyncio, time, uuid
+import asyncio, itertools, os, time
 import numpy as np
-import pandas as pd
-from typing import Optional, List
+from typing import Optional
 from core.settings import settings
-from models.schemas import StatusResponse, TransactionEvent
+from models.schemas import StatusResponse, ProducerStatus, SamplerStatus, RateStatus, StartupStatus
+from services.encoding import encode_batch, WIRE_FORMATS
+from services.ids import KEY_STRATEGIES, message_keys
 from services.kafka import make_producer
-from services.sdv_loader import get_synth
-from services.sampling import sample_with_base_rate
+from services.metrics import PROCESS_START, ProducerStats, RateMeter
+from services.prefetch import SamplePrefetcher
+from services.rate import RateProfile, TokenBucket
+from services.sdv_loader import get_sampler, sampler_path
+from services.sampling import stamp_event_time
+
+def configure(interval_secs=None, fraud_rate=None, batch_min=None, batch_max=None,
+              mode=None, rate_profile=None, rate_eps=None, rate_eps_end=None, rate_steps=None,
+              rate_profile_secs=None, rate_period_secs=None, rate_amplitude=None):
+    # apply /start overrides onto this process' settings and validate them
+    if interval_secs is not None: settings.INTERVAL_SECS = int(interval_secs)
+    if fraud_rate   is not None: settings.FRAUD_RATE   = float(fraud_rate)
+    if batch_min    is not None: settings.BATCH_MIN    = int(batch_min)
+    if batch_max    is not None: settings.BATCH_MAX    = int(batch_max)
+    if mode         is not None: settings.STREAM_MODE  = str(mode)
+    if rate_profile is not None: settings.RATE_PROFILE = str(rate_profile)
+    if rate_eps     is not None: settings.RATE_EPS     = float(rate_eps)
+    if rate_eps_end is not None: settings.RATE_EPS_END = float(rate_eps_end)
+    if rate_steps   is not None: settings.RATE_STEPS   = [float(x) for x in rate_steps]
+    if rate_profile_secs is not None: settings.RATE_PROFILE_SECS = float(rate_profile_secs)
+    if rate_period_secs  is not None: settings.RATE_PERIOD_SECS  = float(rate_period_secs)
+    if rate_amplitude    is not None: settings.RATE_AMPLITUDE    = float(rate_amplitude)
+    if settings.BATCH_MIN > settings.BATCH_MAX:
+        raise ValueError("BATCH_MIN must be <= BATCH_MAX")
+    if settings.STREAM_MODE not in ("burst", "rate"):
+        raise ValueError("STREAM_MODE must be 'burst' or 'rate'")
+    if settings.WIRE_FORMAT not in WIRE_FORMATS:
+        raise ValueError(f"WIRE_FORMAT must be one of {WIRE_FORMATS}")
+    if settings.KAFKA_KEY_STRATEGY not in KEY_STRATEGIES:
+        raise ValueError(f"KAFKA_KEY_STRATEGY must be one of {KEY_STRATEGIES}")
+    # sampler threads share the one cached synthesizer; SDV's isn't documented as thread-safe
+    if settings.SAMPLER_BACKEND == "sdv" and settings.SAMPLER_POOL == "thread" and settings.SAMPLER_WORKERS > 1:
+        raise ValueError("SAMPLER_WORKERS > 1 with SAMPLER_BACKEND=sdv needs SAMPLER_POOL=process")
 
 class Streamer:
-    def __init__(self):
-        self._rng = np.random.default_rng(settings.RNG_SEED)
-        self._synth = get_synth(settings.SYNTH_PATH)
+    def __init__(self, seed=None, shard_id: Optional[int] = None, pin_partition: bool = False):
+        # seed: anything np.random.default_rng accepts (sharded mode passes a spawned SeedSequence)
+        self._rng = np.random.default_rng(settings.RNG_SEED if seed is None else seed)
+        self._shard_id = shard_id
+        self._pin_partition = pin_partition
+        self._partition: Optional[int] = None
+        self._round_robin = None  # KAFKA_KEY_STRATEGY=round_robin: cycle over the topic's partitions
+        # the sampler loads in the background (load()), so the API is up before SDV is imported
+        self._load_task: Optional[asyncio.Task] = None
+        self._load_secs: Optional[float] = None
+        self._ready_after: Optional[float] = None
+        self._load_error: Optional[str] = None
+        self._start_lock = asyncio.Lock()
         self._producer = None
         self._task: Optional[asyncio.Task] = None
         self._running = False
         self._last_sent_at: Optional[float] = None
         self._last_batch_size: Optional[int] = None
+        self._stats: Optional[ProducerStats] = None
+        self._window: Optional[asyncio.Semaphore] = None
+        self._prefetch: Optional[SamplePrefetcher] = None
+        self._bucket: Optional[TokenBucket] = None
+        self._sent: Optional[RateMeter] = None
+        self._sent_total = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready_after is not None
+
+    def load(self) -> asyncio.Task:
+        # idempotent; a failed load is retried on the next call
+        if self._load_task is None or (self._load_task.done() and not self.ready):
+            self._load_task = asyncio.create_task(self._load())
+        return self._load_task
 
-    async def start(self, interval_secs=None, fraud_rate=None, batch_min=None, batch_max=None):
-        if self._running: return
-        if interval_secs is not None: settings.INTERVAL_SECS = int(interval_secs)
-        if fraud_rate   is not None: settings.FRAUD_RATE   = float(fraud_rate)
-        if batch_min    is not None: settings.BATCH_MIN    = int(batch_min)
-        if batch_max    is not None: settings.BATCH_MAX    = int(batch_max)
-        if settings.BATCH_MIN > settings.BATCH_MAX:
-            raise ValueError("BATCH_MIN must be <= BATCH_MAX")
+    async def _load(self):
+        backend = settings.SAMPLER_BACKEND
+        t0 = time.monotonic()
+        try:
+            if settings.SAMPLER_POOL == "process":
+                # each pool worker loads its own sampler; the parent only checks the artifact is there
+                if not os.path.exists(sampler_path(backend)):
+                    raise FileNotFoundError(f"Sampler artifact not found: {sampler_path(backend)}")
+            else:
+                # off the event loop: importing SDV and unpickling take seconds
+                await asyncio.to_thread(get_sampler, sampler_path(backend), backend)
+        except Exception as e:
+            self._load_error = str(e)
+            print(f"[streamer] sampler load failed: {e}", flush=True)
+            raise
+        now = time.monotonic()
+        self._load_secs = now - t0
+        self._ready_after = now - PROCESS_START
+        self._load_error = None
 
-        self._producer = make_producer(settings.KAFKA_BOOTSTRAP)
+    async def start(self, **overrides):
+        await self.load()
+        async with self._start_lock:  # AUTO_START and POST /start may race
+            if self._running: return
+            await self._start(**overrides)
+
+    async def _start(self, **overrides):
+        configure(**overrides)
+        profile = self._rate_profile() if settings.STREAM_MODE == "rate" else None
+
+        self._producer = make_producer(
+            settings.KAFKA_BOOTSTRAP,
+            linger_ms=settings.PRODUCER_LINGER_MS,
+            compression_type=settings.PRODUCER_COMPRESSION,
+            max_batch_size=settings.PRODUCER_MAX_BATCH_BYTES,
+        )
         await self._producer.start()
+        self._round_robin = None
+        if self._pin_partition:
+            parts = sorted(await self._producer.partitions_for(settings.KAFKA_TOPIC))
+            self._partition = parts[(self._shard_id or 0) % len(parts)]
+        elif settings.KAFKA_KEY_STRATEGY == "round_robin":
+            parts = sorted(await self._producer.partitions_for(settings.KAFKA_TOPIC))
+            self._round_robin = itertools.cycle(parts)
+        self._stats = ProducerStats(settings.PRODUCER_MAX_INFLIGHT)
+        self._window = asyncio.Semaphore(settings.PRODUCER_MAX_INFLIGHT)
+        self._prefetch = SamplePrefetcher(
+            size_fn=self._next_batch_size,
+            rng=self._rng,
+            workers=settings.SAMPLER_WORKERS,
+            depth=settings.PREFETCH_DEPTH,
+            pool=settings.SAMPLER_POOL,
+        )
+        await self._prefetch.start()
+        self._sent = RateMeter()
+        self._sent_total = 0
+        self._bucket = TokenBucket(profile.at) if profile else None
         self._running = True
-        self._task = asyncio.create_task(self._run_loop())
+        self._task = asyncio.create_task(self._run_rate_loop() if profile else self._run_loop())
 
     async def stop(self):
         self._running = False
@@ -39,50 +143,17 @@ class Streamer:
             try: await self._task
             except asyncio.CancelledError: pass
             self._task = None
+        if self._prefetch:
+            await self._prefetch.stop()
         if self._producer:
             await self._producer.stop()
             self._producer = None
 
-    def _rows_to_events(self, df: pd.DataFrame) -> List[TransactionEvent]:
-        events: List[TransactionEvent] = []
-        v_cols = [f"V{i}" for i in range(1, 29)]  # V1..V28
-
-        for _, r in df.iterrows():
-            d = r.to_dict()
-
-            base_kwargs = {
-                "transaction_id": str(d["transaction_id"]),
-                "event_time": str(d["event_time"]),
-                "event_time_ms": int(d["event_time_ms"]),
-                "Amount": float(d["Amount"]),
-                "Class": int(d["Class"]),
-            }
-            v_kwargs = {c: float(d[c]) for c in v_cols}
-
-            events.append(TransactionEvent(**base_kwargs, **v_kwargs))
-
-        return events
-
     async def _run_loop(self):
         try:
             while self._running:
-                n = int(self._rng.integers(settings.BATCH_MIN, settings.BATCH_MAX + 1))
-                df = sample_with_base_rate(self._synth, n_rows=n, fraud_rate=settings.FRAUD_RATE, rng=self._rng)
-                events = self._rows_to_events(df)
-
-                now_ms = int(time.time() * 1000)
-                futs = []
-                for ev in events:
-                    ev.source_ = "sdv"
-                    ev.schema_version_ = 1
-                    ev.produce_time_ms_ = now_ms
-                    key = str(uuid.uuid4())
-                    futs.append(self._producer.send_and_wait(settings.KAFKA_TOPIC, key=key, value=ev))
-                if futs:
-                    await asyncio.gather(*futs)
-
-                self._last_sent_at = time.time()
-                self._last_batch_size = len(events)
+                df = self._stamp(await self._prefetch.get())
+                await self._send_batch(df, self._encode(df))
                 await asyncio.sleep(settings.INTERVAL_SECS)
         except asyncio.CancelledError:
             pass
@@ -90,9 +161,92 @@ class Streamer:
             print(f"[streamer] error: {e}", flush=True)
             self._running = False
 
+    async def _run_rate_loop(self):
+        # Emit at the profile's rate: prefetched batches are sliced into whatever
+        # the token bucket allows right now, each slice stamped when it goes out.
+        try:
+            while self._running:
+                df = await self._prefetch.get()
+                i = 0
+                while i < len(df) and self._running:
+                    k = await self._bucket.take(len(df) - i)
+                    chunk = self._stamp(df.iloc[i:i + k].copy())
+                    i += k
+                    await self._send_batch(chunk, self._encode(chunk))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[streamer] error: {e}", flush=True)
+            self._running = False
+
+    def _stamp(self, df):
+        return stamp_event_time(df, jitter_ms=settings.EVENT_TIME_JITTER_MS, rng=self._rng)
+
+    def _encode(self, df):
+        now_ms = int(time.time() * 1000)
+        return encode_batch(df, produce_time_ms=now_ms, wire_format=settings.WIRE_FORMAT,
+                            validate=settings.VALIDATE_EVENTS,
+                            rows_per_message=settings.ARROW_ROWS_PER_MESSAGE)
+
+    def _keys(self, df, n_messages: int) -> list:
+        # one key per message, from its first row (arrow packs several rows into one message)
+        step = max(1, settings.ARROW_ROWS_PER_MESSAGE if settings.WIRE_FORMAT == "arrow" else 1)
+        ids = df["transaction_id"].to_numpy()[::step][:n_messages]
+        cards = df["card_id"].to_numpy()[::step][:n_messages]
+        return message_keys(ids, cards, settings.KAFKA_KEY_STRATEGY)
+
+    async def _send_batch(self, df, payloads):
+        # len(df) != len(payloads) when several rows share a message (arrow)
+        n_events = len(df)
+        for key, payload in zip(self._keys(df, len(payloads)), payloads):
+            await self._send(key, payload)
+        self._sent.add(n_events)
+        self._sent_total += n_events
+        self._last_sent_at = time.time()
+        self._last_batch_size = n_events
+
+    def _next_batch_size(self) -> int:
+        if settings.STREAM_MODE == "rate":
+            return settings.RATE_CHUNK_ROWS
+        return int(self._rng.integers(settings.BATCH_MIN, settings.BATCH_MAX + 1))
+
+    def _rate_profile(self) -> RateProfile:
+        return RateProfile(
+            kind=settings.RATE_PROFILE,
+            eps=settings.RATE_EPS,
+            eps_end=settings.RATE_EPS_END,
+            steps=list(settings.RATE_STEPS),
+            profile_secs=settings.RATE_PROFILE_SECS,
+            period_secs=settings.RATE_PERIOD_SECS,
+            amplitude=settings.RATE_AMPLITUDE,
+        )
+
+    async def _send(self, key: bytes | None, payload: bytes):
+        # Fire-and-collect: at most PRODUCER_MAX_INFLIGHT unacked sends. When the broker
+        # falls behind the window fills up and this await (and thus sampling) slows down.
+        await self._window.acquire()
+        stats = self._stats
+        stats.on_send()
+        sent_at = time.monotonic()
+        try:
+            partition = self._partition if self._round_robin is None else next(self._round_robin)
+            fut = await self._producer.send(settings.KAFKA_TOPIC, key=key, value=payload, partition=partition)
+        except BaseException as e:
+            stats.on_done(sent_at, e)
+            self._window.release()
+            raise
+
+        def _done(f: asyncio.Future):
+            err = f.exception() if not f.cancelled() else asyncio.CancelledError()
+            stats.on_done(sent_at, err)
+            self._window.release()
+        fut.add_done_callback(_done)
+
     def status(self) -> StatusResponse:
         return StatusResponse(
             running=self._running,
+            shard_id=self._shard_id,
+            partition=self._partition,
             last_sent_at_epoch=self._last_sent_at,
             last_batch_size=self._last_batch_size,
             interval_secs=settings.INTERVAL_SECS,
@@ -101,4 +255,26 @@ class Streamer:
             batch_max=settings.BATCH_MAX,
             topic=settings.KAFKA_TOPIC,
             bootstrap=settings.KAFKA_BOOTSTRAP,
+            mode=settings.STREAM_MODE,
+            rate=RateStatus(
+                profile=settings.RATE_PROFILE,
+                requested_eps=self._bucket.rate(),
+                achieved_eps=self._sent.rate(),
+                sent_total=self._sent_total,
+                elapsed_secs=self._bucket.elapsed(),
+            ) if self._bucket else None,
+            producer=ProducerStatus(
+                **self._stats.snapshot(), compression=settings.PRODUCER_COMPRESSION
+            ) if self._stats else None,
+            sampler=SamplerStatus(**self._prefetch.snapshot()) if self._prefetch else None,
+            startup=self.startup(),
+        )
+
+    def startup(self) -> StartupStatus:
+        return StartupStatus(
+            ready=self.ready,
+            backend=settings.SAMPLER_BACKEND,
+            load_secs=self._load_secs,
+            ready_after_secs=self._ready_after,
+            error=self._load_error,
         )
@@ -0,0 +1,82 @@
+"""
+Compact the sink's Parquet output: merge small files per partition
+(year=/month=[/day=[/hour=]]) into large files sorted by event_time (optionally
+fraud_prob), with row groups sized so min/max statistics prune the viewer's
+time/probability filters.
+
+    python compact_high_risk.py                       # one pass, JSON report on stdout
+    python compact_high_risk.py --interval 300        # keep running every 5 minutes
+    python compact_high_risk.py --sort-by event_time fraud_prob --row-group-size 32000
+    python compact_high_risk.py --timings             # also time the viewer's queries before/after
+
+Needs the sink manifest: readers switch over through it, and merged inputs are
+only deleted --grace-secs after the switch (see utils/compaction.py).
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from utils.compaction import compact_dataset, dataset_stats, query_timings
+
+
+def run_once(args) -> dict:
+    root = Path(args.base_dir).expanduser().resolve() / args.grain
+    before = dataset_stats(root)
+    timings_before = query_timings(root, repeat=args.repeat) if args.timings else {}
+
+    t0 = time.perf_counter()
+    parts = compact_dataset(
+        args.base_dir, args.grain,
+        sort_by=args.sort_by,
+        row_group_size=args.row_group_size,
+        target_file_rows=args.target_file_rows,
+        min_files=args.min_files,
+        min_age_secs=args.min_age_secs,
+        grace_secs=args.grace_secs,
+    )
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "root": str(root),
+        "partitions_compacted": sum(1 for p in parts if p["files_out"]),
+        "files_retired": sum(p["files_in"] for p in parts if p["files_out"]),
+        "files_written": sum(p["files_out"] for p in parts),
+        "compaction_secs": round(elapsed, 3),
+        "before": {**before, **timings_before},
+        "after": {**dataset_stats(root), **(query_timings(root, repeat=args.repeat) if args.timings else {})},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base-dir", default=os.getenv("MAGE_EXPORT_BASE_DIR", "/var/lib/mage/data"))
+    ap.add_argument("--grain", default=os.getenv("GRAIN", "fraud_high_risk"))
+    ap.add_argument("--sort-by", nargs="+", default=["event_time"],
+                    help="sort columns; fraud_prob sorts descending, others ascending")
+    ap.add_argument("--row-group-size", type=int, default=int(os.getenv("COMPACT_ROW_GROUP_SIZE", 64_000)))
+    ap.add_argument("--target-file-rows", type=int, default=int(os.getenv("COMPACT_TARGET_FILE_ROWS", 1_000_000)))
+    ap.add_argument("--min-files", type=int, default=2, help="skip partitions with fewer small files")
+    ap.add_argument("--min-age-secs", type=float, default=float(os.getenv("COMPACT_MIN_AGE_SECS", 60)),
+                    help="only merge files older than this")
+    ap.add_argument("--interval", type=float, default=float(os.getenv("COMPACT_INTERVAL_SECS", 0)),
+                    help="repeat every N seconds (0 = run once)")
+    ap.add_argument("--grace-secs", type=float, default=float(os.getenv("COMPACT_GRACE_SECS", 600)),
+                    help="delete merged inputs this long after the manifest switched to the new files")
+    ap.add_argument("--timings", action="store_true",
+                    default=os.getenv("COMPACT_TIMINGS", "false").lower() == "true",
+                    help="time the viewer's typical queries before/after (full scans; off by default)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    while True:
+        print(json.dumps(run_once(args)), flush=True)
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
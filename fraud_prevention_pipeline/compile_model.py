@@ -0,0 +1,37 @@
+"""
+Compile the CatBoost model into the array-backed oblivious-tree format read by
+utils/oblivious.py (FRAUD_MODEL_BACKEND=compiled).
+
+    python compile_model.py                                   # ml_artifacts/catboost_fraud.cbm -> .npz
+    python compile_model.py --model ml_artifacts/catboost_fraud.cbm --out ml_artifacts/catboost_fraud.npz
+
+Point FRAUD_MODEL_PATH at the .npz to skip compiling at startup; with the .cbm
+the pipeline compiles it on load (and again whenever the file is replaced).
+"""
+import argparse
+import json
+from pathlib import Path
+from utils.oblivious import compile_cbm
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default="ml_artifacts/catboost_fraud.cbm")
+    ap.add_argument("--out", default=None, help="default: the model path with a .npz suffix")
+    args = ap.parse_args()
+
+    out = args.out or str(Path(args.model).with_suffix(".npz"))
+    compiled = compile_cbm(args.model)
+    compiled.save(out)
+    print(json.dumps({
+        "model": args.model,
+        "out": out,
+        "trees": compiled.n_trees,
+        "depth": compiled.depth,
+        "features": compiled.n_features,
+        "bytes": Path(out).stat().st_size,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+High-throughput alternative to the Mage streaming pipeline: an aiokafka consumer
+that fetches large batches, scores them per partition in a process pool and
+writes high-risk rows in the sink's Parquet layout. Offsets are committed only
+after the rows are durably on disk. Needs the optional extra:
+pip install 'fraud-prevention-pipeline[consumer]'.
+
+    python consumer.py                                  # KAFKA_BOOTSTRAP / KAFKA_TOPIC from the env
+    python consumer.py --workers 3 --max-records 20000 --commit-secs 2
+
+Run several processes with the same --group-id to spread the topic's partitions.
+Use a different group id than the Mage pipeline if both run at once.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+from utils.latency import use_metrics_file
+from utils.scoring_consumer import ScoringConsumer
+from utils.score_pool import MODEL_BACKENDS
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--bootstrap", default=os.getenv("KAFKA_BOOTSTRAP", "localhost:9092"))
+    ap.add_argument("--topic", default=os.getenv("KAFKA_TOPIC", "creditcard-transactions"))
+    ap.add_argument("--group-id", default=os.getenv("CONSUMER_GROUP", "fraud-scoring-consumer"))
+    ap.add_argument("--auto-offset-reset", choices=["latest", "earliest"],
+                    default=os.getenv("CONSUMER_AUTO_OFFSET_RESET", "latest"))
+    ap.add_argument("--base-dir", default=os.getenv("MAGE_EXPORT_BASE_DIR", "/var/lib/mage/data"))
+    ap.add_argument("--grain", default=os.getenv("GRAIN", "fraud_high_risk"))
+    ap.add_argument("--model", default=os.getenv("FRAUD_MODEL_PATH", "ml_artifacts/catboost_fraud.cbm"))
+    ap.add_argument("--backend", choices=list(MODEL_BACKENDS), default=os.getenv("FRAUD_MODEL_BACKEND", "catboost"))
+    ap.add_argument("--workers", type=int, default=int(os.getenv("CONSUMER_WORKERS", 0)) or None,
+                    help="scoring processes (default: CPU count)")
+    ap.add_argument("--threads-per-worker", type=int, default=1, help="CatBoost threads per process")
+    ap.add_argument("--max-records", type=int, default=int(os.getenv("CONSUMER_MAX_RECORDS", 5000)),
+                    help="records per fetch, all partitions together")
+    ap.add_argument("--fetch-timeout-ms", type=int, default=200)
+    ap.add_argument("--commit-secs", type=float, default=float(os.getenv("CONSUMER_COMMIT_SECS", 5)),
+                    help="flush + offset commit interval")
+    ap.add_argument("--queue-batches", type=int, default=4, help="fetched batches buffered per partition")
+    ap.add_argument("--min-prob", type=float, default=0.2, help="write rows with fraud_prob above this")
+    ap.add_argument("--granularity", choices=["month", "day", "hour"],
+                    default=os.getenv("PARTITION_GRANULARITY", "month"))
+    ap.add_argument("--roll-rows", type=int, default=int(os.getenv("MAGE_SINK_ROLL_ROWS", 100_000)))
+    ap.add_argument("--no-manifest", dest="manifest", action="store_false")
+    ap.add_argument("--max-commit-failures", type=int, default=3,
+                    help="exit after this many failed flush/commit rounds in a row")
+    ap.add_argument("--metrics-path", default=os.getenv("CONSUMER_METRICS_PATH"),
+                    help="latency metrics file (default: <base-dir>/_metrics/consumer.prom; '' disables)")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    # not the Mage pipeline's pipeline.prom: both processes would overwrite each other's file
+    if args.metrics_path is None:
+        args.metrics_path = os.path.join(args.base_dir, "_metrics", "consumer.prom")
+    use_metrics_file(args.metrics_path)
+    consumer = ScoringConsumer(
+        args.bootstrap, args.topic, args.group_id, args.base_dir, args.grain, args.model,
+        backend=args.backend,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        max_records=args.max_records,
+        fetch_timeout_ms=args.fetch_timeout_ms,
+        commit_secs=args.commit_secs,
+        queue_batches=args.queue_batches,
+        min_prob=args.min_prob,
+        granularity=args.granularity,
+        roll_rows=args.roll_rows,
+        auto_offset_reset=args.auto_offset_reset,
+        write_manifest=args.manifest,
+        max_commit_failures=args.max_commit_failures,
+    )
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await consumer.run(stop)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
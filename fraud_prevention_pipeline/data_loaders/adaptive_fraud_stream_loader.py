@@ -0,0 +1,165 @@
+import logging
+import os
+import time
+from typing import Callable
+from mage_ai.streaming.sources.base_python import BasePythonSource
+from utils.adaptive_batch import AdaptiveBatchController
+from utils.latency import get_metrics
+from utils.sink_flush import flush_sinks
+
+if 'streaming_source' not in globals():
+    from mage_ai.data_preparation.decorators import streaming_source
+
+
+# ================================
+# Helpers
+# ================================
+
+def _setting(cfg: dict, key: str, env: str, default):
+    # block config first, then env var, then default (same precedence as the sink)
+    value = cfg.get(key)
+    if value is None:
+        value = os.getenv(env)
+    return type(default)(value) if value is not None else default
+
+
+def _api_version(cfg: dict):
+    # "4.1.1" -> (4, 1, 1), as Mage's Kafka source does; pinned so kafka-python
+    # doesn't have to probe (its probe doesn't know 4.x brokers). "auto" probes anyway.
+    value = _setting(cfg, "api_version", "KAFKA_API_VERSION", "4.1.1")
+    return None if value == "auto" else tuple(int(v) for v in value.split("."))
+
+
+def _security(cfg: dict) -> dict:
+    # same keys as the YAML loaders: security_protocol plus ssl_config / sasl_config
+    # (or KAFKA_SECURITY_PROTOCOL, KAFKA_SSL_*, KAFKA_SASL_* env vars)
+    protocol = _setting(cfg, "security_protocol", "KAFKA_SECURITY_PROTOCOL", "PLAINTEXT")
+    kwargs = {"security_protocol": protocol}
+    if "SSL" in protocol:
+        ssl = cfg.get("ssl_config") or {}
+        kwargs.update(
+            ssl_cafile=_setting(ssl, "cafile", "KAFKA_SSL_CAFILE", "") or None,
+            ssl_certfile=_setting(ssl, "certfile", "KAFKA_SSL_CERTFILE", "") or None,
+            ssl_keyfile=_setting(ssl, "keyfile", "KAFKA_SSL_KEYFILE", "") or None,
+            ssl_password=_setting(ssl, "password", "KAFKA_SSL_PASSWORD", "") or None,
+            ssl_check_hostname=str(_setting(ssl, "check_hostname", "KAFKA_SSL_CHECK_HOSTNAME", "true")).lower() == "true",
+        )
+    if protocol.startswith("SASL"):
+        sasl = cfg.get("sasl_config") or {}
+        kwargs.update(
+            sasl_mechanism=_setting(sasl, "mechanism", "KAFKA_SASL_MECHANISM", "PLAIN"),
+            sasl_plain_username=_setting(sasl, "username", "KAFKA_SASL_USERNAME", "") or None,
+            sasl_plain_password=_setting(sasl, "password", "KAFKA_SASL_PASSWORD", "") or None,
+        )
+    return kwargs
+
+
+@streaming_source
+class AdaptiveFraudStreamSource(BasePythonSource):
+    """
+    Kafka source whose poll batch size and max wait follow consumer lag and the
+    measured time of the downstream blocks (utils/adaptive_batch.py), targeting
+    LOADER_SLO_MS. Values are handed over raw (like serde RAW_VALUE); data_cleaner
+    decodes JSON, binary and arrow payloads alike.
+
+    Offsets are committed every LOADER_COMMIT_SECS, and only after the sink has
+    flushed its buffered rows to disk (utils/sink_flush.py): a crash replays what
+    wasn't written yet instead of losing it.
+    """
+
+    def init_client(self):
+        from kafka import KafkaConsumer
+
+        cfg = getattr(self, "config", {}) or {}
+        self.logger = logging.getLogger("AdaptiveFraudStreamSource")
+        if not self.logger.handlers:
+            h = logging.StreamHandler()
+            h.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+            self.logger.addHandler(h)
+        self.logger.setLevel(logging.INFO)
+
+        self.consumer = KafkaConsumer(
+            _setting(cfg, "topic", "KAFKA_TOPIC", "creditcard-transactions"),
+            bootstrap_servers=_setting(cfg, "bootstrap_server", "KAFKA_BOOTSTRAP", "broker:29092"),
+            group_id=_setting(cfg, "consumer_group", "KAFKA_CONSUMER_GROUP", "mage-consumers-dev"),
+            auto_offset_reset=_setting(cfg, "auto_offset_reset", "KAFKA_AUTO_OFFSET_RESET", "latest"),
+            enable_auto_commit=False,
+            api_version=_api_version(cfg),
+            **_security(cfg),
+        )
+        self.controller = AdaptiveBatchController(
+            slo_ms=_setting(cfg, "slo_ms", "LOADER_SLO_MS", 1000.0),
+            min_batch=_setting(cfg, "min_batch_size", "LOADER_MIN_BATCH", 10),
+            max_batch=_setting(cfg, "max_batch_size", "LOADER_MAX_BATCH", 20_000),
+            initial_batch=_setting(cfg, "batch_size", "LOADER_INITIAL_BATCH", 500),
+            min_wait_ms=_setting(cfg, "min_wait_ms", "LOADER_MIN_WAIT_MS", 5.0),
+            max_wait_ms=_setting(cfg, "max_wait_ms", "LOADER_MAX_WAIT_MS", 1000.0),
+        )
+        self.commit_secs = _setting(cfg, "commit_secs", "LOADER_COMMIT_SECS", 5.0)
+        self._uncommitted = False
+        self._last_commit = time.monotonic()
+        self._last_action = None
+
+    def _poll(self):
+        # kafka-python returns as soon as anything is there; keep polling until the
+        # batch is full or the max wait has passed
+        c = self.controller
+        deadline = time.monotonic() + c.max_wait_ms / 1000.0
+        values = []
+        while len(values) < c.batch_size:
+            left_ms = max(0, int((deadline - time.monotonic()) * 1000))
+            polled = self.consumer.poll(timeout_ms=left_ms, max_records=c.batch_size - len(values))
+            for records in polled.values():
+                values.extend(r.value for r in records)
+            if left_ms == 0:
+                break
+        return values
+
+    def _lag(self) -> int:
+        # highwater marks come with fetch responses: no extra broker round trip
+        lag = 0
+        for tp in self.consumer.assignment():
+            hw = self.consumer.highwater(tp)
+            if hw is not None:
+                lag += max(0, hw - self.consumer.position(tp))
+        return lag
+
+    def _commit(self):
+        # every polled record has been through the handler, so the consumer's positions
+        # are exactly what was handed over; flush the sink first so they are on disk too
+        self._last_commit = time.monotonic()
+        try:
+            flush_sinks()
+            self.consumer.commit()
+        except Exception as e:  # rows stay buffered in the sink; retried on the next interval
+            self.logger.error(f"Offset commit skipped, sink flush or commit failed: {e}")
+            return
+        self._uncommitted = False
+
+    def batch_read(self, handler: Callable):
+        metrics = get_metrics()
+        while True:
+            values = self._poll()
+            proc_ms = 0.0
+            if values:
+                t0 = time.perf_counter()
+                handler(values)  # data_cleaner -> compute_fraud_risk_score -> export_to_parquet
+                proc_ms = (time.perf_counter() - t0) * 1000.0
+                self._uncommitted = True
+            if self._uncommitted and time.monotonic() - self._last_commit >= self.commit_secs:
+                self._commit()
+
+            d = self.controller.update(len(values), proc_ms, self._lag())
+            metrics.decision(d.action)
+            metrics.gauge("pipeline_loader_batch_size", d.batch_size)
+            metrics.gauge("pipeline_loader_max_wait_ms", d.max_wait_ms)
+            metrics.gauge("pipeline_loader_lag_records", d.lag)
+            metrics.gauge("pipeline_loader_last_batch_records", len(values))
+            metrics.gauge("pipeline_loader_last_batch_ms", proc_ms)
+            if d.per_row_ms is not None:
+                metrics.gauge("pipeline_loader_per_row_ms", d.per_row_ms)
+            metrics.maybe_flush()
+            if d.action != self._last_action:
+                self.logger.info(f"{d.action}: batch_size={d.batch_size} max_wait_ms={d.max_wait_ms:.0f} "
+                                 f"lag={d.lag} last={len(values)} rows in {proc_ms:.0f} ms")
+                self._last_action = d.action
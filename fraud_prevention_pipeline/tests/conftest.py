@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the Mage project imports its helpers as `utils.*` from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
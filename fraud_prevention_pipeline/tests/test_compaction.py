@@ -0,0 +1,50 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from utils import compaction  # noqa: E402
+from utils.compaction import compact_partition, data_files, delete_retired  # noqa: E402
+from utils.manifest import Manifest, entry_from_footer  # noqa: E402
+
+
+def _dataset(root, n_files=3):
+    part = root / "year=2024" / "month=01"
+    part.mkdir(parents=True)
+    manifest = Manifest(root)
+    for i in range(n_files):
+        path = part / f"part-{i}.parquet"
+        pd.DataFrame({"transaction_id": [f"t{i}"], "event_time": [pd.Timestamp("2024-01-05", tz="UTC")],
+                      "fraud_prob": [0.5]}).to_parquet(path, index=False)
+        manifest.append([entry_from_footer(root, path)])
+    return part, manifest
+
+
+def test_inputs_deleted_after_grace(tmp_path):
+    part, manifest = _dataset(tmp_path)
+    result = compact_partition(part, manifest=manifest, min_age_secs=0)
+    assert result["files_out"] == 1
+    assert len(data_files(tmp_path)) == 4  # inputs kept for readers of the old snapshot
+
+    assert delete_retired(tmp_path, grace_secs=600, manifest=manifest) == []
+    assert len(delete_retired(tmp_path, grace_secs=0, manifest=manifest)) == 3
+    assert [str(p) for p in data_files(tmp_path)] == result["written"]
+
+
+def test_crash_before_manifest_switch_leaves_no_orphans(tmp_path, monkeypatch):
+    part, manifest = _dataset(tmp_path)
+    inputs = data_files(tmp_path)
+
+    def crash(records):
+        raise OSError("killed before the manifest append")
+
+    monkeypatch.setattr(manifest, "append", crash)
+    with pytest.raises(OSError):
+        compact_partition(part, manifest=manifest, min_age_secs=0)
+    monkeypatch.undo()
+
+    # the merged output is unlinked at once; the still-live inputs are left alone
+    delete_retired(tmp_path, grace_secs=0, manifest=manifest)
+    assert data_files(tmp_path) == inputs
+    assert sorted(tmp_path / p for p in manifest.live()) == inputs
+    assert not (tmp_path / compaction.RETIRED_NAME).read_text()
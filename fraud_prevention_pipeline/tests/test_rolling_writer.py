@@ -0,0 +1,34 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from utils.rolling_writer import RollingParquetWriter  # noqa: E402
+
+
+def test_failed_on_commit_leaves_one_file(tmp_path):
+    calls = []
+
+    def on_commit(path, df):
+        calls.append(path)
+        if len(calls) == 1:
+            raise OSError("manifest append failed")
+
+    writer = RollingParquetWriter(str(tmp_path), "grain", max_rows=10**6, on_commit=on_commit,
+                                  background=False)
+    writer.write(pd.DataFrame({
+        "transaction_id": ["a", "b"],
+        "event_time": ["2024-01-05T00:00:00Z", "2024-01-06T00:00:00Z"],
+        "fraud_prob": [0.9, 0.8],
+    }))
+
+    with pytest.raises(OSError):
+        writer.flush()
+    assert writer.pending_rows() == 2  # kept for the retry
+    assert list(tmp_path.rglob("*.parquet")) == []
+
+    committed = writer.flush()
+    files = list(tmp_path.rglob("*.parquet"))
+    assert [str(f) for f in files] == committed == [calls[-1]]
+    assert len(pd.read_parquet(files[0])) == 2
+    writer.close()
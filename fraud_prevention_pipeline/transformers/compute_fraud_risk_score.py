@@ -1,7 +1,10 @@
+import os
 import pandas as pd 
-from catboost import CatBoostClassifier
-from catboost import Pool
-from typing import Dict, List, Union
+from typing import Dict, List
+from utils.batch import normalize_batch
+from utils.latency import CONSUME_COL, SCORE_COL, TRACE_COLUMNS, get_metrics, now_ms
+from utils.model_registry import get_registry, load_catboost
+from utils.oblivious import load_compiled
 
 if 'transformer' not in globals():
     from mage_ai.data_preparation.decorators import transformer
@@ -11,39 +14,12 @@ if 'transformer' not in globals():
 # Helpers
 # ================================
 
-FEATURES = [
-    'V1','V2','V3','V4','V5','V6','V7','V8','V9','V10',
-    'V11','V12','V13','V14','V15','V16','V17','V18','V19','V20',
-    'V21','V22','V23','V24','V25','V26','V27','V28','Amount'
-]
-
-def _to_df(msgs: Union[pd.DataFrame, List[Dict], List]) -> pd.DataFrame:
-    # Case 1: already a DataFrame
-    if isinstance(msgs, pd.DataFrame):
-        return msgs
-
-    # Case 2: [DataFrame]
-    if isinstance(msgs, list) and len(msgs) == 1 and isinstance(msgs[0], pd.DataFrame):
-        return msgs[0]
-
-    # Case 3: list of dicts (common from source)
-    if isinstance(msgs, list) and msgs and isinstance(msgs[0], dict):
-        return pd.DataFrame(msgs)
-
-    # Case 4: list of lists of dicts (batched)
-    if isinstance(msgs, list):
-        flat: List[Dict] = []
-        for m in msgs:
-            if isinstance(m, list):
-                flat.extend(m)
-            elif isinstance(m, dict):
-                flat.append(m)
-            elif isinstance(m, pd.DataFrame):
-                flat.extend(m.to_dict(orient='records'))
-        return pd.DataFrame(flat)
-
-    # Fallback: single dict-like
-    return pd.DataFrame([msgs])
+MODEL_PATH = os.getenv("FRAUD_MODEL_PATH", "ml_artifacts/catboost_fraud.cbm")
+# catboost: CatBoostClassifier.predict_proba | compiled: NumPy oblivious-tree evaluator (utils/oblivious.py)
+MODEL_BACKENDS = {"catboost": load_catboost, "compiled": load_compiled}
+MODEL_BACKEND = os.getenv("FRAUD_MODEL_BACKEND", "catboost")
+if MODEL_BACKEND not in MODEL_BACKENDS:
+    raise ValueError(f"FRAUD_MODEL_BACKEND must be one of {list(MODEL_BACKENDS)}, got '{MODEL_BACKEND}'")
 
 @transformer
 def transform(messages: List[Dict], *args, **kwargs):
@@ -56,21 +32,31 @@ def transform(messages: List[Dict], *args, **kwargs):
     Returns:
         Transformed messages
     """
-    df = _to_df(messages).copy()
-    # Load ML (CatBoost) model
-    predictor = CatBoostClassifier()
-    predictor.load_model("ml_artifacts/catboost_fraud.cbm")
+    # float32 feature matrix in FEATURES order + id/time columns, whatever the message shape
+    batch = normalize_batch(messages)
+    if len(batch) == 0:
+        return pd.DataFrame(columns=['transaction_id', 'event_time', 'fraud_prob'])
 
-    # Ensure predictors only has the model features (same order as FEATURES)
-    predictors = df[FEATURES]
+    # ML (CatBoost) model: loaded once per process, hot-reloaded if the .cbm is replaced
+    predictor = get_registry(MODEL_PATH, loader=MODEL_BACKENDS[MODEL_BACKEND]).get()
+    fraud_prob = predictor.predict_proba(batch.features)[:, 1]
+    scored = now_ms()
 
-    # Build a Pool without labels and predict probabilities
-    pred_pool = Pool(predictors)
-    fraud_prob = predictor.predict_proba(pred_pool)[:, 1]
+    metrics = get_metrics()
+    metrics.count("scored", len(batch))
+    metrics.observe("consume_to_score", batch.meta.get(CONSUME_COL), scored)
 
     # Append probabilities 
-    prediction_data = df[['transaction_id', 'event_time']].copy()
-    prediction_data['fraud_prob'] = fraud_prob
+    prediction_data = pd.DataFrame({
+        'transaction_id': batch.transaction_id,
+        'event_time': batch.event_time,
+        'fraud_prob': fraud_prob,
+    })
+    # carry the trace stamps to the sink (score -> commit latency)
+    for col in TRACE_COLUMNS:
+        if col in batch.meta:
+            prediction_data[col] = batch.meta[col]
+    prediction_data[SCORE_COL] = scored
 
 
     # Ensure event_time is datetime and sort by it
@@ -78,6 +64,6 @@ def transform(messages: List[Dict], *args, **kwargs):
     prediction_data = prediction_data.sort_values('event_time')
 
     # Transactions with probabilities over 40% (this assuming it is a well calibrated probability)
-    high_risk_transactions = prediction_data[prediction_data.fraud_prob > 0.2].copy()
+    high_risk_transactions = prediction_data[prediction_data.fraud_prob > 0.2]
 
     return high_risk_transactions
@@ -1,5 +1,6 @@
-import pandas as pd
 from typing import Dict, List
+from utils.batch import normalize_batch
+from utils.latency import CONSUME_COL, PRODUCE_COL, TRACE_COLUMNS, get_metrics, now_ms
 
 if 'transformer' not in globals():
     from mage_ai.data_preparation.decorators import transformer
@@ -16,7 +17,16 @@ def transform(messages: List[Dict], *args, **kwargs):
     Returns:
         Transformed messages
     """
-    df = pd.DataFrame(messages)
-    df = df.loc[:, ~df.columns.str.startswith('_')] # Remove columns whose name starts with '_'
+    # dicts (JSON serde) or raw bytes (RAW_VALUE serde: JSON, binary or arrow wire format),
+    # built column by column into a frame with id/time, FEATURES and known metadata
+    batch = normalize_batch(messages)
+    consumed = now_ms()
+    df = batch.to_frame(private=False, keep=TRACE_COLUMNS) # Remove columns whose name starts with '_' (trace stamps stay)
+
+    # latency tracing: every row carries its own stage timestamps downstream
+    df[CONSUME_COL] = consumed
+    metrics = get_metrics()
+    metrics.count("consumed", len(df))
+    metrics.observe("produce_to_consume", batch.meta.get(PRODUCE_COL), consumed)
 
     return df
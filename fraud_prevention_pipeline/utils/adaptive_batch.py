@@ -0,0 +1,85 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+
+
+# ================================
+# Lag-adaptive poll sizing for the stream loader
+# ================================
+#
+# AIMD on the poll batch size against a latency SLO. The budget is `headroom * slo_ms`,
+# and a record's latency is roughly (time waited for the batch to fill) + (time the
+# downstream blocks take to clean, score and sink it).
+#   - processing alone over budget          -> shrink the batch (multiplicative decrease)
+#   - backlog (lag > batch size)            -> grow it multiplicatively, don't wait to fill
+#   - a full batch and no backlog           -> grow it additively (probe for headroom)
+#   - a partial batch (quiet traffic)       -> keep the size
+# The batch is capped at what the measured per-row cost fits in the budget, and the max
+# wait is whatever budget the predicted processing time leaves.
+
+@dataclass
+class Decision:
+    action: str  # shrink | grow | probe | hold
+    batch_size: int
+    max_wait_ms: float
+    per_row_ms: Optional[float]
+    lag: int
+
+
+class AdaptiveBatchController:
+    def __init__(self, slo_ms: float = 1000.0, min_batch: int = 10, max_batch: int = 20_000,
+                 initial_batch: int = 500, min_wait_ms: float = 5.0, max_wait_ms: float = 1000.0,
+                 increase_factor: float = 2.0, additive_step: int = 100, decrease_factor: float = 0.5,
+                 headroom: float = 0.8, alpha: float = 0.2):
+        if not (0 < min_batch <= max_batch):
+            raise ValueError("need 0 < min_batch <= max_batch")
+        self.slo_ms = float(slo_ms)
+        self.min_batch, self.max_batch = int(min_batch), int(max_batch)
+        self.min_wait_ms, self.max_wait_cap_ms = float(min_wait_ms), float(max_wait_ms)
+        self.increase_factor = float(increase_factor)
+        self.additive_step = int(additive_step)
+        self.decrease_factor = float(decrease_factor)
+        self.headroom = float(headroom)
+        self.alpha = float(alpha)
+
+        self.batch_size = min(max(int(initial_batch), self.min_batch), self.max_batch)
+        self.max_wait_ms = self.max_wait_cap_ms
+        self.per_row_ms: Optional[float] = None  # EWMA of processing time per row
+
+    @property
+    def budget_ms(self) -> float:
+        return self.slo_ms * self.headroom
+
+    def _affordable(self) -> int:
+        # largest batch whose predicted processing time fits the budget
+        if not self.per_row_ms:
+            return self.max_batch
+        return max(self.min_batch, int(self.budget_ms / self.per_row_ms))
+
+    def update(self, n: int, proc_ms: float, lag: int) -> Decision:
+        """Feed one poll: records handed downstream, time the handler took, records still behind."""
+        if n > 0:
+            per_row = proc_ms / n
+            self.per_row_ms = per_row if self.per_row_ms is None else (
+                self.alpha * per_row + (1 - self.alpha) * self.per_row_ms)
+
+        size = self.batch_size
+        backlog = lag > size
+        if n > 0 and proc_ms > self.budget_ms:
+            action, size = "shrink", int(size * self.decrease_factor)
+        elif backlog:
+            action, size = "grow", int(size * self.increase_factor)
+        elif n >= size:
+            action, size = "probe", size + self.additive_step
+        else:
+            action = "hold"
+        if action != "shrink":
+            size = min(size, self._affordable())
+        self.batch_size = min(max(size, self.min_batch), self.max_batch)
+
+        if backlog:
+            self.max_wait_ms = self.min_wait_ms  # records are already there
+        else:
+            predicted = (self.per_row_ms or 0.0) * self.batch_size
+            self.max_wait_ms = min(max(self.budget_ms - predicted, self.min_wait_ms), self.max_wait_cap_ms)
+        return Decision(action, self.batch_size, self.max_wait_ms, self.per_row_ms, int(lag))
@@ -0,0 +1,305 @@
+from __future__ import annotations
+import json
+import logging
+import multiprocessing
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+from uuid import uuid4
+import numpy as np
+import pandas as pd
+from utils.batch import FEATURES, ID_COL, TIME_COL
+from utils.compaction import compaction_lock, data_files
+from utils.manifest import Manifest, remove_entry
+from utils.rolling_writer import RollingParquetWriter, atomic_path
+from utils.score_pool import MODEL_BACKENDS, make_pool, score
+
+
+# ================================
+# Chunked, parallel re-scoring of historical transactions
+# ================================
+#
+# The main process reads the inputs lazily (CSV chunks / Parquet record batches) and
+# ships only the float32 feature matrix to a process pool whose workers load the model
+# once, in their initializer. At most `max_inflight` chunks are outstanding and results
+# are consumed in input order, so memory stays flat whatever the input size and the
+# checkpoint is just "rows done" per input file.
+
+# creditcard.csv: `Time` is seconds since the first transaction of the capture (September 2013)
+DEFAULT_ORIGIN = "2013-09-01T00:00:00Z"
+
+
+def input_files(inputs: Sequence[str]) -> List[Path]:
+    """Files as given; directories expand to their .csv/.parquet files (recursively, sorted)."""
+    out: List[Path] = []
+    for s in inputs:
+        p = Path(s).expanduser().resolve()
+        if p.is_dir():
+            out.extend(sorted(f for f in p.rglob("*") if f.suffix in (".csv", ".parquet") and not f.name.startswith(".")))
+        elif p.exists():
+            out.append(p)
+        else:
+            raise FileNotFoundError(f"Input not found: {s}")
+    return out
+
+
+def iter_chunks(path: Path, chunk_rows: int, skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """`chunk_rows`-row frames of a CSV or Parquet file, starting after `skip_rows` rows."""
+    if path.suffix == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows, skiprows=range(1, skip_rows + 1))
+        return
+    import pyarrow.parquet as pq
+
+    # record batches can be smaller than requested at row group edges; regroup them
+    pending: List[pd.DataFrame] = []
+    rows = 0
+    for rb in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+        if skip_rows >= rb.num_rows:
+            skip_rows -= rb.num_rows
+            continue
+        df = rb.to_pandas()
+        if skip_rows:
+            df, skip_rows = df.iloc[skip_rows:], 0
+        pending.append(df)
+        rows += len(df)
+        while rows >= chunk_rows:
+            frame = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0].reset_index(drop=True)
+            yield frame.iloc[:chunk_rows]
+            rest = frame.iloc[chunk_rows:]
+            pending, rows = ([rest] if len(rest) else []), len(rest)
+    if rows:
+        yield pd.concat(pending, ignore_index=True)
+
+
+def with_id_and_time(df: pd.DataFrame, source: str, offset: int, origin: pd.Timestamp) -> pd.DataFrame:
+    """
+    (transaction_id, event_time) for a raw chunk. Missing ids are derived from the
+    file name and row number, so re-running a backfill yields the same ids; a missing
+    event_time is `origin` + `Time` seconds (the original Kaggle layout).
+    """
+    if ID_COL in df.columns:
+        ids = df[ID_COL].astype(str)
+    else:
+        ids = f"{source}-" + pd.Series(np.arange(offset, offset + len(df)), index=df.index).astype(str)
+    if TIME_COL in df.columns:
+        times = pd.to_datetime(df[TIME_COL], errors="coerce", utc=True)
+    elif "Time" in df.columns:
+        times = origin + pd.to_timedelta(df["Time"], unit="s")
+    else:
+        raise ValueError(f"{source}: need an '{TIME_COL}' or 'Time' column to place rows in partitions")
+    return pd.DataFrame({ID_COL: ids, TIME_COL: times}).reset_index(drop=True)
+
+
+# ================================
+# Checkpoint
+# ================================
+
+class Checkpoint:
+    """
+    JSON state of one backfill run: rows done per input file and the files committed
+    so far. It is only saved right after the writer has flushed, so everything it
+    lists is on disk. Files with the run's prefix that it doesn't list come from an
+    interrupted interval and are removed on resume.
+    """
+
+    def __init__(self, path: Path, state: Dict[str, object]):
+        self.path = path
+        self.state = state
+
+    @classmethod
+    def open(cls, path: Path, params: Dict[str, object], restart: bool = False) -> "Checkpoint":
+        if path.exists() and not restart:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state["params"]["chunk_rows"] != params["chunk_rows"]:
+                raise ValueError(f"{path} was written with chunk_rows={state['params']['chunk_rows']}; "
+                                 "resume with the same value or restart")
+            state["resumed"] = True
+            return cls(path, state)
+        return cls(path, {
+            "run_id": uuid4().hex[:8],
+            "params": params,
+            "inputs": {},
+            "files": [],
+            "completed": False,
+            "resumed": False,
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        })
+
+    def rows_done(self, path: Path) -> int:
+        return int(self.state["inputs"].get(str(path), {}).get("rows_done", 0))
+
+    def save(self):
+        self.state["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_path(self.path, durable=True) as tmp:
+            tmp.write_text(json.dumps(self.state, indent=1), encoding="utf-8")
+
+
+@contextmanager
+def _compaction_paused(root: Path, logger: logging.Logger, poll_secs: float = 5.0) -> Iterator[None]:
+    # compaction could otherwise merge files the checkpoint doesn't cover yet
+    while True:
+        with compaction_lock(root) as held:
+            if held:
+                yield
+                return
+        logger.info(f"Waiting for compaction of {root} to finish")
+        time.sleep(poll_secs)
+
+
+def _remove_orphans(root: Path, prefix: str, keep: Sequence[str], manifest: Optional[Manifest],
+                    logger: logging.Logger) -> int:
+    keep = set(keep)
+    orphans = [p for p in data_files(root) if p.name.startswith(f"{prefix}-")
+               and str(p.relative_to(root)) not in keep]
+    for p in orphans:
+        p.unlink()
+    if manifest is not None and orphans:
+        manifest.append(remove_entry(str(p.relative_to(root))) for p in orphans)
+    if orphans:
+        logger.info(f"Removed {len(orphans)} file(s) written after the last checkpoint")
+    return len(orphans)
+
+
+# ================================
+# Driver
+# ================================
+
+def backfill(inputs: Sequence[str], base_dir: str, grain: str, model_path: str,
+             backend: str = "catboost", workers: Optional[int] = None, threads_per_worker: int = 1,
+             chunk_rows: int = 100_000, max_inflight: Optional[int] = None, min_prob: float = 0.2,
+             granularity: str = "month", roll_rows: int = 1_000_000, checkpoint_path: Optional[str] = None,
+             checkpoint_every: int = 10, origin: str = DEFAULT_ORIGIN, restart: bool = False,
+             write_manifest: bool = True, logger: Optional[logging.Logger] = None) -> Dict[str, object]:
+    """
+    Score `inputs` (CSV/Parquet files or directories) and write rows with
+    fraud_prob > `min_prob` under <base_dir>/<grain>/year=.../ like the streaming sink.
+
+    Parameters
+    ----------
+    workers : int
+        Scoring processes (default: CPU count); each loads the model once.
+    chunk_rows : int
+        Rows per task; also the resume granularity.
+    max_inflight : int
+        Chunks submitted but not yet written (default 2 x workers). Bounds memory.
+    checkpoint_path : str
+        Default <base_dir>/<grain>/_backfill.json. Saved every `checkpoint_every`
+        chunks, right after the writer flushed. Re-running the same command resumes.
+    restart : bool
+        Ignore an existing checkpoint and start a new run (earlier output is kept).
+
+    Returns
+    -------
+    dict : run report (rows scored/written, files committed, throughput)
+    """
+    logger = logger or logging.getLogger("backfill")
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"backend must be one of {list(MODEL_BACKENDS)}, got '{backend}'")
+    files = input_files(inputs)
+    workers = workers or multiprocessing.cpu_count()
+    max_inflight = max_inflight or 2 * workers
+    origin_ts = pd.Timestamp(origin)
+    origin_ts = origin_ts.tz_localize("UTC") if origin_ts.tzinfo is None else origin_ts.tz_convert("UTC")
+
+    root = Path(base_dir).expanduser().resolve() / grain
+    ckpt = Checkpoint.open(Path(checkpoint_path) if checkpoint_path else root / "_backfill.json",
+                           params={"chunk_rows": chunk_rows, "min_prob": min_prob, "model": model_path,
+                                   "backend": backend, "origin": origin},
+                           restart=restart)
+    prefix = f"backfill-{ckpt.state['run_id']}"
+
+    manifest = None
+    if write_manifest:
+        manifest = Manifest(root)
+        manifest.ensure(data_files(root))
+
+    committed: List[str] = list(ckpt.state["files"])
+
+    def on_commit(path: str, df: pd.DataFrame):
+        committed.append(str(Path(path).relative_to(root)))
+        if manifest is not None:
+            manifest.add_frame(path, df)
+
+    # commits only happen on max_rows or an explicit flush (no age-based rolling)
+    writer = RollingParquetWriter(base_dir, grain, filename_prefix=prefix, max_rows=roll_rows,
+                                  max_bytes=1 << 62, max_age_secs=float("inf"), granularity=granularity,
+                                  durable=True, on_commit=on_commit, logger=logger, background=False)
+
+    def checkpoint():
+        writer.flush()
+        ckpt.state["files"] = list(committed)
+        ckpt.save()
+
+    def tasks():
+        # (path, offset, raw chunk) ... then (path, rows, None) once the file is exhausted
+        for path in files:
+            if ckpt.state["inputs"].get(str(path), {}).get("done"):
+                continue
+            done = ckpt.rows_done(path)
+            offset = done
+            for df in iter_chunks(path, chunk_rows, skip_rows=done):
+                yield path, offset, df
+                offset += len(df)
+            yield path, offset, None
+
+    stats = {"chunks": 0, "rows_scored": 0, "rows_written": 0}
+    t0 = time.perf_counter()
+    with _compaction_paused(root, logger):
+        _remove_orphans(root, prefix, committed, manifest, logger)
+        with make_pool(model_path, backend, workers, threads_per_worker) as pool:
+            inflight: deque = deque()
+
+            def drain_one():
+                path, offset, keys, fut = inflight.popleft()
+                state = ckpt.state["inputs"].setdefault(str(path), {"rows_done": 0, "done": False})
+                if fut is None:
+                    state["done"] = True
+                    return
+                prob = fut.result()
+                out = keys.assign(fraud_prob=prob)
+                out = out[out.fraud_prob > min_prob]
+                writer.write(out)
+                state["rows_done"] = offset + len(keys)
+                stats["chunks"] += 1
+                stats["rows_scored"] += len(keys)
+                stats["rows_written"] += len(out)
+                if stats["chunks"] % checkpoint_every == 0:
+                    checkpoint()
+
+            for path, offset, df in tasks():
+                if df is None:
+                    inflight.append((path, offset, None, None))
+                else:
+                    missing = [c for c in FEATURES if c not in df.columns]
+                    if missing:
+                        raise ValueError(f"{path}: missing feature columns {missing}")
+                    keys = with_id_and_time(df, path.stem, offset, origin_ts)
+                    X = df[FEATURES].to_numpy(dtype=np.float32)
+                    inflight.append((path, offset, keys, pool.submit(score, X)))
+                while len(inflight) > max_inflight:
+                    drain_one()
+            while inflight:
+                drain_one()
+
+        writer.close()
+        ckpt.state["completed"] = True
+        checkpoint()
+
+    secs = time.perf_counter() - t0
+    return {
+        "run_id": ckpt.state["run_id"],
+        "resumed": ckpt.state["resumed"],
+        "root": str(root),
+        "inputs": [str(p) for p in files],
+        "workers": workers,
+        **stats,
+        "files_committed": writer.files_committed,
+        "secs": round(secs, 3),
+        "rows_per_sec": round(stats["rows_scored"] / secs, 1) if secs else None,
+        "checkpoint": str(ckpt.path),
+    }
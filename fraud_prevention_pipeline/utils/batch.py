@@ -0,0 +1,144 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Union
+import numpy as np
+import pandas as pd
+from utils.wire import FEATURES, decode_messages
+
+
+# ================================
+# Batch normalization shared by the scoring and sink blocks
+# ================================
+
+ID_COL = "transaction_id"
+TIME_COL = "event_time"
+# carried along when present (label, producer metadata and per-stage trace stamps, see utils/latency.py)
+META_COLUMNS = ("event_time_ms", "Class", "_schema_version", "_produce_time_ms",
+                "_consume_time_ms", "_score_time_ms")
+
+Messages = Union[pd.DataFrame, List, Dict, bytes]
+
+
+@dataclass
+class Batch:
+    """
+    A micro-batch in columnar form.
+
+    features : (n, len(FEATURES)) float32 matrix in FEATURES order, ready for the model
+    transaction_id, event_time : 1-D arrays (event_time left as received)
+    meta : other known columns (see META_COLUMNS)
+    """
+    features: np.ndarray
+    transaction_id: np.ndarray
+    event_time: np.ndarray
+    meta: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.transaction_id)
+
+    def to_frame(self, features: bool = True, private: bool = True, keep: Sequence[str] = ()) -> pd.DataFrame:
+        # private=False drops '_'-prefixed metadata except the columns listed in `keep`
+        cols: Dict[str, np.ndarray] = {ID_COL: self.transaction_id, TIME_COL: self.event_time}
+        if features:
+            cols.update({f: self.features[:, j] for j, f in enumerate(FEATURES)})
+        cols.update({k: v for k, v in self.meta.items() if private or not k.startswith("_") or k in keep})
+        return pd.DataFrame(cols)
+
+
+def _chunks(msgs: Messages) -> List[Union[pd.DataFrame, List[Dict]]]:
+    # Split any accepted shape into DataFrames and runs of dicts, without converting rows
+    if isinstance(msgs, pd.DataFrame):
+        return [msgs]
+    if isinstance(msgs, dict):
+        return [[msgs]]
+    if isinstance(msgs, (bytes, bytearray)):
+        return [decode_messages([msgs])]
+    if not isinstance(msgs, list):
+        return [pd.DataFrame([msgs])]
+    if msgs and not isinstance(msgs[0], (dict, list, pd.DataFrame)):
+        return [decode_messages(msgs)]  # raw Kafka values (RAW_VALUE serde)
+
+    out: List[Union[pd.DataFrame, List[Dict]]] = []
+    run: List[Dict] = []
+    for m in msgs:
+        if isinstance(m, dict):
+            run.append(m)
+        elif isinstance(m, list):
+            run.extend(m)
+        elif isinstance(m, pd.DataFrame):
+            if run:
+                out.append(run)
+                run = []
+            out.append(m)
+    if run:
+        out.append(run)
+    return out
+
+
+def normalize_batch(msgs: Messages) -> Batch:
+    """
+    Normalize any accepted message shape into a Batch.
+
+    Shapes: DataFrame, [DataFrame, ...], list of dicts, list of lists of dicts,
+    a single dict, or raw Kafka values (JSON/binary/arrow bytes). The feature
+    matrix is preallocated once and filled per chunk/column; there is no
+    DataFrame -> records -> DataFrame round trip.
+    """
+    chunks = _chunks(msgs)
+    if len(chunks) == 1 and isinstance(chunks[0], pd.DataFrame) and len(chunks[0]):
+        # common case: one frame, take columns as-is
+        df = chunks[0]
+        return Batch(
+            features=df[FEATURES].to_numpy(dtype=np.float32),
+            transaction_id=df[ID_COL].to_numpy(),
+            event_time=df[TIME_COL].to_numpy(),
+            meta={m: df[m].to_numpy() for m in META_COLUMNS if m in df.columns},
+        )
+
+    n = sum(len(c) for c in chunks)
+    X = np.empty((n, len(FEATURES)), dtype=np.float32)
+    ids = np.empty(n, dtype=object)
+    times = np.empty(n, dtype=object)
+    meta: Dict[str, np.ndarray] = {}
+
+    i = 0
+    for c in chunks:
+        k = len(c)
+        if k == 0:
+            continue
+        if isinstance(c, pd.DataFrame):
+            X[i:i + k] = c[FEATURES].to_numpy(dtype=np.float32, copy=False)
+            ids[i:i + k] = c[ID_COL].to_numpy()
+            times[i:i + k] = c[TIME_COL].to_numpy()
+            present = [m for m in META_COLUMNS if m in c.columns]
+            get = lambda col: c[col].to_numpy()  # noqa: E731
+        else:
+            for j, f in enumerate(FEATURES):
+                X[i:i + k, j] = np.fromiter((r[f] for r in c), dtype=np.float32, count=k)
+            ids[i:i + k] = [r[ID_COL] for r in c]
+            times[i:i + k] = [r[TIME_COL] for r in c]
+            present = [m for m in META_COLUMNS if m in c[0]]
+            get = lambda col: np.array([r.get(col) for r in c])  # noqa: E731
+        for col in present:
+            if col not in meta:
+                meta[col] = np.empty(n, dtype=object)
+            meta[col][i:i + k] = get(col)
+        i += k
+
+    # object buffers were only needed while filling; give meta columns a real dtype
+    meta = {k: pd.Series(v).infer_objects().to_numpy() for k, v in meta.items()}
+    return Batch(features=X, transaction_id=ids, event_time=times, meta=meta)
+
+
+def to_frame(msgs: Messages) -> pd.DataFrame:
+    """
+    Any accepted message shape as a DataFrame, for blocks that need all columns.
+    DataFrames are passed through as-is (no defensive copy).
+    """
+    chunks = _chunks(msgs)
+    frames = [c if isinstance(c, pd.DataFrame) else pd.DataFrame(c) for c in chunks]
+    if not frames:
+        return pd.DataFrame([])
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
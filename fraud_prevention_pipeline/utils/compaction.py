@@ -0,0 +1,296 @@
+from __future__ import annotations
+import fcntl
+import json
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import uuid4
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from utils.manifest import Manifest, entry_from_footer, remove_entry
+from utils.rolling_writer import atomic_path
+
+
+# ================================
+# Compaction of <base_dir>/<grain>/year=YYYY/month=MM[/day=DD[/hour=HH]]/*.parquet
+# ================================
+
+LOCK_NAME = ".compaction.lock"
+RETIRED_NAME = ".compaction-retired.jsonl"
+DEFAULT_SORT = ("event_time",)
+DEFAULT_GRACE_SECS = 600.0
+
+# Reader contract: the manifest (_manifest.jsonl) is the only consistent view of the
+# dataset while a compactor runs. A pass writes the merged files, then switches the
+# manifest over in one append (adds + removes), and only deletes the inputs
+# `grace_secs` later, so a reader still working from the previous manifest snapshot
+# can open every file it listed. Listing the directories instead may show merged rows
+# twice during the grace period; that's why compaction refuses to run without a manifest.
+
+
+@contextmanager
+def compaction_lock(root: Path) -> Iterator[bool]:
+    """Non-blocking exclusive lock per dataset; yields False if another compactor holds it."""
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / LOCK_NAME, "w") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def data_files(root: Path) -> List[Path]:
+    # any partition depth (see rolling_writer.GRANULARITIES); hidden names are in-flight temp files
+    return sorted(p for p in root.glob("year=*/**/*.parquet") if not p.name.startswith("."))
+
+
+def partitions(root: Path) -> List[Path]:
+    """Leaf partition directories that hold data files."""
+    return sorted({p.parent for p in data_files(root)})
+
+
+def live_files(root: Path) -> List[Path]:
+    """Files the manifest lists as live (directory listing if there is no manifest)."""
+    manifest = Manifest(root)
+    if not manifest.path.exists():
+        return data_files(root)
+    return sorted(root / p for p in manifest.live())
+
+
+# ---- inputs retired by a pass, deleted once the grace period is over ----
+#
+# A pass records its inputs and outputs here *before* it touches any file or the
+# manifest, and `delete_retired` settles each record against the manifest:
+#   input  no longer live -> the switch happened: unlink once the grace period is over
+#   input  still live     -> the pass died before the switch: forget the record
+#   output live           -> the switch happened: forget the record
+#   output not live       -> the pass died before the switch: unlink (no reader ever saw it)
+# so a crash at any point leaves nothing on disk that the manifest doesn't account for.
+
+def _read_retired(root: Path) -> List[Dict[str, object]]:
+    path = root / RETIRED_NAME
+    if not path.exists():
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.endswith("\n")]
+
+
+def _write_retired(root: Path, records: List[Dict[str, object]]):
+    with atomic_path(root / RETIRED_NAME, durable=True) as tmp:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+
+
+def delete_retired(root: Path, grace_secs: float, now: Optional[float] = None,
+                   manifest: Optional[Manifest] = None) -> List[str]:
+    """
+    Settle the retired records against the manifest (see above): unlink retired
+    inputs older than `grace_secs` and outputs of passes that never switched the
+    manifest over. Returns the unlinked paths. Run it under the compaction lock.
+    """
+    now = time.time() if now is None else now
+    retired = _read_retired(root)
+    if not retired:
+        return []
+    live = (manifest or Manifest(root)).live()
+    keep, unlink = [], []
+    for r in retired:
+        if r.get("output"):
+            if r["path"] not in live:
+                unlink.append(r)
+        elif r["path"] in live:
+            continue
+        elif now - float(r["retired_at"]) >= grace_secs:
+            unlink.append(r)
+        else:
+            keep.append(r)
+    for r in unlink:
+        (root / r["path"]).unlink(missing_ok=True)
+    if len(keep) != len(retired):
+        _write_retired(root, keep)
+    return [str(root / r["path"]) for r in unlink]
+
+
+def _sort_keys(sort_by: Sequence[str]) -> List[Tuple[str, str]]:
+    # fraud_prob sorts descending (the viewer reads the riskiest rows first), everything else ascending
+    return [(c, "descending" if c == "fraud_prob" else "ascending") for c in sort_by]
+
+
+def compact_partition(
+    part_dir: Path,
+    sort_by: Sequence[str] = DEFAULT_SORT,
+    row_group_size: int = 64_000,
+    target_file_rows: int = 1_000_000,
+    min_files: int = 2,
+    min_age_secs: float = 60.0,
+    filename_prefix: str = "compact",
+    durable: bool = True,
+    manifest: Optional[Manifest] = None,
+    logger: Optional[logging.Logger] = None,
+) -> Dict[str, object]:
+    """
+    Merge the small files of one partition into files of up to `target_file_rows`
+    rows, sorted by `sort_by`, with `row_group_size` rows per row group.
+
+    Only files the `manifest` lists as live are candidates; files younger than
+    `min_age_secs` and files that already hold `target_file_rows` rows are left
+    alone. The inputs and outputs are recorded as retired first, new files are
+    committed with a temp-file + rename, then the adds and removes are appended to
+    the manifest in a single write, so manifest readers switch over atomically.
+    The inputs are not deleted here: `delete_retired` unlinks them after the grace
+    period (or cleans up after a pass that died before the switch).
+
+    Returns
+    -------
+    dict : partition, files_in, files_out, rows, written (paths), retired (paths)
+    """
+    if manifest is None:
+        raise ValueError("compact_partition needs the dataset manifest (see the reader contract above)")
+    logger = logger or logging.getLogger("compaction")
+    root = manifest.root
+    live = set(manifest.live())
+    now = time.time()
+    candidates: List[Path] = []
+    for p in sorted(part_dir.glob("*.parquet")):
+        if p.name.startswith(".") or str(p.relative_to(root)) not in live:
+            continue  # in-flight temp files, and inputs retired by an earlier pass
+        try:
+            st = p.stat()
+            if now - st.st_mtime < min_age_secs:
+                continue
+            if pq.ParquetFile(p).metadata.num_rows >= target_file_rows:
+                continue
+        except FileNotFoundError:
+            continue
+        candidates.append(p)
+
+    result: Dict[str, object] = {"partition": str(part_dir), "files_in": len(candidates),
+                                 "files_out": 0, "rows": 0, "written": [], "retired": []}
+    if len(candidates) < min_files:
+        return result
+
+    table = pa.concat_tables([pq.read_table(p) for p in candidates], promote_options="permissive")
+    keys = [k for k in _sort_keys(sort_by) if k[0] in table.column_names]
+    if keys:
+        table = table.sort_by(keys)
+
+    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    starts = range(0, table.num_rows, target_file_rows)
+    dests = [part_dir / f"{filename_prefix}-{ts}-{uuid4().hex[:8]}.parquet" for _ in starts]
+    rel = [str(p.relative_to(root)) for p in candidates]
+    # pending until the manifest switch below; settled by delete_retired if we die before it
+    _write_retired(root, _read_retired(root)
+                   + [{"path": r, "retired_at": now} for r in rel]
+                   + [{"path": str(d.relative_to(root)), "retired_at": now, "output": True} for d in dests])
+
+    written: List[str] = []
+    for start, dest in zip(starts, dests):
+        with atomic_path(dest, durable=durable) as tmp:
+            pq.write_table(table.slice(start, target_file_rows), tmp,
+                           row_group_size=row_group_size, compression="zstd", write_statistics=True)
+        written.append(str(dest))
+
+    manifest.append([entry_from_footer(root, Path(w)) for w in written] + [remove_entry(r) for r in rel])
+
+    logger.info(f"Compacted {len(candidates)} file(s), {table.num_rows} rows -> {len(written)} file(s) in {part_dir}")
+    result.update(files_out=len(written), rows=table.num_rows, written=written,
+                  retired=[str(p) for p in candidates])
+    return result
+
+
+def compact_dataset(base_dir: str, grain: str, grace_secs: float = DEFAULT_GRACE_SECS,
+                    **kwargs) -> List[Dict[str, object]]:
+    """
+    Delete inputs retired more than `grace_secs` ago, then run `compact_partition`
+    over every partition and keep the sink manifest in step. Returns [] if another
+    compactor is running or the dataset has no manifest (the sink writes it unless
+    MAGE_SINK_MANIFEST=false; without it readers list directories and could see
+    duplicates).
+    """
+    root = Path(base_dir).expanduser().resolve() / grain
+    log = logging.getLogger("compaction")
+    with compaction_lock(root) as acquired:
+        if not acquired:
+            log.info(f"Another compaction holds {root / LOCK_NAME}; skipping")
+            return []
+        manifest = Manifest(root)
+        if not manifest.path.exists():
+            log.warning(f"No manifest at {manifest.path}; not compacting (enable MAGE_SINK_MANIFEST)")
+            return []
+        deleted = delete_retired(root, grace_secs, manifest=manifest)
+        if deleted:
+            log.info(f"Deleted {len(deleted)} retired or orphaned file(s) (grace {grace_secs:.0f}s)")
+        kwargs.setdefault("logger", log)
+        results = [compact_partition(p, manifest=manifest, **kwargs) for p in partitions(root)]
+        # snapshot the log once removes dominate, so readers' replays stay short
+        if any(r["files_out"] for r in results):
+            live = len(manifest.live())
+            if manifest.line_count() > 2 * live + 1000:
+                manifest.rewrite()
+        return results
+
+
+# ================================
+# Reporting
+# ================================
+
+def dataset_stats(root: Path) -> Dict[str, int]:
+    files = live_files(root)
+    sizes, row_groups = 0, 0
+    for p in files:
+        try:
+            sizes += p.stat().st_size
+            row_groups += pq.ParquetFile(p).metadata.num_row_groups
+        except FileNotFoundError:
+            continue
+    return {"files": len(files), "bytes": sizes, "row_groups": row_groups}
+
+
+def _timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def query_timings(root: Path, repeat: int = 3, min_prob: float = 0.5, limit: int = 50) -> Dict[str, float]:
+    """
+    Best-of-`repeat` seconds for the viewer's typical reads: a full count, and a
+    filtered top-N over the most recent day (where row-group statistics prune).
+    """
+    files = [str(p) for p in live_files(root)]
+    if not files:
+        return {}
+
+    def dataset():
+        return ds.dataset(files, format="parquet")
+
+    latest = pc.max(dataset().to_table(columns=["event_time"])["event_time"]).as_py()
+    since = (latest or datetime.now(timezone.utc)) - timedelta(days=1)
+
+    def count_all():
+        return dataset().count_rows()
+
+    def recent_top():
+        d = dataset()
+        flt = (ds.field("event_time") >= pa.scalar(since, type=d.schema.field("event_time").type)) & \
+              (ds.field("fraud_prob") >= min_prob)
+        t = d.to_table(columns=["transaction_id", "event_time", "fraud_prob"], filter=flt)
+        return t.sort_by([("fraud_prob", "descending")]).slice(0, limit)
+
+    return {
+        "count_all_secs": round(_timed(count_all, repeat), 6),
+        "recent_top_secs": round(_timed(recent_top, repeat), 6),
+    }
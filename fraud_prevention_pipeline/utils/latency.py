@@ -0,0 +1,162 @@
+from __future__ import annotations
+import atexit
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+from utils.rolling_writer import atomic_path
+
+
+# ================================
+# Per-stage latency tracing: producer -> consume -> score -> commit
+# ================================
+#
+# The producer stamps _produce_time_ms; data_cleaner adds _consume_time_ms and the
+# scoring block _score_time_ms, so every row carries its own timeline through the
+# blocks. The sink observes the commit. Histograms live in this process (the Mage
+# streaming pipeline runs all blocks in one) and are written as a Prometheus text
+# file (node_exporter textfile-collector compatible).
+
+PRODUCE_COL = "_produce_time_ms"
+CONSUME_COL = "_consume_time_ms"
+SCORE_COL = "_score_time_ms"
+TRACE_COLUMNS = (PRODUCE_COL, CONSUME_COL, SCORE_COL)
+
+# same bounds as data_synthesizer's /metrics histograms
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+STAGES = {
+    "produce_to_consume": "Producer stamp to first pipeline block (Kafka + loader batching)",
+    "consume_to_score": "Cleaning and model inference",
+    "score_to_commit": "Sink buffering until the Parquet file is committed (high-risk rows only)",
+    "produce_to_commit": "End to end: producer stamp to committed Parquet file (high-risk rows only)",
+}
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class LatencyHistogram:
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.counts = np.zeros(len(bounds) + 1, dtype=np.int64)  # last: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe_many(self, ms: np.ndarray):
+        ms = np.asarray(ms, dtype=np.float64)
+        ms = ms[np.isfinite(ms)]
+        if not len(ms):
+            return
+        idx = np.searchsorted(self.bounds, ms, side="left")
+        self.counts += np.bincount(idx, minlength=len(self.counts))
+        self.sum += float(ms.sum())
+        self.count += len(ms)
+
+    def prometheus(self, name: str, labels: str) -> list:
+        lines, cum = [], 0
+        for b, c in zip([str(int(b)) for b in self.bounds] + ["+Inf"], self.counts):
+            cum += int(c)
+            lines.append(f'{name}_bucket{{{labels},le="{b}"}} {cum}')
+        lines += [f"{name}_sum{{{labels}}} {self.sum}", f"{name}_count{{{labels}}} {self.count}"]
+        return lines
+
+
+class PipelineMetrics:
+    """
+    Process-wide latency histograms per stage, flushed to `path` at most every
+    `flush_secs` (atomically, so a scraper never reads a partial file).
+    """
+
+    def __init__(self, path: Optional[str], flush_secs: float = 5.0):
+        self.path = Path(path) if path else None
+        self.flush_secs = float(flush_secs)
+        self.stages: Dict[str, LatencyHistogram] = {s: LatencyHistogram() for s in STAGES}
+        self.rows_total: Dict[str, int] = {"consumed": 0, "scored": 0, "committed": 0}
+        self.gauges: Dict[str, float] = {}
+        self.decisions: Dict[str, int] = {}  # adaptive loader actions (utils/adaptive_batch.py)
+        self._lock = threading.Lock()
+        self._next_flush = 0.0
+
+    def observe(self, stage: str, start_ms, end_ms):
+        """Observe end - start (ms) per row; rows without a start stamp are skipped."""
+        if start_ms is None:
+            return
+        start = np.asarray(start_ms, dtype=np.float64)
+        end = np.asarray(end_ms, dtype=np.float64)
+        with self._lock:
+            self.stages[stage].observe_many(end - start)
+        self.maybe_flush()
+
+    def count(self, what: str, n: int):
+        with self._lock:
+            self.rows_total[what] += int(n)
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = float(value)
+
+    def decision(self, action: str):
+        with self._lock:
+            self.decisions[action] = self.decisions.get(action, 0) + 1
+
+    def prometheus(self) -> str:
+        lines = ["# HELP pipeline_stage_latency_ms Per-row latency between pipeline stages (ms)",
+                 "# TYPE pipeline_stage_latency_ms histogram"]
+        with self._lock:
+            for stage, h in self.stages.items():
+                lines += h.prometheus("pipeline_stage_latency_ms", f'stage="{stage}"')
+            lines.append("# TYPE pipeline_rows_total counter")
+            lines += [f'pipeline_rows_total{{stage="{k}"}} {v}' for k, v in self.rows_total.items()]
+            for name, v in self.gauges.items():
+                lines += [f"# TYPE {name} gauge", f"{name} {v}"]
+            if self.decisions:
+                lines.append("# TYPE pipeline_loader_decisions_total counter")
+                lines += [f'pipeline_loader_decisions_total{{action="{k}"}} {v}' for k, v in self.decisions.items()]
+        return "\n".join(lines) + "\n"
+
+    def maybe_flush(self, force: bool = False):
+        if self.path is None:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_flush:
+            return
+        self._next_flush = now + self.flush_secs
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        text = self.prometheus()
+        with atomic_path(self.path) as tmp:
+            tmp.write_text(text, encoding="utf-8")
+
+
+_metrics: Optional[PipelineMetrics] = None
+_metrics_lock = threading.Lock()
+
+def use_metrics_file(path: Optional[str]) -> PipelineMetrics:
+    """
+    Make `path` (None disables) the process-wide metrics file before anything calls
+    `get_metrics()`; processes other than Mage's (consumer.py) use their own file, so
+    they don't overwrite the pipeline's.
+    """
+    global _metrics
+    with _metrics_lock:
+        _metrics = PipelineMetrics(path or None, flush_secs=float(os.getenv("PIPELINE_METRICS_FLUSH_SECS", "5")))
+        atexit.register(_metrics.maybe_flush, True)
+    return _metrics
+
+def get_metrics() -> PipelineMetrics:
+    """The process-wide PipelineMetrics (PIPELINE_METRICS_PATH, PIPELINE_METRICS_FLUSH_SECS)."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                default = os.path.join(os.getenv("MAGE_EXPORT_BASE_DIR", "/var/lib/mage/data"),
+                                       "_metrics", "pipeline.prom")
+                _metrics = PipelineMetrics(
+                    os.getenv("PIPELINE_METRICS_PATH", default) or None,
+                    flush_secs=float(os.getenv("PIPELINE_METRICS_FLUSH_SECS", "5")),
+                )
+                atexit.register(_metrics.maybe_flush, True)
+    return _metrics
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+import pandas as pd
+import pyarrow.parquet as pq
+from utils.rolling_writer import atomic_path
+
+
+# ================================
+# Append-only file manifest: <base_dir>/<grain>/_manifest.jsonl
+# ================================
+#
+# One JSON object per line:
+#   {"op": "add", "path": "year=2024/month=01/part-....parquet", "rows": 1234,
+#    "min_event_time": "2024-01-03T10:00:00.000Z", "max_event_time": "...",
+#    "max_fraud_prob": 0.97, "committed_at": "..."}
+#   {"op": "remove", "path": "year=2024/month=01/part-....parquet", "committed_at": "..."}
+#
+# Paths are relative to the dataset root. Readers tail the file by byte offset and
+# only consume complete lines; a rewrite (compaction snapshot) swaps in a new inode,
+# which tells readers to start over.
+
+MANIFEST_NAME = "_manifest.jsonl"
+LOCK_NAME = ".manifest.lock"
+
+
+def _iso(ts) -> Optional[str]:
+    if ts is None or pd.isna(ts):
+        return None
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _now() -> str:
+    return _iso(datetime.now(timezone.utc))
+
+
+def entry_from_frame(rel_path: str, df: pd.DataFrame) -> Dict[str, object]:
+    """Manifest 'add' record from the rows just written (no file read)."""
+    et = pd.to_datetime(df["event_time"], errors="coerce", utc=True) if "event_time" in df.columns else None
+    fp = df["fraud_prob"] if "fraud_prob" in df.columns else None
+    return {
+        "op": "add",
+        "path": rel_path,
+        "rows": int(len(df)),
+        "min_event_time": _iso(et.min()) if et is not None else None,
+        "max_event_time": _iso(et.max()) if et is not None else None,
+        "max_fraud_prob": float(fp.max()) if fp is not None and len(fp) else None,
+        "committed_at": _now(),
+    }
+
+
+def entry_from_footer(root: Path, path: Path) -> Dict[str, object]:
+    """Manifest 'add' record from Parquet footer statistics (no data pages read)."""
+    md = pq.ParquetFile(path).metadata
+    names = md.schema.names
+    lo = hi = fmax = None
+    for i in range(md.num_row_groups):
+        rg = md.row_group(i)
+        if "event_time" in names:
+            st = rg.column(names.index("event_time")).statistics
+            if st is not None and st.has_min_max:
+                lo = st.min if lo is None else min(lo, st.min)
+                hi = st.max if hi is None else max(hi, st.max)
+        if "fraud_prob" in names:
+            st = rg.column(names.index("fraud_prob")).statistics
+            if st is not None and st.has_min_max:
+                fmax = st.max if fmax is None else max(fmax, st.max)
+    return {
+        "op": "add",
+        "path": str(path.relative_to(root)),
+        "rows": int(md.num_rows),
+        "min_event_time": _iso(lo),
+        "max_event_time": _iso(hi),
+        "max_fraud_prob": float(fmax) if fmax is not None else None,
+        "committed_at": _now(),
+    }
+
+
+def remove_entry(rel_path: str) -> Dict[str, object]:
+    return {"op": "remove", "path": rel_path, "committed_at": _now()}
+
+
+class Manifest:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path = self.root / MANIFEST_NAME
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # shared by every writer (sink, compaction, rewrite) so appends never land in a replaced file
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / LOCK_NAME, "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, records: Iterable[Dict[str, object]]):
+        """Append records in one write, so a batch (e.g. compaction adds + removes) lands together."""
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        if not data:
+            return
+        with self._locked():
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data.encode("utf-8"))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def add_frame(self, path: str, df: pd.DataFrame):
+        """`RollingParquetWriter(on_commit=...)` hook."""
+        self.append([entry_from_frame(str(Path(path).relative_to(self.root)), df)])
+
+    def live(self) -> Dict[str, Dict[str, object]]:
+        """Replay the log: path -> latest 'add' record for files not removed since."""
+        out: Dict[str, Dict[str, object]] = {}
+        if not self.path.exists():
+            return out
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # torn tail from a crashed writer
+                r = json.loads(line)
+                if r["op"] == "add":
+                    out[r["path"]] = r
+                else:
+                    out.pop(r["path"], None)
+        return out
+
+    def rewrite(self, records: Optional[List[Dict[str, object]]] = None):
+        """Replace the log with a snapshot of the live files (or `records`)."""
+        with self._locked():
+            self._rewrite(list(self.live().values()) if records is None else records)
+
+    def _rewrite(self, records: List[Dict[str, object]]):
+        with atomic_path(self.path, durable=True) as tmp:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+
+    def ensure(self, data_files: Iterable[Path]) -> bool:
+        """Create the manifest from footers if it doesn't exist yet (first run on old data)."""
+        with self._locked():
+            if self.path.exists():
+                return False
+            self._rewrite([entry_from_footer(self.root, p) for p in data_files])
+            return True
+
+    def line_count(self) -> int:
+        if not self.path.exists():
+            return 0
+        with open(self.path, "rb") as f:
+            return sum(1 for _ in f)
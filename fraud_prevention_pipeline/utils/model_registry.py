@@ -0,0 +1,165 @@
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+# ================================
+# Helpers
+# ================================
+
+def _file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_catboost(path: str):
+    from catboost import CatBoostClassifier
+
+    model = CatBoostClassifier()
+    model.load_model(path)
+    return model
+
+def _get_logger() -> logging.Logger:
+    logger = logging.getLogger("ModelRegistry")
+    if not logger.handlers:
+        h = logging.StreamHandler()
+        h.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+        logger.addHandler(h)
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+@dataclass
+class ModelStats:
+    loads: int = 0
+    swaps: int = 0
+    last_load_ms: Optional[float] = None
+    last_loaded_at: Optional[float] = None
+    last_checksum: Optional[str] = None
+    last_error: Optional[str] = None
+    load_ms_history: list = field(default_factory=list)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache for a model artifact with hot reload.
+
+    The model is deserialized once and shared by every caller of `get()`. The
+    artifact's mtime/size are polled at most every `check_interval` seconds;
+    when they change the file is checksummed and, if the content actually
+    differs, a new model is loaded off to the side and swapped in atomically
+    (readers either see the old model or the new one, never a half-loaded one).
+
+    Parameters
+    ----------
+    path : str
+        Path to the model artifact (e.g. 'ml_artifacts/catboost_fraud.cbm').
+    loader : callable
+        `loader(path) -> model`. Defaults to loading a CatBoostClassifier.
+    check_interval : float
+        Minimum seconds between stat() calls on the artifact.
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], Any] = load_catboost,
+                 check_interval: float = 5.0):
+        self.path = path
+        self.loader = loader
+        self.check_interval = float(check_interval)
+        self.stats = ModelStats()
+        self.logger = _get_logger()
+
+        self._model: Any = None
+        self._sig: Optional[tuple] = None  # (mtime_ns, size)
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if self._model is not None and now < self._next_check:
+            return self._model
+
+        with self._lock:
+            if self._model is not None and now < self._next_check:
+                return self._model
+            self._next_check = now + self.check_interval
+            try:
+                self._maybe_reload()
+            except Exception as e:
+                # Keep serving the previous model if a replacement is half-written or broken
+                self.stats.last_error = str(e)
+                if self._model is None:
+                    raise
+                self.logger.warning(f"Model reload failed, keeping current model: {e}")
+        return self._model
+
+    def _maybe_reload(self):
+        st = os.stat(self.path)
+        sig = (st.st_mtime_ns, st.st_size)
+        if self._model is not None and sig == self._sig:
+            return
+
+        checksum = _file_sha256(self.path)
+        if self._model is not None and checksum == self.stats.last_checksum:
+            self._sig = sig  # touched but unchanged
+            return
+
+        t0 = time.perf_counter()
+        model = self.loader(self.path)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+
+        swapped = self._model is not None
+        self._model = model  # single reference assignment: atomic swap
+        self._sig = sig
+
+        s = self.stats
+        s.loads += 1
+        s.swaps += int(swapped)
+        s.last_load_ms = load_ms
+        s.last_loaded_at = time.time()
+        s.last_checksum = checksum
+        s.last_error = None
+        s.load_ms_history = (s.load_ms_history + [load_ms])[-20:]
+
+        event = "swapped" if swapped else "loaded"
+        self.logger.info(
+            f"Model {event}: {self.path} sha256={checksum[:12]} in {load_ms:.1f} ms "
+            f"(loads={s.loads}, swaps={s.swaps})"
+        )
+
+    def status(self) -> Dict[str, Any]:
+        s = self.stats
+        return {
+            "path": self.path,
+            "loads": s.loads,
+            "swaps": s.swaps,
+            "last_load_ms": s.last_load_ms,
+            "last_loaded_at": s.last_loaded_at,
+            "checksum": s.last_checksum,
+            "last_error": s.last_error,
+        }
+
+
+_registries: Dict[tuple, ModelRegistry] = {}
+_registries_lock = threading.Lock()
+
+def get_registry(path: str, loader: Callable[[str], Any] = load_catboost,
+                 check_interval: Optional[float] = None) -> ModelRegistry:
+    """Return the process-wide registry for (path, loader), creating it on first use."""
+    key = (os.path.abspath(path), loader)
+    reg = _registries.get(key)
+    if reg is None:
+        with _registries_lock:
+            reg = _registries.get(key)
+            if reg is None:
+                if check_interval is None:
+                    check_interval = float(os.getenv("MODEL_RELOAD_CHECK_SECS", "5"))
+                reg = ModelRegistry(path, loader=loader, check_interval=check_interval)
+                _registries[key] = reg
+    return reg
@@ -0,0 +1,140 @@
+from __future__ import annotations
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict
+import numpy as np
+
+
+# ================================
+# Array-backed evaluator for CatBoost oblivious trees
+# ================================
+#
+# An oblivious tree of depth d applies the same split at every node of a level,
+# so its leaf index is just d bits: bit j = (x[feature_j] > border_j), with j
+# following the order of "splits" in CatBoost's JSON export. A whole batch is
+# evaluated with one comparison per level across all trees at once.
+
+@dataclass
+class CompiledOblivious:
+    """
+    features : (T, D) int32   float feature index of split j of tree t
+    borders  : (T, D) float32 split border (padding levels use +inf, i.e. bit always 0)
+    leaves   : (T * 2**D,) float64 leaf values, tree t at [t * 2**D, (t + 1) * 2**D)
+    scale, bias : raw = scale * sum(leaf values) + bias; P(class 1) = sigmoid(raw)
+    nan_as_max : (n_features,) bool, features whose NaNs compare above every border
+    """
+    features: np.ndarray
+    borders: np.ndarray
+    leaves: np.ndarray
+    scale: float
+    bias: float
+    nan_as_max: np.ndarray
+    n_features: int
+
+    @property
+    def n_trees(self) -> int:
+        return self.features.shape[0]
+
+    @property
+    def depth(self) -> int:
+        return self.features.shape[1]
+
+    def raw(self, X: np.ndarray, chunk_rows: int = 8192) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] < self.n_features:
+            raise ValueError(f"Expected a (n, {self.n_features}) matrix, got {X.shape}")
+        if np.isnan(X).any():
+            X = np.where(np.isnan(X), np.where(self.nan_as_max[: X.shape[1]], np.inf, -np.inf), X)
+            X = X.astype(np.float32, copy=False)
+
+        out = np.empty(len(X), dtype=np.float64)
+        offsets = np.arange(self.n_trees, dtype=np.int64) << self.depth
+        for start in range(0, len(X), chunk_rows):
+            # bounded (rows, trees) intermediates for 100k-row batches
+            Xc = X[start:start + chunk_rows]
+            idx = np.zeros((len(Xc), self.n_trees), dtype=np.int64)
+            for j in range(self.depth):
+                idx |= (Xc[:, self.features[:, j]] > self.borders[:, j]).astype(np.int64) << j
+            out[start:start + len(Xc)] = self.leaves[idx + offsets].sum(axis=1)
+        return self.scale * out + self.bias
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """(n, 2) like CatBoostClassifier.predict_proba, so callers can swap backends."""
+        p1 = 1.0 / (1.0 + np.exp(-self.raw(X)))
+        return np.column_stack([1.0 - p1, p1])
+
+    def save(self, path: str):
+        np.savez(path, features=self.features, borders=self.borders, leaves=self.leaves,
+                 scale=self.scale, bias=self.bias, nan_as_max=self.nan_as_max, n_features=self.n_features)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledOblivious":
+        # NpzFile keeps the archive open; read every array inside the block so hot reloads don't leak handles
+        with np.load(path) as z:
+            return cls(features=z["features"], borders=z["borders"], leaves=z["leaves"],
+                       scale=float(z["scale"]), bias=float(z["bias"]), nan_as_max=z["nan_as_max"],
+                       n_features=int(z["n_features"]))
+
+
+def compile_catboost_json(model: Dict[str, Any]) -> CompiledOblivious:
+    """Compile a CatBoost JSON export (`save_model(..., format="json")`) of a float-only binary classifier."""
+    trees = model["oblivious_trees"]
+    if not trees:
+        raise ValueError("Model has no oblivious trees")
+    depth = max(len(t["splits"]) for t in trees)
+    n_trees = len(trees)
+
+    features = np.zeros((n_trees, depth), dtype=np.int32)
+    borders = np.full((n_trees, depth), np.inf, dtype=np.float32)
+    leaves = np.zeros(n_trees << depth, dtype=np.float64)
+    for t, tree in enumerate(trees):
+        splits = tree["splits"]
+        for j, s in enumerate(splits):
+            if s.get("split_type", "FloatFeature") != "FloatFeature":
+                raise ValueError(f"Unsupported split type {s.get('split_type')!r}: only float features compile")
+            features[t, j] = s["float_feature_index"]
+            borders[t, j] = s["border"]
+        values = np.asarray(tree["leaf_values"], dtype=np.float64)
+        if len(values) != 1 << len(splits):
+            raise ValueError("Only single-dimension (binary) models are supported")
+        # padding levels never set their bit, so the tree's own leaves sit at the front
+        leaves[(t << depth):(t << depth) + len(values)] = values
+
+    float_info = model.get("features_info", {}).get("float_features", [])
+    n_features = max([f["flat_feature_index"] for f in float_info] + [int(features.max())]) + 1
+    nan_as_max = np.zeros(n_features, dtype=bool)
+    for f in float_info:
+        nan_as_max[f["flat_feature_index"]] = f.get("nan_value_treatment") == "AsTrue"
+
+    scale, bias = model.get("scale_and_bias", [1.0, [0.0]])
+    bias = bias[0] if isinstance(bias, list) else bias
+    return CompiledOblivious(features=features, borders=borders, leaves=leaves, scale=float(scale),
+                             bias=float(bias), nan_as_max=nan_as_max, n_features=n_features)
+
+
+def compile_cbm(path: str) -> CompiledOblivious:
+    """Export a .cbm to JSON through CatBoost and compile it."""
+    from catboost import CatBoostClassifier
+
+    model = CatBoostClassifier()
+    model.load_model(path)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "model.json")
+        model.save_model(json_path, format="json")
+        with open(json_path, "r", encoding="utf-8") as f:
+            return compile_catboost_json(json.load(f))
+
+
+def load_compiled(path: str) -> CompiledOblivious:
+    """
+    `ModelRegistry` loader: a compiled .npz is loaded as-is; a .cbm (or .json)
+    is compiled on load, so hot reload keeps working on the original artifact.
+    """
+    if path.endswith(".npz"):
+        return CompiledOblivious.load(path)
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return compile_catboost_json(json.load(f))
+    return compile_cbm(path)
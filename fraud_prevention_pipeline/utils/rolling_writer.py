@@ -0,0 +1,235 @@
+from __future__ import annotations
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+import pandas as pd
+
+
+# ================================
+# Helpers
+# ================================
+
+# Hive-style partition levels per granularity: <root>/year=YYYY/month=MM[/day=DD[/hour=HH]]
+GRANULARITIES = {
+    "month": ("year", "month"),
+    "day": ("year", "month", "day"),
+    "hour": ("year", "month", "day", "hour"),
+}
+
+
+def partition_keys(df: pd.DataFrame, datetime_col: str = "event_time",
+                   granularity: str = "month") -> Tuple[pd.DataFrame, List[pd.Series]]:
+    """
+    (df, [year, month, ...]) with int32 keys derived from `datetime_col`, one per
+    level of `granularity`. Rows whose timestamp can't be parsed are dropped;
+    `df` is not copied otherwise.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown partition granularity '{granularity}'; expected one of {list(GRANULARITIES)}")
+    if datetime_col not in df.columns:
+        raise ValueError(f"Missing datetime column '{datetime_col}' to partition by.")
+    dt = pd.to_datetime(df[datetime_col], errors="coerce", utc=True)
+    valid = dt.notna()
+    if not valid.all():
+        df, dt = df[valid], dt[valid]
+    return df, [getattr(dt.dt, level).astype("int32") for level in GRANULARITIES[granularity]]
+
+
+def partition_path(key: Tuple[int, ...], granularity: str = "month") -> str:
+    """'year=2024/month=01/day=05' for key (2024, 1, 5) at 'day' granularity."""
+    return "/".join(
+        f"{level}={v}" if level == "year" else f"{level}={v:02d}"
+        for level, v in zip(GRANULARITIES[granularity], key)
+    )
+
+
+@contextmanager
+def atomic_path(dest_path: Path, durable: bool = False) -> Iterator[Path]:
+    """
+    Yield a hidden temp path next to `dest_path`; once the body has written it,
+    rename it into place. Readers globbing '*.parquet' only ever see complete
+    files. With `durable=True` the data and the rename are fsync'ed.
+    """
+    tmp = dest_path.with_name(f".{dest_path.name}.{uuid4().hex[:6]}.tmp")
+    try:
+        yield tmp
+        if durable:
+            with open(tmp, "rb") as f:
+                os.fsync(f.fileno())
+        os.replace(tmp, dest_path)
+        if durable:
+            dir_fd = os.open(dest_path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def commit_parquet(df: pd.DataFrame, dest_path: Path, durable: bool = False) -> None:
+    """Crash-safe `df.to_parquet(dest_path)` (see `atomic_path`)."""
+    with atomic_path(dest_path, durable=durable) as tmp:
+        df.to_parquet(tmp, engine="pyarrow", index=False)
+
+
+@dataclass
+class _Buffer:
+    frames: List[pd.DataFrame] = field(default_factory=list)
+    rows: int = 0
+    nbytes: int = 0
+    opened_at: float = field(default_factory=time.monotonic)
+
+
+class RollingParquetWriter:
+    """
+    Buffers rows per <grain>/year=YYYY/month=MM[/day=DD[/hour=HH]] partition and
+    commits one Parquet file per partition when the buffer reaches `max_rows`,
+    `max_bytes` or `max_age_secs` (the latter bounds how stale the files can be; a
+    background thread enforces it even when no new rows arrive).
+    Everything left is flushed on `close()` / interpreter exit.
+
+    Parameters
+    ----------
+    base_dir, grain : str
+        Files land under <base_dir>/<grain>/<partition_path>/.
+    granularity : str
+        'month' (default), 'day' or 'hour'; finer partitions let readers skip
+        more directories for narrow time windows.
+    filename_prefix : str
+        Committed files are named '<prefix>-<UTC ts>-<uuid8>.parquet'.
+    durable : bool
+        fsync each committed file (e.g. before committing Kafka offsets).
+    on_commit : callable
+        `on_commit(path, df)` after each file is in place.
+    """
+
+    def __init__(self, base_dir: str, grain: str, filename_prefix: str = "part",
+                 max_rows: int = 100_000, max_bytes: int = 64 * 1024 * 1024,
+                 max_age_secs: float = 30.0, datetime_col: str = "event_time",
+                 granularity: str = "month",
+                 durable: bool = False,
+                 on_commit: Optional[Callable[[str, pd.DataFrame], None]] = None,
+                 logger: Optional[logging.Logger] = None,
+                 background: bool = True):
+        self.root = Path(base_dir).expanduser().resolve() / grain
+        self.filename_prefix = filename_prefix
+        self.max_rows = int(max_rows)
+        self.max_bytes = int(max_bytes)
+        self.max_age_secs = float(max_age_secs)
+        self.datetime_col = datetime_col
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown partition granularity '{granularity}'; expected one of {list(GRANULARITIES)}")
+        self.granularity = granularity
+        self.durable = durable
+        self.on_commit = on_commit
+        self.logger = logger or logging.getLogger("RollingParquetWriter")
+
+        self.files_committed = 0
+        self.rows_committed = 0
+
+        self._buffers: Dict[Tuple[int, ...], _Buffer] = {}
+        self._lock = threading.RLock()
+        self._closed = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if background and self.max_age_secs > 0:
+            self._thread = threading.Thread(target=self._age_loop, name="parquet-roller", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, df: pd.DataFrame) -> List[str]:
+        """Buffer `df`; returns the files committed as a consequence (if any)."""
+        if df.empty:
+            return []
+        df, keys = partition_keys(df, self.datetime_col, self.granularity)
+        with self._lock:
+            # buffer every partition first, so a failed flush can't lose the rest of `df`
+            full = []
+            for key, part in df.groupby(keys, sort=True):
+                key = tuple(int(k) for k in key)
+                buf = self._buffers.setdefault(key, _Buffer())
+                buf.frames.append(part)
+                buf.rows += len(part)
+                buf.nbytes += int(part.memory_usage(index=False, deep=True).sum())
+                if buf.rows >= self.max_rows or buf.nbytes >= self.max_bytes:
+                    full.append(key)
+            now = time.monotonic()
+            due = [k for k, b in self._buffers.items() if k not in full and now - b.opened_at >= self.max_age_secs]
+            return self._flush_keys(full + due)
+
+    def flush_due(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return self._flush_keys([k for k, b in self._buffers.items() if now - b.opened_at >= self.max_age_secs])
+
+    def flush(self) -> List[str]:
+        with self._lock:
+            return self._flush_keys(list(self._buffers))
+
+    def close(self):
+        if self._closed:
+            return
+        self._stop.set()
+        self.flush()
+        self._closed = True
+
+    def pending_rows(self) -> int:
+        with self._lock:
+            return sum(b.rows for b in self._buffers.values())
+
+    def _flush_keys(self, keys: List[Tuple[int, ...]]) -> List[str]:
+        # each partition on its own: one failing directory doesn't hold back the others.
+        # A failed partition keeps its buffer; the first error is re-raised after the loop.
+        committed, error = [], None
+        for key in keys:
+            try:
+                committed.append(self._flush_key(key))
+            except Exception as e:
+                self.logger.error(f"Flush of {partition_path(key, self.granularity)} failed "
+                                  f"({self._buffers[key].rows} rows kept for retry): {e}")
+                error = error or e
+        if error is not None:
+            raise error
+        return committed
+
+    def _flush_key(self, key: Tuple[int, ...]) -> str:
+        buf = self._buffers[key]
+        dest_dir = self.root / partition_path(key, self.granularity)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+
+        ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        dest = dest_dir / f"{self.filename_prefix}-{ts}-{uuid4().hex[:8]}.parquet"
+        out = pd.concat(buf.frames, ignore_index=True) if len(buf.frames) > 1 else buf.frames[0].reset_index(drop=True)
+        commit_parquet(out, dest, durable=self.durable)
+
+        self.logger.info(f"Committed {len(out)} rows to {dest}")
+        if self.on_commit:
+            try:
+                self.on_commit(str(dest), out)
+            except Exception:
+                # the rows stay buffered and the retry writes a new file: drop this one so it
+                # can't live on outside the manifest (globbing readers would count it twice)
+                dest.unlink(missing_ok=True)
+                raise
+        del self._buffers[key]  # only once the rows are on disk and acknowledged
+        self.files_committed += 1
+        self.rows_committed += len(out)
+        return str(dest)
+
+    def _age_loop(self):
+        interval = max(0.5, min(self.max_age_secs / 2, 5.0))
+        while not self._stop.wait(interval):
+            try:
+                self.flush_due()
+            except Exception as e:  # failed partitions keep their rows; the next write/flush retries
+                self.logger.error(f"Background flush failed: {e}")
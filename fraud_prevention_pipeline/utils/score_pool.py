@@ -0,0 +1,42 @@
+from __future__ import annotations
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.model_registry import load_catboost
+from utils.oblivious import load_compiled
+
+
+# ================================
+# Process pool scoring (backfill.py, consumer.py)
+# ================================
+#
+# Each worker process loads the model once in its initializer; callers only ship
+# the float32 feature matrix (FEATURES order) and get P(fraud) back.
+
+MODEL_BACKENDS = {"catboost": load_catboost, "compiled": load_compiled}
+
+_predict = None
+
+
+def init_worker(model_path: str, backend: str, threads: int):
+    global _predict
+    model = MODEL_BACKENDS[backend](model_path)
+    if backend == "catboost":
+        # N workers x all cores would oversubscribe the CPU
+        _predict = lambda X: model.predict_proba(X, thread_count=threads)[:, 1]  # noqa: E731
+    else:
+        _predict = lambda X: model.predict_proba(X)[:, 1]  # noqa: E731
+
+
+def score(X: np.ndarray) -> np.ndarray:
+    """P(fraud) per row of X, in a pool worker."""
+    return _predict(X)
+
+
+def make_pool(model_path: str, backend: str = "catboost", workers: int | None = None,
+              threads_per_worker: int = 1) -> ProcessPoolExecutor:
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"backend must be one of {list(MODEL_BACKENDS)}, got '{backend}'")
+    ctx = multiprocessing.get_context("spawn")  # don't fork the writer/registry threads
+    return ProcessPoolExecutor(max_workers=workers or multiprocessing.cpu_count(), mp_context=ctx,
+                               initializer=init_worker, initargs=(model_path, backend, threads_per_worker))
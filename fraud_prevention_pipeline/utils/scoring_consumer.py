@@ -0,0 +1,262 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from utils.batch import ID_COL, TIME_COL, normalize_batch
+from utils.compaction import data_files
+from utils.latency import CONSUME_COL, PRODUCE_COL, SCORE_COL, get_metrics, now_ms
+from utils.manifest import Manifest
+from utils.rolling_writer import RollingParquetWriter
+from utils.score_pool import make_pool, score
+
+
+# ================================
+# Standalone Kafka scoring consumer (aiokafka)
+# ================================
+#
+# One fetch loop pulls large batches with getmany() and hands each partition's records
+# to that partition's worker task (bounded queue, so a slow partition throttles the
+# fetches). Workers decode the raw values, score them in a process pool and write the
+# high-risk rows with RollingParquetWriter(durable=True). Every `commit_secs` the offsets
+# of everything already handed to the writer are snapshotted, the writer is flushed
+# (fsync'ed) and only then are those offsets committed: a crash can replay rows, never
+# lose them. Run more processes with the same group id to spread partitions further.
+
+
+def _aiokafka():
+    try:
+        import aiokafka
+    except ImportError as e:
+        raise RuntimeError(
+            "consumer.py needs aiokafka: pip install 'fraud-prevention-pipeline[consumer]'"
+        ) from e
+    return aiokafka
+
+
+def high_risk_frame(batch, fraud_prob: np.ndarray, consumed: int, scored: int,
+                    min_prob: float) -> pd.DataFrame:
+    """Rows above `min_prob`, shaped like compute_fraud_risk_score's output (trace stamps included)."""
+    keep = fraud_prob > min_prob
+    out = pd.DataFrame({
+        ID_COL: batch.transaction_id[keep],
+        TIME_COL: pd.to_datetime(pd.Series(batch.event_time[keep]), errors="coerce"),
+        "fraud_prob": fraud_prob[keep],
+    })
+    if PRODUCE_COL in batch.meta:
+        out[PRODUCE_COL] = batch.meta[PRODUCE_COL][keep]
+    out[CONSUME_COL] = consumed
+    out[SCORE_COL] = scored
+    return out
+
+
+class ScoringConsumer:
+    """
+    Parameters
+    ----------
+    bootstrap, topic, group_id : str
+        Kafka connection; offsets are committed manually for `group_id`.
+    max_records : int
+        Upper bound of one getmany() call (all partitions together).
+    commit_secs : float
+        Flush + offset commit interval; also bounds how late rows show up in Parquet.
+    max_commit_failures : int
+        Consecutive failed flush/commit rounds after which `run()` raises.
+    workers : int
+        Scoring processes (default: CPU count), each holding the model.
+    queue_batches : int
+        Fetched batches buffered per partition before the fetch loop waits.
+    """
+
+    def __init__(self, bootstrap: str, topic: str, group_id: str, base_dir: str, grain: str,
+                 model_path: str, backend: str = "catboost", workers: Optional[int] = None,
+                 threads_per_worker: int = 1, max_records: int = 5000, fetch_timeout_ms: int = 200,
+                 commit_secs: float = 5.0, queue_batches: int = 4, min_prob: float = 0.2,
+                 granularity: str = "month", roll_rows: int = 100_000, auto_offset_reset: str = "latest",
+                 write_manifest: bool = True, max_commit_failures: int = 3,
+                 logger: Optional[logging.Logger] = None):
+        self.bootstrap = bootstrap
+        self.topic = topic
+        self.group_id = group_id
+        self.max_records = int(max_records)
+        self.fetch_timeout_ms = int(fetch_timeout_ms)
+        self.commit_secs = float(commit_secs)
+        self.max_commit_failures = max(1, int(max_commit_failures))
+        self.queue_batches = int(queue_batches)
+        self.min_prob = float(min_prob)
+        self.auto_offset_reset = auto_offset_reset
+        self.logger = logger or logging.getLogger("ScoringConsumer")
+        self.model_path, self.backend = model_path, backend
+        self.workers, self.threads_per_worker = workers, threads_per_worker
+
+        root = Path(base_dir).expanduser().resolve() / grain
+        self.manifest = None
+        if write_manifest:
+            self.manifest = Manifest(root)
+            self.manifest.ensure(data_files(root))
+        # no age-based rolling: the commit loop flushes every commit_secs
+        self.writer = RollingParquetWriter(
+            base_dir, grain, filename_prefix="consumer", max_rows=roll_rows, max_age_secs=float("inf"),
+            granularity=granularity, durable=True, on_commit=self._on_commit, logger=self.logger,
+            background=False,
+        )
+
+        self._consumer = None
+        self._pool = None
+        self._queues: Dict[object, asyncio.Queue] = {}
+        self._tasks: Dict[object, asyncio.Task] = {}
+        self._processed: Dict[object, int] = {}  # tp -> next offset to commit (rows handed to the writer)
+        self._commit_lock = asyncio.Lock()
+        self._failed: Optional[BaseException] = None
+        self.stats = {"records": 0, "batches": 0, "rows_written": 0, "commits": 0}
+
+    # ---- writer hook ----
+    def _on_commit(self, path: str, df: pd.DataFrame):
+        if self.manifest is not None:
+            self.manifest.add_frame(path, df)
+        committed = now_ms()
+        metrics = get_metrics()
+        metrics.count("committed", len(df))
+        for stage, col in (("score_to_commit", SCORE_COL), ("produce_to_commit", PRODUCE_COL)):
+            if col in df.columns:
+                metrics.observe(stage, df[col].to_numpy(), committed)
+
+    # ---- partition workers ----
+    def _start_workers(self, partitions):
+        for tp in partitions:
+            if tp not in self._tasks:
+                self._queues[tp] = asyncio.Queue(maxsize=self.queue_batches)
+                task = asyncio.create_task(self._work(tp, self._queues[tp]), name=f"score-{tp.partition}")
+                task.add_done_callback(self._worker_done)
+                self._tasks[tp] = task
+
+    async def _stop_workers(self, partitions):
+        for tp in partitions:
+            q, task = self._queues.pop(tp, None), self._tasks.pop(tp, None)
+            if q is not None and not task.done():
+                await q.join()  # score and hand over what was already fetched
+            if task is not None:
+                task.cancel()
+            self._processed.pop(tp, None)
+
+    def _worker_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None and self._failed is None:
+            self._failed = task.exception()
+            self.logger.error(f"Partition worker {task.get_name()} failed: {self._failed}")
+
+    async def _hand_over(self, tp, records):
+        # a full queue throttles fetching; stop waiting if a worker died
+        while self._failed is None:
+            try:
+                await asyncio.wait_for(self._queues[tp].put(records), timeout=1.0)
+                return
+            except asyncio.TimeoutError:
+                continue
+        raise self._failed
+
+    async def _work(self, tp, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        metrics = get_metrics()
+        while True:
+            records = await queue.get()
+            try:
+                batch = normalize_batch([r.value for r in records])
+                consumed = now_ms()
+                metrics.count("consumed", len(batch))
+                metrics.observe("produce_to_consume", batch.meta.get(PRODUCE_COL), consumed)
+
+                prob = await loop.run_in_executor(self._pool, score, batch.features)
+                scored = now_ms()
+                metrics.count("scored", len(batch))
+                metrics.observe("consume_to_score", consumed, np.full(len(batch), scored))
+
+                out = high_risk_frame(batch, prob, consumed, scored, self.min_prob)
+                await loop.run_in_executor(None, self.writer.write, out)
+                # only now are these offsets covered by the next flush
+                self._processed[tp] = records[-1].offset + 1
+                self.stats["batches"] += 1
+                self.stats["records"] += len(records)
+                self.stats["rows_written"] += len(out)
+            finally:
+                queue.task_done()
+
+    # ---- commits ----
+    async def commit(self):
+        """Flush the writer durably, then commit the offsets whose rows it held."""
+        async with self._commit_lock:
+            offsets = dict(self._processed)
+            if not offsets:
+                return
+            await asyncio.get_running_loop().run_in_executor(None, self.writer.flush)
+            await self._consumer.commit(offsets)
+            self.stats["commits"] += 1
+
+    async def _commit_loop(self):
+        # a failed flush/commit is retried on the next tick (rows stay buffered, offsets
+        # uncommitted); after `max_commit_failures` in a row the consumer fails
+        failures = 0
+        while True:
+            await asyncio.sleep(self.commit_secs)
+            try:
+                await self.commit()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                self.logger.error(f"Commit failed ({failures}/{self.max_commit_failures}): {e}")
+                if failures >= self.max_commit_failures:
+                    raise
+
+    # ---- main loop ----
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        aiokafka = _aiokafka()
+        owner = self
+
+        class Rebalance(aiokafka.ConsumerRebalanceListener):
+            async def on_partitions_revoked(self, revoked):
+                # finish and commit what was fetched before another member takes over
+                await asyncio.gather(*(owner._queues[tp].join() for tp in revoked if tp in owner._queues))
+                await owner.commit()
+                await owner._stop_workers(revoked)
+
+            async def on_partitions_assigned(self, assigned):
+                owner._start_workers(assigned)
+
+        self._consumer = aiokafka.AIOKafkaConsumer(
+            bootstrap_servers=self.bootstrap,
+            group_id=self.group_id,
+            enable_auto_commit=False,
+            auto_offset_reset=self.auto_offset_reset,
+            max_partition_fetch_bytes=8 * 1024 * 1024,
+            fetch_max_bytes=64 * 1024 * 1024,
+        )
+        self._consumer.subscribe([self.topic], listener=Rebalance())
+        self._pool = make_pool(self.model_path, self.backend, self.workers, self.threads_per_worker)
+        stop = stop or asyncio.Event()
+        await self._consumer.start()
+        committer = asyncio.create_task(self._commit_loop())
+        t0 = time.perf_counter()
+        try:
+            while not stop.is_set():
+                if self._failed is not None:
+                    raise self._failed
+                if committer.done():  # gave up after repeated commit failures
+                    raise committer.exception() or RuntimeError("commit loop stopped")
+                data = await self._consumer.getmany(timeout_ms=self.fetch_timeout_ms, max_records=self.max_records)
+                assigned = self._consumer.assignment()
+                for tp, records in data.items():
+                    if records and tp in assigned:  # skip leftovers of a partition revoked meanwhile
+                        self._start_workers([tp])
+                        await self._hand_over(tp, records)
+            # drain and commit on a clean stop
+            await asyncio.gather(*(q.join() for q in self._queues.values()))
+            await self.commit()
+        finally:
+            committer.cancel()
+            await self._stop_workers(list(self._tasks))
+            await self._consumer.stop()
+            self._pool.shutdown(wait=True)
+            secs = time.perf_counter() - t0
+            self.logger.info(f"Stopped after {secs:.1f}s: {self.stats}")
@@ -0,0 +1,42 @@
+from __future__ import annotations
+import threading
+from typing import Callable, List
+
+
+# ================================
+# Offset commits that wait for the sink
+# ================================
+#
+# In the Mage stream pipeline the loader, the transformers and the sink run in one
+# process, and the sink buffers rows (RollingParquetWriter) for up to MAGE_SINK_ROLL_SECS.
+# A source that owns its Kafka offsets calls `flush_sinks()` right before committing,
+# so a committed offset never runs ahead of the rows on disk. Sinks that buffer register
+# their flush with `register_sink_flush`.
+
+_lock = threading.Lock()
+_flushes: List[Callable[[], object]] = []
+
+
+def register_sink_flush(flush: Callable[[], object]) -> None:
+    with _lock:
+        _flushes.append(flush)
+
+
+def unregister_sink_flush(flush: Callable[[], object]) -> None:
+    with _lock:
+        if flush in _flushes:
+            _flushes.remove(flush)
+
+
+def flush_sinks() -> None:
+    """Flush every registered sink; raises (after trying all of them) if any flush failed."""
+    with _lock:
+        flushes = list(_flushes)
+    error = None
+    for flush in flushes:
+        try:
+            flush()
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import json
+from typing import Dict, List, Sequence
+import numpy as np
+import pandas as pd
+
+
+# ================================
+# Wire formats produced by data_synthesizer (services/encoding.py)
+# ================================
+
+FEATURES = [
+    'V1','V2','V3','V4','V5','V6','V7','V8','V9','V10',
+    'V11','V12','V13','V14','V15','V16','V17','V18','V19','V20',
+    'V21','V22','V23','V24','V25','V26','V27','V28','Amount'
+]
+
+# _schema_version 4: fixed-layout little-endian record, one per Kafka message.
+# Must stay byte-for-byte identical to data_synthesizer's BINARY_DTYPE.
+# Version 2 is the same record without the trailing card_id (older producers).
+BINARY_MAGIC = b"FT"
+BINARY_SCHEMA_VERSION = 4
+_BINARY_V2_FIELDS = [
+    ("magic", "S2"),
+    ("version", "u1"),
+    ("Class", "u1"),
+    ("transaction_id", "u1", (16,)),
+    ("event_time_ms", "<i8"),
+    ("produce_time_ms", "<i8"),
+    ("features", "<f4", (len(FEATURES),)),
+]
+BINARY_DTYPE = np.dtype(_BINARY_V2_FIELDS + [("card_id", "<u4")])
+BINARY_DTYPES = {2: np.dtype(_BINARY_V2_FIELDS), BINARY_SCHEMA_VERSION: BINARY_DTYPE}
+
+
+# _schema_version 3: each message is an Arrow IPC stream with one record batch of many rows.
+# IPC streams start with the 0xFFFFFFFF continuation marker.
+ARROW_SCHEMA_VERSION = 3
+ARROW_MAGIC = b"\xff\xff\xff\xff"
+
+
+def is_arrow(msg) -> bool:
+    return isinstance(msg, (bytes, bytearray, memoryview)) and bytes(msg[:4]) == ARROW_MAGIC
+
+
+def is_binary(msg) -> bool:
+    return isinstance(msg, (bytes, bytearray, memoryview)) and bytes(msg[:2]) == BINARY_MAGIC
+
+
+def _decode_records(payloads: Sequence[bytes], version: int) -> Dict[str, np.ndarray]:
+    dtype = BINARY_DTYPES[version]
+    rec = np.frombuffer(b"".join(payloads), dtype=dtype)
+    if len(rec) != len(payloads):
+        raise ValueError(f"Binary _schema_version {version} payloads have an unexpected size; "
+                         f"expected {dtype.itemsize} bytes per message")
+    if (rec["magic"] != BINARY_MAGIC).any() or (rec["version"] != version).any():
+        raise ValueError(f"Corrupt binary _schema_version {version} payloads")
+
+    n = len(rec)
+    hex_ids = np.frombuffer(rec["transaction_id"].tobytes().hex().encode("ascii"), dtype="S32")
+    feats = rec["features"]
+
+    cols: Dict[str, np.ndarray] = {
+        "transaction_id": hex_ids.astype(str),
+        "event_time": pd.to_datetime(rec["event_time_ms"], unit="ms", utc=True),
+        "event_time_ms": rec["event_time_ms"].copy(),
+    }
+    for i, name in enumerate(FEATURES):
+        cols[name] = feats[:, i]
+    cols["Class"] = rec["Class"].astype(np.int64)
+    if "card_id" in dtype.names:
+        cols["card_id"] = rec["card_id"].astype(np.int64)
+    cols["_schema_version"] = np.full(n, version, dtype=np.int64)
+    cols["_produce_time_ms"] = rec["produce_time_ms"].copy()
+    return cols
+
+
+def decode_binary(payloads: Sequence[bytes]) -> pd.DataFrame:
+    """
+    Decode binary payloads straight into columns (no per-row dicts).
+
+    Returns
+    -------
+    DataFrame : transaction_id, event_time (UTC datetime64), event_time_ms,
+        FEATURES (float32), Class, card_id (version 4; missing for version 2),
+        _schema_version, _produce_time_ms
+    """
+    by_version: Dict[int, List[bytes]] = {}
+    for p in payloads:
+        by_version.setdefault(p[2] if len(p) > 2 else -1, []).append(p)
+    unknown = sorted(set(by_version) - set(BINARY_DTYPES))
+    if unknown:
+        raise ValueError(f"Unsupported binary _schema_version(s): {unknown}")
+    frames = [pd.DataFrame(_decode_records(ps, v)) for v, ps in sorted(by_version.items())]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def decode_arrow(payloads: Sequence[bytes]) -> pd.DataFrame:
+    """Concatenate Arrow IPC messages into one frame (columnar end to end)."""
+    import pyarrow as pa
+
+    tables = []
+    for p in payloads:
+        t = pa.ipc.open_stream(pa.py_buffer(p)).read_all()
+        meta = t.schema.metadata or {}
+        version = int(meta.get(b"_schema_version", b"0"))
+        if version != ARROW_SCHEMA_VERSION:
+            raise ValueError(f"Unsupported arrow _schema_version: {version}")
+        tables.append(t.replace_schema_metadata(None))
+    df = pa.concat_tables(tables).to_pandas()
+    df["_schema_version"] = ARROW_SCHEMA_VERSION
+    return df
+
+
+def decode_messages(messages: List) -> pd.DataFrame:
+    """
+    Turn raw Kafka values into a DataFrame, whatever the wire format.
+
+    Accepts already-deserialized dicts (JSON serde), or raw values (RAW_VALUE
+    serde): JSON bytes, binary records or Arrow record batches. Binary and
+    Arrow messages are decoded columnar; a mixed batch (e.g. while producers
+    switch WIRE_FORMAT) is decoded per format and concatenated.
+    """
+    if not messages:
+        return pd.DataFrame([])
+
+    binary, arrow, rows = [], [], []
+    for m in messages:
+        if is_binary(m):
+            binary.append(m)
+        elif is_arrow(m):
+            arrow.append(m)
+        else:
+            rows.append(json.loads(m) if isinstance(m, (bytes, bytearray, str)) else m)
+
+    frames = []
+    if rows:
+        frames.append(pd.DataFrame(rows))
+    if binary:
+        frames.append(decode_binary(binary))
+    if arrow:
+        frames.append(decode_arrow(arrow))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
@@ -1,15 +1,18 @@
 import os
 from pathlib import Path
-import duckdb
 import pandas as pd
 import streamlit as st
 from datetime import datetime, timezone
 import time
+from store import ParquetSource, RiskStore
 
 # Config (env) 
 DATA_ROOT = Path(os.getenv("DATA_ROOT", "/var/lib/mage/data"))
 GRAIN = os.getenv("GRAIN", "fraud_high_risk")  # folder name created by our sink
 DEFAULT_LIMIT = int(os.getenv("DEFAULT_LIMIT", "50"))
+DB_PATH = os.getenv("VIEWER_DB_PATH", ":memory:")  # a file path keeps the store across restarts
+SOURCE = os.getenv("VIEWER_SOURCE", "store")  # store | parquet
+PARTITION_GRANULARITY = os.getenv("PARTITION_GRANULARITY", "month")  # must match the sink
 
 st.set_page_config(page_title="Transactions with High-Risk of fraud", layout="wide")
 st.title("Transactions with Higher Risk (of Fraud)")
@@ -26,31 +29,25 @@ with c3:
     if st.button("Refresh now"):
         st.rerun()
 
-# DuckDB + Parquet view 
-con = duckdb.connect(database=":memory:")
-con.execute("PRAGMA disable_object_cache;")  # ensure new/updated parquet files are not cached
+# DuckDB store: one per server process, refreshed incrementally on each rerun.
+# VIEWER_SOURCE=parquet queries the files directly instead, pruned to the selected partitions.
+@st.cache_resource
+def get_store(root: str, source: str, db_path: str, granularity: str):
+    if source == "parquet":
+        return ParquetSource(Path(root), granularity=granularity)
+    return RiskStore(Path(root), db_path=db_path)
 
-pattern = str(DATA_ROOT / GRAIN / "year=*" / "month=*" / "*.parquet")
-
-# Create a stable view that exposes the 3 columns we care about.
-# If event_time is string in files, cast it; if it’s already TIMESTAMP, try_cast is a no-op.
-con.execute(f"""
-CREATE OR REPLACE VIEW fraud AS
-SELECT
-  try_cast(event_time AS TIMESTAMP) AS event_time,
-  transaction_id,
-  fraud_prob
-FROM read_parquet('{pattern}', hive_partitioning=true)
-""")
+store = get_store(str(DATA_ROOT / GRAIN), SOURCE, DB_PATH, PARTITION_GRANULARITY)
+refresh_info = store.refresh()
+pattern = store.pattern
 
 # UI: filters 
-stats = con.sql("SELECT min(event_time) AS min_ts, max(event_time) AS max_ts, count(*) AS n FROM fraud").df()
-if stats["n"].iloc[0] == 0 or pd.isna(stats["min_ts"].iloc[0]):
+if store.n_rows == 0 or store.min_ts is None:
     st.warning(f"No data found under: {pattern}")
     st.stop()
 
-min_ts = pd.to_datetime(stats["min_ts"].iloc[0])
-max_ts = pd.to_datetime(stats["max_ts"].iloc[0])
+min_ts = store.min_ts
+max_ts = store.max_ts
 
 # KPI tiles (total rows + latest event time) 
 def _pretty_delta(ts: pd.Timestamp | None) -> str:
@@ -73,8 +70,8 @@ def _pretty_delta(ts: pd.Timestamp | None) -> str:
     days = hours // 24
     return f"{days}d ago"
 
-_total_cases = int(stats["n"].iloc[0])
-_latest_ts = pd.to_datetime(stats["max_ts"].iloc[0])
+_total_cases = store.n_rows
+_latest_ts = store.max_ts
 
 kpi1, kpi2 = st.columns(2)
 kpi1.metric("Cases in data", f"{_total_cases:,}")
@@ -109,12 +106,19 @@ ORDER BY fraud_prob DESC, event_time DESC NULLS LAST
 LIMIT ?
 """
 
-df = con.execute(
+df = store.query(
     query,
     [pd.Timestamp(date_from), date_to_exclusive, float(min_prob), search_tid, search_tid, int(limit)],
-).df()
+    date_from=date_from,
+    date_to=date_to,
+    min_prob=float(min_prob),
+)
 
-st.caption(f"Root: `{DATA_ROOT}` | Grain: `{GRAIN}` | Pattern: `{pattern}`")
+st.caption(
+    f"Root: `{DATA_ROOT}` | Grain: `{GRAIN}` | Pattern: `{pattern}` | "
+    f"Files: {len(store.files):,} (+{refresh_info['files_added']}/-{refresh_info['files_removed']}, "
+    f"{refresh_info['secs'] * 1000:.0f} ms)"
+)
 st.dataframe(
     df,
     width="stretch",
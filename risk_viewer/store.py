@@ -0,0 +1,443 @@
+import glob
+import json
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import duckdb
+import pandas as pd
+
+
+# Local DuckDB copy of the sink's Parquet output, refreshed incrementally.
+# `files` is the manifest of ingested files; rows keep their `source_file` so a
+# file that disappears (compaction) can be retracted and its replacement ingested.
+
+# Partition levels written by the sink (PARTITION_GRANULARITY)
+GRANULARITIES = {
+    "month": ("year", "month"),
+    "day": ("year", "month", "day"),
+    "hour": ("year", "month", "day", "hour"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fraud (
+  transaction_id VARCHAR,
+  event_time TIMESTAMP,
+  fraud_prob DOUBLE,
+  source_file VARCHAR
+);
+CREATE TABLE IF NOT EXISTS files (
+  path VARCHAR PRIMARY KEY,
+  mtime DOUBLE,
+  size BIGINT,
+  rows BIGINT,
+  ingested_at TIMESTAMP
+);
+"""
+
+
+def hint_predicate(date_from: Optional[date] = None, date_to: Optional[date] = None,
+                   min_prob: Optional[float] = None) -> str:
+    """SQL for the query hints (inclusive days, fraud_prob >= min_prob); literals come from typed values."""
+    conds = []
+    if date_from is not None:
+        conds.append(f"event_time >= TIMESTAMP '{pd.Timestamp(date_from).isoformat()}'")
+    if date_to is not None:
+        conds.append(f"event_time < TIMESTAMP '{(pd.Timestamp(date_to) + pd.Timedelta(days=1)).isoformat()}'")
+    if min_prob is not None:
+        conds.append(f"fraud_prob >= {float(min_prob)!r}")
+    return " AND ".join(conds) or "true"
+
+
+def _ts(s: Optional[str]) -> Optional[pd.Timestamp]:
+    # manifest timestamps are UTC ISO strings; the viewer works in naive UTC like the TIMESTAMP casts
+    return pd.Timestamp(s).tz_convert(None) if s else None
+
+
+class ManifestReader:
+    """
+    Tails <root>/_manifest.jsonl written by the pipeline's sink and compaction
+    (add/remove records with rows, event_time range and max fraud_prob per file).
+    Each poll reads only the bytes appended since the last one; a rewritten
+    manifest (new inode) is replayed from the start. KPIs come from the records,
+    so no data file is opened to answer them.
+    """
+
+    NAME = "_manifest.jsonl"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.path = self.root / self.NAME
+        self.live: Dict[str, Dict[str, object]] = {}  # relative path -> add record
+        self.n_rows = 0
+        self.min_ts: Optional[pd.Timestamp] = None
+        self.max_ts: Optional[pd.Timestamp] = None
+        self._offset = 0
+        self._inode: Optional[int] = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _recompute(self):
+        self.n_rows = sum(int(r["rows"]) for r in self.live.values())
+        los = [t for t in (_ts(r.get("min_event_time")) for r in self.live.values()) if t is not None]
+        his = [t for t in (_ts(r.get("max_event_time")) for r in self.live.values()) if t is not None]
+        self.min_ts = min(los) if los else None
+        self.max_ts = max(his) if his else None
+
+    def poll(self) -> Tuple[List[str], List[str]]:
+        """Apply new records; returns (added, removed) relative paths."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return [], []
+        before = None
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            before, self.live, self._offset, self._inode = self.live, {}, 0, st.st_ino
+        if st.st_size == self._offset:
+            return [], []
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(st.st_size - self._offset)
+        end = chunk.rfind(b"\n") + 1  # leave a torn last line for the next poll
+        self._offset += end
+
+        added, removed, recompute = [], [], before is not None
+        for line in chunk[:end].splitlines():
+            r = json.loads(line)
+            path = r["path"]
+            if r["op"] == "add":
+                self.live[path] = r
+                added.append(path)
+                if not recompute:
+                    self.n_rows += int(r["rows"])
+                    lo, hi = _ts(r.get("min_event_time")), _ts(r.get("max_event_time"))
+                    if lo is not None:
+                        self.min_ts = lo if self.min_ts is None else min(self.min_ts, lo)
+                        self.max_ts = hi if self.max_ts is None else max(self.max_ts, hi)
+            else:
+                old = self.live.pop(path, None)
+                removed.append(path)
+                if old is not None and not recompute:
+                    self.n_rows -= int(old["rows"])
+                    # only a retracted extreme needs a (in-memory) rescan
+                    if _ts(old.get("min_event_time")) == self.min_ts or _ts(old.get("max_event_time")) == self.max_ts:
+                        recompute = True
+        if before is not None:
+            added = [p for p in self.live if p not in before]
+            removed = [p for p in before if p not in self.live]
+        if recompute:
+            self._recompute()
+        return added, removed
+
+    def files(self, date_from: Optional[date] = None, date_to: Optional[date] = None,
+              min_prob: Optional[float] = None) -> List[str]:
+        """Absolute paths of live files whose stats can match the filters (inclusive days)."""
+        lo = pd.Timestamp(date_from) if date_from is not None else None
+        hi = pd.Timestamp(date_to) + pd.Timedelta(days=1) if date_to is not None else None
+        out = []
+        for path, r in self.live.items():
+            if min_prob is not None and r.get("max_fraud_prob") is not None and r["max_fraud_prob"] < min_prob:
+                continue
+            f_lo, f_hi = _ts(r.get("min_event_time")), _ts(r.get("max_event_time"))
+            if hi is not None and f_lo is not None and f_lo >= hi:
+                continue
+            if lo is not None and f_hi is not None and f_hi < lo:
+                continue
+            out.append(str(self.root / path))
+        return sorted(out)
+
+
+class RiskStore:
+    def __init__(self, root: Path, db_path: str = ":memory:"):
+        self.root = Path(root)
+        self.pattern = str(self.root / "year=*" / "**" / "*.parquet")  # any partition depth
+        self.con = duckdb.connect(database=db_path)
+        self.con.execute(SCHEMA)
+        self._db = self.con.execute("SELECT current_database()").fetchone()[0]
+        self._lock = threading.Lock()
+        self.manifest = ManifestReader(self.root)
+
+        # manifest + KPIs, reloaded from the table when db_path persists across restarts
+        self.files: Dict[str, Tuple[float, int, int]] = {
+            p: (m, s, r) for p, m, s, r in self.con.execute("SELECT path, mtime, size, rows FROM files").fetchall()
+        }
+        self.n_rows = 0
+        self.min_ts: Optional[pd.Timestamp] = None
+        self.max_ts: Optional[pd.Timestamp] = None
+        self._recompute_kpis()
+        self.last_refresh: Dict[str, float] = {}
+
+    # ---- ingestion ----
+    def _listing(self) -> Dict[str, Tuple[float, int]]:
+        # with the sink manifest there is nothing to list: live files and their row counts are in it
+        if self.manifest.exists():
+            self.manifest.poll()
+            return {str(self.root / p): (0.0, int(r["rows"])) for p, r in self.manifest.live.items()}
+        out = {}
+        for p in glob.glob(self.pattern, recursive=True):
+            if os.path.basename(p).startswith("."):
+                continue  # in-flight temp files
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            out[p] = (st.st_mtime, st.st_size)
+        return out
+
+    def _recompute_kpis(self):
+        n, lo, hi = self.con.execute("SELECT count(*), min(event_time), max(event_time) FROM fraud").fetchone()
+        self.n_rows = int(n)
+        self.min_ts = pd.Timestamp(lo) if lo is not None else None
+        self.max_ts = pd.Timestamp(hi) if hi is not None else None
+
+    def _stage(self, paths: List[str]):
+        self.con.execute(
+            """
+            CREATE OR REPLACE TEMP TABLE stage AS
+            SELECT transaction_id, try_cast(event_time AS TIMESTAMP) AS event_time, fraud_prob,
+                   filename AS source_file
+            FROM read_parquet(?, filename=true, union_by_name=true)
+            """,
+            [paths],
+        )
+
+    def _ingest(self, listing: Dict[str, Tuple[float, int]], paths: List[str]) -> int:
+        # one read for all new files; if one vanished mid-refresh, fall back to file by file
+        try:
+            self._stage(paths)
+            staged = paths
+        except (duckdb.IOException, duckdb.InvalidInputException):
+            staged = []
+            for p in paths:
+                try:
+                    self._stage([p])
+                except (duckdb.IOException, duckdb.InvalidInputException):
+                    continue  # picked up (or forgotten) on the next refresh
+                self._commit_stage(listing, [p])
+                staged.append(p)
+            return sum(self.files[p][2] for p in staged)
+        return self._commit_stage(listing, staged)
+
+    def _commit_stage(self, listing: Dict[str, Tuple[float, int]], paths: List[str]) -> int:
+        n, lo, hi = self.con.execute("SELECT count(*), min(event_time), max(event_time) FROM stage").fetchone()
+        per_file = dict(self.con.execute("SELECT source_file, count(*) FROM stage GROUP BY 1").fetchall())
+        # sorted per ingest: files arrive roughly in time order, so row groups stay narrow in event_time
+        self.con.execute("INSERT INTO fraud SELECT * FROM stage ORDER BY event_time")
+        for p in paths:
+            mtime, size = listing[p]
+            rows = int(per_file.get(p, 0))
+            self.con.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, now())", [p, mtime, size, rows])
+            self.files[p] = (mtime, size, rows)
+
+        # KPIs grow with the new rows only
+        self.n_rows += int(n)
+        if lo is not None:
+            self.min_ts = pd.Timestamp(lo) if self.min_ts is None else min(self.min_ts, pd.Timestamp(lo))
+            self.max_ts = pd.Timestamp(hi) if self.max_ts is None else max(self.max_ts, pd.Timestamp(hi))
+        return int(n)
+
+    def _retract(self, paths: List[str]):
+        self.con.execute("DELETE FROM fraud WHERE source_file IN (SELECT unnest(?))", [paths])
+        self.con.execute("DELETE FROM files WHERE path IN (SELECT unnest(?))", [paths])
+        for p in paths:
+            self.files.pop(p, None)
+
+    def refresh(self) -> Dict[str, float]:
+        """Ingest new files, retract vanished/rewritten ones; cost follows the change, not the history."""
+        with self._lock:
+            t0 = time.perf_counter()
+            listing = self._listing()
+            gone = [p for p, (m, s, _) in self.files.items() if listing.get(p) != (m, s)]
+            gone_set = set(gone)
+            new = [p for p in listing if p not in self.files or p in gone_set]
+
+            if gone:
+                self._retract(gone)
+                self._recompute_kpis()  # retractions can move min/max; rare (compaction)
+            added = self._ingest(listing, new) if new else 0
+
+            self.last_refresh = {
+                "files_added": len(new),
+                "files_removed": len(gone),
+                "rows_added": added,
+                "secs": time.perf_counter() - t0,
+            }
+            return self.last_refresh
+
+    # ---- reads ----
+    def query(self, sql: str, params: Optional[list] = None, date_from: Optional[date] = None,
+              date_to: Optional[date] = None, min_prob: Optional[float] = None) -> pd.DataFrame:
+        # Cursors share the database but not the connection state; safe across Streamlit sessions.
+        # The hints become a per-cursor temp view `fraud` over the table (temp objects resolve
+        # first), so the caller's SQL only ever sees the selected window and DuckDB's zonemaps
+        # on event_time skip the row groups outside it.
+        cur = self.con.cursor()
+        try:
+            cur.execute(
+                f"""
+                CREATE OR REPLACE TEMP VIEW fraud AS
+                SELECT transaction_id, event_time, fraud_prob
+                FROM "{self._db}".main.fraud
+                WHERE {hint_predicate(date_from, date_to, min_prob)}
+                """
+            )
+            return cur.execute(sql, params or []).df()
+        finally:
+            cur.close()
+
+
+# ---- direct Parquet reads with partition pruning (VIEWER_SOURCE=parquet) ----
+
+def _days(date_from: date, date_to: date) -> List[pd.Timestamp]:
+    return list(pd.date_range(pd.Timestamp(date_from), pd.Timestamp(date_to), freq="D"))
+
+
+def partition_files(root: Path, granularity: str, date_from: date, date_to: date) -> List[str]:
+    """
+    Data files under the partitions overlapping [date_from, date_to] (inclusive
+    days): one glob per month for 'month' granularity, one per day otherwise,
+    so directories outside the window are never listed.
+    """
+    if granularity == "month":
+        months = sorted({(d.year, d.month) for d in _days(date_from, date_to)})
+        globs = [root / f"year={y}" / f"month={m:02d}" / "*.parquet" for y, m in months]
+    else:
+        depth = "*" if granularity == "hour" else ""
+        globs = [root / f"year={d.year}" / f"month={d.month:02d}" / f"day={d.day:02d}" / depth / "*.parquet"
+                 for d in _days(date_from, date_to)]
+    return sorted(p for g in globs for p in glob.glob(str(g)) if not os.path.basename(p).startswith("."))
+
+
+def partition_predicate(granularity: str, date_from: date, date_to: date) -> str:
+    """SQL over the hive partition columns, so DuckDB prunes files before opening them."""
+    if granularity == "month":
+        lo, hi = date_from.year * 100 + date_from.month, date_to.year * 100 + date_to.month
+        return f"(year * 100 + month) BETWEEN {lo} AND {hi}"
+    lo = date_from.year * 10000 + date_from.month * 100 + date_from.day
+    hi = date_to.year * 10000 + date_to.month * 100 + date_to.day
+    return f"(year * 10000 + month * 100 + day) BETWEEN {lo} AND {hi}"
+
+
+class ParquetSource:
+    """
+    Reads the sink's Parquet files on every query, restricted to the partitions
+    that overlap the selected dates. Same interface as RiskStore.
+
+    With the sink manifest, refreshes read only its new lines (KPIs included)
+    and queries skip files whose event_time range or max fraud_prob can't match.
+    """
+
+    def __init__(self, root: Path, granularity: str = "month"):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown PARTITION_GRANULARITY '{granularity}'; expected one of {list(GRANULARITIES)}")
+        self.root = Path(root)
+        self.granularity = granularity
+        self.pattern = str(self.root / "year=*" / "**" / "*.parquet")
+        self.con = duckdb.connect(database=":memory:")
+        self.con.execute("PRAGMA disable_object_cache;")  # new/updated parquet files are never cached
+        self.files: Dict[str, Tuple[float, int, int]] = {}
+        # without a manifest: path -> (mtime, size, rows, min event_time, max event_time)
+        self._stats: Dict[str, Tuple[float, int, int, Optional[pd.Timestamp], Optional[pd.Timestamp]]] = {}
+        self.n_rows = 0
+        self.min_ts: Optional[pd.Timestamp] = None
+        self.max_ts: Optional[pd.Timestamp] = None
+        self.last_refresh: Dict[str, float] = {}
+        self.manifest = ManifestReader(self.root)
+
+    def _scan_stats(self, listing: Dict[str, Tuple[float, int]], paths: List[str]) -> int:
+        # one read for all new/rewritten files; if one vanished mid-refresh, fall back to file by file
+        sql = (
+            "SELECT filename, count(*), min(try_cast(event_time AS TIMESTAMP)), max(try_cast(event_time AS TIMESTAMP)) "
+            "FROM read_parquet(?, filename=true, union_by_name=true) GROUP BY filename"
+        )
+        try:
+            rows, read = self.con.execute(sql, [paths]).fetchall(), paths
+        except (duckdb.IOException, duckdb.InvalidInputException):
+            rows, read = [], []
+            for p in paths:
+                try:
+                    rows += self.con.execute(sql, [[p]]).fetchall()
+                except (duckdb.IOException, duckdb.InvalidInputException):
+                    continue  # picked up (or forgotten) on the next refresh
+                read.append(p)
+        per_file = {p: (int(n), lo, hi) for p, n, lo, hi in rows}
+        for p in read:
+            n, lo, hi = per_file.get(p, (0, None, None))  # an empty file has no group
+            mtime, size = listing[p]
+            self._stats[p] = (mtime, size, n,
+                              pd.Timestamp(lo) if lo is not None else None,
+                              pd.Timestamp(hi) if hi is not None else None)
+        return sum(n for n, _, _ in per_file.values())
+
+    def refresh(self) -> Dict[str, float]:
+        t0 = time.perf_counter()
+        if self.manifest.exists():
+            added, removed = self.manifest.poll()
+            m = self.manifest
+            self.files = {str(self.root / p): (0.0, 0, int(r["rows"])) for p, r in m.live.items()}
+            self.n_rows, self.min_ts, self.max_ts = m.n_rows, m.min_ts, m.max_ts
+            self.last_refresh = {"files_added": len(added), "files_removed": len(removed),
+                                 "rows_added": 0, "secs": time.perf_counter() - t0}
+            return self.last_refresh
+
+        # no manifest (older sink): list, and scan only files that are new or changed (path/mtime/size)
+        listing = {}
+        for p in glob.glob(self.pattern, recursive=True):
+            if os.path.basename(p).startswith("."):
+                continue  # in-flight temp files
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            listing[p] = (st.st_mtime, st.st_size)
+        gone = [p for p, s in self._stats.items() if listing.get(p) != s[:2]]
+        for p in gone:
+            del self._stats[p]
+        new = [p for p in listing if p not in self._stats]
+        added = self._scan_stats(listing, new) if new else 0
+
+        stats = self._stats.values()
+        self.files = {p: (m, s, n) for p, (m, s, n, _, _) in self._stats.items()}
+        self.n_rows = sum(n for _, _, n, _, _ in stats)
+        los = [lo for _, _, _, lo, _ in stats if lo is not None]
+        his = [hi for _, _, _, _, hi in stats if hi is not None]
+        self.min_ts = min(los) if los else None
+        self.max_ts = max(his) if his else None
+        self.last_refresh = {
+            "files_added": len(new),
+            "files_removed": len(gone),
+            "rows_added": added,
+            "secs": time.perf_counter() - t0,
+        }
+        return self.last_refresh
+
+    def query(self, sql: str, params: Optional[list] = None, date_from: Optional[date] = None,
+              date_to: Optional[date] = None, min_prob: Optional[float] = None) -> pd.DataFrame:
+        cur = self.con.cursor()
+        try:
+            if self.manifest.exists():
+                paths, where = self.manifest.files(date_from, date_to, min_prob), "true"
+            elif date_from is not None and date_to is not None:
+                paths = partition_files(self.root, self.granularity, date_from, date_to)
+                where = partition_predicate(self.granularity, date_from, date_to)
+            else:
+                paths, where = list(self.files), "true"
+            if not paths:
+                return pd.DataFrame(columns=["transaction_id", "event_time", "fraud_prob"])
+            # the file list goes in through the relation API (a view can't take bound parameters)
+            cur.read_parquet(paths, hive_partitioning=True, union_by_name=True).create_view("fraud_files", replace=True)
+            cur.execute(
+                f"""
+                CREATE OR REPLACE TEMP VIEW fraud AS
+                SELECT transaction_id, try_cast(event_time AS TIMESTAMP) AS event_time, fraud_prob
+                FROM fraud_files
+                WHERE {where}
+                """
+            )
+            return cur.execute(sql, params or []).df()
+        finally:
+            cur.close()
@@ -0,0 +1,49 @@
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from core.settings import settings
+from models.schemas import (
+    FEATURES, BulkRequest, BulkResponse, MetricsResponse, ScoreResponse, Transaction,
+)
+from services.batcher import MicroBatcher, QueueFull
+from services.model import ModelHolder
+
+router = APIRouter()
+# one model + batcher per process, shared by every request
+model = ModelHolder(settings.MODEL_PATH, check_interval=settings.MODEL_RELOAD_CHECK_SECS)
+batcher = MicroBatcher(
+    model.predict,
+    max_batch=settings.MAX_BATCH,
+    max_wait_ms=settings.MAX_WAIT_MS,
+    workers=settings.INFERENCE_WORKERS,
+    queue_max=settings.QUEUE_MAX,
+)
+
+
+def _matrix(txs: list[Transaction]) -> np.ndarray:
+    return np.array([[getattr(t, f) for f in FEATURES] for t in txs], dtype=np.float32)
+
+
+async def _score(txs: list[Transaction]) -> list[ScoreResponse]:
+    try:
+        probs = await batcher.submit(_matrix(txs))
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Scoring queue full: {e}")
+    return [ScoreResponse(transaction_id=t.transaction_id, fraud_prob=float(p)) for t, p in zip(txs, probs)]
+
+@router.get("/health")
+def health():
+    return {"ok": True, "model_loaded": model.loads > 0}
+
+@router.post("/score", response_model=ScoreResponse)
+async def score(tx: Transaction):
+    return (await _score([tx]))[0]
+
+@router.post("/score/bulk", response_model=BulkResponse)
+async def score_bulk(req: BulkRequest):
+    if len(req.transactions) > settings.BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX} transactions per call")
+    return BulkResponse(results=await _score(req.transactions))
+
+@router.get("/metrics", response_model=MetricsResponse)
+def metrics():
+    return MetricsResponse(**batcher.snapshot(), model=model.status())
@@ -0,0 +1,15 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    MODEL_PATH: str = "ml_artifacts/catboost_fraud.cbm"
+    MODEL_RELOAD_CHECK_SECS: float = 5.0  # the model is hot-swapped when the file changes
+    # micro-batching: concurrent requests are coalesced until MAX_BATCH rows or MAX_WAIT_MS
+    MAX_BATCH: int = 256
+    MAX_WAIT_MS: float = 2.0
+    INFERENCE_WORKERS: int = 2  # batches scored concurrently (threads; CatBoost releases the GIL)
+    QUEUE_MAX: int = 10000  # pending requests before /score answers 503
+    BULK_MAX: int = 100000  # transactions per /score/bulk call
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
+
+settings = Settings()
@@ -0,0 +1,15 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from api.routers.score import router as score_router, batcher, model  # reuse the same instances
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model.get()  # load before taking traffic, so the first request doesn't pay for it
+    await batcher.start()
+    try:
+        yield
+    finally:
+        await batcher.stop()
+
+app = FastAPI(title="Fraud scoring", version="1.0.0", lifespan=lifespan)
+app.include_router(score_router, tags=["score"])
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+
+# Same feature contract as the Mage scoring block (fraud_prevention_pipeline/utils/wire.py)
+FEATURES = [
+    'V1','V2','V3','V4','V5','V6','V7','V8','V9','V10',
+    'V11','V12','V13','V14','V15','V16','V17','V18','V19','V20',
+    'V21','V22','V23','V24','V25','V26','V27','V28','Amount'
+]
+
+# API payloads
+class Transaction(BaseModel):
+    transaction_id: str | None = None
+
+    V1: float;  V2: float;  V3: float;  V4: float;  V5: float;  V6: float;  V7: float
+    V8: float;  V9: float;  V10: float; V11: float; V12: float; V13: float; V14: float
+    V15: float; V16: float; V17: float; V18: float; V19: float; V20: float; V21: float
+    V22: float; V23: float; V24: float; V25: float; V26: float; V27: float; V28: float
+    Amount: float
+
+class BulkRequest(BaseModel):
+    transactions: list[Transaction] = Field(..., min_length=1)
+
+class ScoreResponse(BaseModel):
+    transaction_id: str | None
+    fraud_prob: float
+
+class BulkResponse(BaseModel):
+    results: list[ScoreResponse]
+
+class LatencyStatus(BaseModel):
+    p50_ms: float | None
+    p99_ms: float | None
+
+class MetricsResponse(BaseModel):
+    requests_total: int
+    rows_total: int
+    batches_total: int
+    errors_total: int
+    queue_depth: int
+    request_latency: LatencyStatus  # submit -> result, inside the service
+    queue_wait: LatencyStatus
+    inference: LatencyStatus  # per batch
+    batch_size_histogram: dict[str, int]  # upper bound (rows) -> batches
+    model: dict
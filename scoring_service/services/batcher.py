@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+import numpy as np
+from services.metrics import ScoringStats
+
+log = logging.getLogger("scoring.batcher")
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class _Pending:
+    X: np.ndarray
+    fut: asyncio.Future
+    enqueued_at: float
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent score requests into one model call.
+
+    A runner takes the first pending request, then keeps collecting until the
+    batch holds `max_batch` rows or `max_wait_ms` has passed since that first
+    request, and scores the batch in a thread pool so the event loop keeps
+    accepting requests. `workers` runners overlap collection and inference.
+    Requests with at least `max_batch` rows (bulk calls) skip the queue.
+    """
+
+    def __init__(self, predict: Callable[[np.ndarray], np.ndarray], max_batch: int = 256,
+                 max_wait_ms: float = 2.0, workers: int = 2, queue_max: int = 10000):
+        self.predict = predict
+        self.max_batch = int(max_batch)
+        self.max_wait = float(max_wait_ms) / 1000.0
+        self.workers = max(1, int(workers))
+        self.stats = ScoringStats(self.max_batch)
+        self._queue: asyncio.Queue | None = None
+        self._queue_max = int(queue_max)
+        self._executor: ThreadPoolExecutor | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self._queue_max)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="score")
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                p = self._queue.get_nowait()
+                if not p.fut.done():
+                    p.fut.set_exception(RuntimeError("scoring service stopped"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, X: np.ndarray) -> np.ndarray:
+        """P(fraud) for each row of X (float32, FEATURES order)."""
+        t0 = time.perf_counter()
+        s = self.stats
+        s.requests_total += 1
+        try:
+            if len(X) >= self.max_batch:
+                probs = await self._infer(X)
+            else:
+                fut = asyncio.get_running_loop().create_future()
+                try:
+                    self._queue.put_nowait(_Pending(X, fut, t0))
+                except asyncio.QueueFull:
+                    raise QueueFull(f"{self.queue_depth} requests pending")
+                probs = await fut
+        except Exception:
+            s.errors_total += 1
+            raise
+        s.request_latency.add((time.perf_counter() - t0) * 1000.0)
+        return probs
+
+    async def _infer(self, X: np.ndarray) -> np.ndarray:
+        t0 = time.perf_counter()
+        probs = await asyncio.get_running_loop().run_in_executor(self._executor, self.predict, X)
+        s = self.stats
+        s.inference.add((time.perf_counter() - t0) * 1000.0)
+        s.batches_total += 1
+        s.rows_total += len(X)
+        s.batch_sizes.add(len(X))
+        return probs
+
+    async def _collect(self) -> list[_Pending]:
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        batch, rows = [first], len(first.X)
+        deadline = loop.time() + self.max_wait
+        while rows < self.max_batch:
+            # take what is already queued without yielding, then wait out the deadline
+            try:
+                p = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    p = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            batch.append(p)
+            rows += len(p.X)
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            now = time.perf_counter()
+            for p in batch:
+                self.stats.queue_wait.add((now - p.enqueued_at) * 1000.0)
+            X = batch[0].X if len(batch) == 1 else np.concatenate([p.X for p in batch])
+            try:
+                probs = await self._infer(X)
+            except Exception as e:
+                log.error(f"Batch of {len(X)} rows failed: {e}")
+                for p in batch:
+                    if not p.fut.done():
+                        p.fut.set_exception(e)
+                continue
+            i = 0
+            for p in batch:
+                k = len(p.X)
+                if not p.fut.done():  # the client may have gone away
+                    p.fut.set_result(probs[i:i + k])
+                i += k
+
+    def snapshot(self) -> dict:
+        s = self.stats
+        return {
+            "requests_total": s.requests_total,
+            "rows_total": s.rows_total,
+            "batches_total": s.batches_total,
+            "errors_total": s.errors_total,
+            "queue_depth": self.queue_depth,
+            "request_latency": s.request_latency.status(),
+            "queue_wait": s.queue_wait.status(),
+            "inference": s.inference.status(),
+            "batch_size_histogram": s.batch_sizes.status(),
+        }
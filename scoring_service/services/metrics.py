@@ -0,0 +1,51 @@
+from collections import deque
+import numpy as np
+
+
+class LatencyReservoir:
+    # last N samples (ms), percentiles on demand
+    def __init__(self, max_samples: int = 8192):
+        self._samples: deque = deque(maxlen=max_samples)
+
+    def add(self, ms: float):
+        self._samples.append(ms)
+
+    def percentiles(self, qs=(50, 99)) -> dict:
+        if not self._samples:
+            return {q: None for q in qs}
+        vals = np.percentile(np.fromiter(self._samples, dtype=float), qs)
+        return {q: float(v) for q, v in zip(qs, vals)}
+
+    def status(self) -> dict:
+        p = self.percentiles()
+        return {"p50_ms": p[50], "p99_ms": p[99]}
+
+
+class SizeHistogram:
+    # power-of-two buckets: "1", "2", "4", ... "<max>" (bucket = smallest bound >= size)
+    def __init__(self, max_size: int):
+        self.bounds = [1]
+        while self.bounds[-1] < max_size:
+            self.bounds.append(self.bounds[-1] * 2)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket: above max_size (bulk calls)
+
+    def add(self, size: int):
+        i = int(np.searchsorted(self.bounds, size))
+        self.counts[i] += 1
+
+    def status(self) -> dict:
+        out = {str(b): c for b, c in zip(self.bounds, self.counts)}
+        out["+Inf"] = self.counts[-1]
+        return out
+
+
+class ScoringStats:
+    def __init__(self, max_batch: int):
+        self.requests_total = 0
+        self.rows_total = 0
+        self.batches_total = 0
+        self.errors_total = 0
+        self.request_latency = LatencyReservoir()
+        self.queue_wait = LatencyReservoir()
+        self.inference = LatencyReservoir()
+        self.batch_sizes = SizeHistogram(max_batch)
@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+log = logging.getLogger("scoring.model")
+
+
+def load_catboost(path: str):
+    from catboost import CatBoostClassifier
+
+    model = CatBoostClassifier()
+    model.load_model(path)
+    return model
+
+
+class ModelHolder:
+    # One model per process, swapped in (single reference assignment) when the file changes
+    def __init__(self, path: str, check_interval: float = 5.0, loader=load_catboost):
+        self.path = path
+        self.check_interval = float(check_interval)
+        self.loader = loader
+        self.loads = 0
+        self.checksum: str | None = None
+        self.last_load_ms: float | None = None
+        self.last_error: str | None = None
+        self._model = None
+        self._sig = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        now = time.monotonic()
+        if self._model is not None and now < self._next_check:
+            return self._model
+        with self._lock:
+            if self._model is None or now >= self._next_check:
+                self._next_check = now + self.check_interval
+                try:
+                    self._maybe_reload()
+                except Exception as e:
+                    self.last_error = str(e)
+                    if self._model is None:
+                        raise
+                    log.warning(f"Model reload failed, keeping current model: {e}")
+        return self._model
+
+    def _maybe_reload(self):
+        st = os.stat(self.path)
+        sig = (st.st_mtime_ns, st.st_size)
+        if self._model is not None and sig == self._sig:
+            return
+        with open(self.path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        if self._model is not None and checksum == self.checksum:
+            self._sig = sig
+            return
+        t0 = time.perf_counter()
+        model = self.loader(self.path)
+        self.last_load_ms = (time.perf_counter() - t0) * 1000.0
+        self._model, self._sig, self.checksum = model, sig, checksum
+        self.loads += 1
+        self.last_error = None
+        log.info(f"Model loaded: {self.path} sha256={checksum[:12]} in {self.last_load_ms:.1f} ms")
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        # P(fraud) for a (n, len(FEATURES)) matrix
+        return self.get().predict_proba(X)[:, 1]
+
+    def status(self) -> dict:
+        return {
+            "path": self.path,
+            "loads": self.loads,
+            "checksum": self.checksum,
+            "last_load_ms": self.last_load_ms,
+            "last_error": self.last_error,
+        }